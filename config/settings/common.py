@@ -206,7 +206,11 @@ APPEND_SLASH = True
 register('seed_json', CeleryDatetimeSerializer.seed_dumps,
          CeleryDatetimeSerializer.seed_loads,
          content_type='application/json', content_encoding='utf-8')
-CELERY_WORKER_MAX_TASKS_PER_CHILD = 1
+# The worker processes are kept between the tasks, along with their caches of the organizations
+# (columns, column mappings, cleaners and data quality rules). They are recycled after a number of
+# tasks, or once a task leaves them using more than the given memory (in KiB).
+CELERY_WORKER_MAX_TASKS_PER_CHILD = 1000
+CELERY_WORKER_MAX_MEMORY_PER_CHILD = 1024 * 1024  # 1 GiB
 CELERY_ACCEPT_CONTENT = ['seed_json', 'pickle']
 CELERY_TASK_SERIALIZER = 'seed_json'
 CELERY_RESULT_SERIALIZER = 'seed_json'
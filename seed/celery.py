@@ -7,10 +7,13 @@
 from __future__ import absolute_import
 
 import os
+import sys
 
 import celery
 import raven
+from celery.signals import task_postrun
 from django.conf import settings
+from django.db import close_old_connections
 from raven.contrib.celery import register_signal, register_logger_signal
 
 # set the default Django settings module for the 'celery' program.
@@ -35,5 +38,26 @@ app = Celery('seed')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks(lambda: settings.SEED_CORE_APPS)
 
+# recursion limit of the worker processes, some tasks raise it while they run
+DEFAULT_RECURSION_LIMIT = 1000
+
+
+@task_postrun.connect
+def reset_worker_state(task=None, **kwargs):
+    """
+    The worker processes run many tasks (see CELERY_WORKER_MAX_TASKS_PER_CHILD), reset what a task
+    may have changed in the process so it does not leak into the next tasks. The caches of the
+    organizations are versioned and are kept.
+    """
+    if task is not None and task.request.is_eager:
+        return
+
+    sys.setrecursionlimit(DEFAULT_RECURSION_LIMIT)
+
+    # Celery's Django fixup already does it after each task, this makes sure a connection broken
+    # or left in a failed transaction by the task is not reused by the next one
+    close_old_connections()
+
+
 if __name__ == '__main__':
     app.start()
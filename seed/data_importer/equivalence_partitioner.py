@@ -160,6 +160,38 @@ class EquivalencePartitioner(object):
         else:
             return False
 
+    @staticmethod
+    def make_key_index(keys):
+        """
+        Index the keys by each of their values, to find the keys equivalent to another one
+        without comparing it with all of them (see find_equivalent_keys).
+
+        :param keys: iterable of keys
+        :return: dict, {(position, value): [key, ...]}
+        """
+        key_index = collections.defaultdict(list)
+        for key in keys:
+            for position, value in enumerate(key):
+                if value is not None:
+                    key_index[(position, value)].append(key)
+        return key_index
+
+    @staticmethod
+    def find_equivalent_keys(key, key_index):
+        """
+        Return the indexed keys that are equivalent to the key, i.e. for which
+        calculate_key_equivalence(key, indexed_key) is True.
+
+        :param key: tuple
+        :param key_index: dict, see make_key_index
+        :return: set of keys
+        """
+        equivalent_keys = set()
+        for position, value in enumerate(key):
+            if value is not None:
+                equivalent_keys.update(key_index.get((position, value), []))
+        return equivalent_keys
+
     def calculate_comparison_key(self, obj):
         return self.equiv_comparison_key_func(obj)
 
@@ -16,7 +16,8 @@ from django.db import (
     IntegrityError,
     transaction,
 )
-from django.db.models import Subquery
+from django.db.models import Count, Q, Subquery
+from django.utils import timezone
 
 from functools import reduce
 
@@ -43,9 +44,9 @@ from seed.models import (
 from seed.models.auditlog import AUDIT_IMPORT
 from seed.utils.match import (
     empty_criteria_filter,
-    match_merge_link,
-    matching_filter_criteria,
+    match_merge_link_many,
     matching_criteria_column_names,
+    states_with_existing_matches,
 )
 from seed.utils.merge import merge_states_with_views
 
@@ -167,7 +168,7 @@ def match_and_link_incoming_properties_and_taxlots(file_pk, progress_key):
     pair_new_states(merged_linked_property_views, merged_linked_taxlot_views)
     log_debug('End pair_new_states')
 
-    return {
+    results = {
         'import_file_records': import_file.num_rows,
         'property_initial_incoming': property_initial_incoming_count,
         'property_duplicates_against_existing': property_duplicates_against_existing_count,
@@ -184,6 +185,40 @@ def match_and_link_incoming_properties_and_taxlots(file_pk, progress_key):
         'tax_lot_merges_within_file': tax_lot_merges_within_file_count,
         'tax_lot_new': tax_lot_new_count,
     }
+    # keep the summary of the geocoding along with the matching results, see
+    # ImportFileViewSet.matching_and_geocoding_results
+    results.update(geocoding_results(import_file.id, PropertyState))
+    results.update(geocoding_results(import_file.id, TaxLotState))
+
+    return results
+
+
+def geocoding_results(import_file_id, StateClass):
+    """
+    Count the matched -States of an ImportFile by their geocoding confidence, in one query.
+
+    :param import_file_id: int
+    :param StateClass: PropertyState or TaxLotState
+    :return: dict, e.g. {'property_geocoded_high_confidence': 10, ...}
+    """
+    prefix = 'property' if StateClass == PropertyState else 'tax_lot'
+    return StateClass.objects.filter(
+        import_file_id=import_file_id,
+        data_state=DATA_STATE_MATCHING,
+    ).aggregate(**{
+        prefix + '_geocoded_high_confidence': Count(
+            'id', filter=Q(geocoding_confidence__startswith='High')
+        ),
+        prefix + '_geocoded_low_confidence': Count(
+            'id', filter=Q(geocoding_confidence__startswith='Low')
+        ),
+        prefix + '_geocoded_manually': Count(
+            'id', filter=Q(geocoding_confidence='Manually geocoded (N/A)')
+        ),
+        prefix + '_geocode_not_possible': Count(
+            'id', filter=Q(geocoding_confidence='Missing address components (N/A)')
+        ),
+    })
 
 
 def filter_duplicate_states(unmatched_states):
@@ -215,7 +250,10 @@ def filter_duplicate_states(unmatched_states):
         in ids_grouped_by_hash
     ]
     duplicate_state_ids = reduce(lambda x, y: x + y, ids_grouped_by_hash)
-    duplicate_count = unmatched_states.filter(pk__in=duplicate_state_ids).update(data_state=DATA_STATE_DELETE)
+    duplicate_count = unmatched_states.filter(pk__in=duplicate_state_ids).update(
+        data_state=DATA_STATE_DELETE,
+        updated=timezone.now()
+    )
 
     return canonical_state_ids, duplicate_count
 
@@ -273,7 +311,10 @@ def inclusive_match_and_merge(unmatched_state_ids, org, StateClass):
             promoted_ids.append(merge_state.id)
 
     # Flag the soon to be promoted ID -States as having gone through matching
-    StateClass.objects.filter(pk__in=promoted_ids).update(data_state=DATA_STATE_MATCHING)
+    StateClass.objects.filter(pk__in=promoted_ids).update(
+        data_state=DATA_STATE_MATCHING,
+        updated=timezone.now()
+    )
 
     return promoted_ids, merges_within_file
 
@@ -316,7 +357,7 @@ def states_to_views(unmatched_state_ids, org, cycle, StateClass):
         pk__in=unmatched_state_ids,
         hash_object__in=Subquery(existing_states.values('hash_object'))
     )
-    duplicate_count = duplicate_states.update(data_state=DATA_STATE_DELETE)
+    duplicate_count = duplicate_states.update(data_state=DATA_STATE_DELETE, updated=timezone.now())
 
     column_names = matching_criteria_column_names(org.id, table_name)
 
@@ -335,29 +376,45 @@ def states_to_views(unmatched_state_ids, org, cycle, StateClass):
     )
 
     # For the remaining -States, search for a match within the -States that are attached to -Views.
+    # All of the remaining -States are matched against the Cycle's -States in one query.
     # If one match is found, pass that along.
     # If multiple matches are found, merge them together, pass along the resulting record.
     # Otherwise, add current -State to be promoted as is.
+    remaining_state_ids = list(unmatched_states.values_list('id', flat=True))
+    existing_matches = states_with_existing_matches(remaining_state_ids, cycle.id, column_names, StateClass)
+    single_matches = StateClass.objects.in_bulk([
+        existing_state_ids[0]
+        for existing_state_ids
+        in existing_matches.values()
+        if len(existing_state_ids) == 1
+    ])
+    incoming_states = StateClass.objects.in_bulk(list(existing_matches.keys()))
+
     merged_between_existing_count = 0
     merge_state_pairs = []
-    for state in unmatched_states:
-        matching_criteria = matching_filter_criteria(state, column_names)
-        existing_state_matches = StateClass.objects.filter(
-            pk__in=Subquery(existing_cycle_views.values('state_id')),
-            **matching_criteria
-        )
-        count = existing_state_matches.count()
+    merged_existing_states = {}
+    promote_ids = []
+    for state_id in remaining_state_ids:
+        existing_state_ids = existing_matches.get(state_id, [])
+        count = len(existing_state_ids)
 
         if count > 1:
-            merged_between_existing_count += count
-            existing_state_ids = list(existing_state_matches.order_by('updated').values_list('id', flat=True))
-            # The following merge action ignores merge protection and prioritizes -States by most recent AuditLog
-            merged_state = merge_states_with_views(existing_state_ids, org.id, 'System Match', StateClass)
-            merge_state_pairs.append((merged_state, state))
+            # Several incoming -States can match the same existing -States, only merge those once
+            merge_key = tuple(existing_state_ids)
+            if merge_key not in merged_existing_states:
+                merged_between_existing_count += count
+                # The following merge action ignores merge protection and prioritizes -States by most recent AuditLog
+                merged_existing_states[merge_key] = merge_states_with_views(
+                    existing_state_ids, org.id, 'System Match', StateClass
+                )
+            merge_state_pairs.append((merged_existing_states[merge_key], incoming_states[state_id]))
         elif count == 1:
-            merge_state_pairs.append((existing_state_matches.first(), state))
+            merge_state_pairs.append((single_matches[existing_state_ids[0]], incoming_states[state_id]))
         else:
-            promote_states = promote_states | StateClass.objects.filter(pk=state.id)
+            promote_ids.append(state_id)
+
+    if promote_ids:
+        promote_states = promote_states | StateClass.objects.filter(pk__in=promote_ids)
 
     # Process -States into -Views either directly (promoted_ids) or post-merge (merge_state_pairs).
     _log.debug("There are %s merge_state_pairs and %s promote_states" % (len(merge_state_pairs), promote_states.count()))
@@ -365,11 +422,19 @@ def states_to_views(unmatched_state_ids, org, cycle, StateClass):
     processed_views = []
     promoted_ids = []
     merged_state_ids = []
+    existing_views = {
+        view.state_id: view
+        for view
+        in ViewClass.objects.filter(
+            cycle_id=cycle.id,
+            state_id__in=[existing_state.id for existing_state, _ in merge_state_pairs]
+        )
+    }
     try:
         with transaction.atomic():
             for state_pair in merge_state_pairs:
                 existing_state, newer_state = state_pair
-                existing_view = ViewClass.objects.get(state_id=existing_state.id)
+                existing_view = existing_views[existing_state.id]
 
                 # Merge -States and assign new/merged -State to existing -View
                 merged_state = save_state_match(existing_state, newer_state, priorities)
@@ -379,21 +444,22 @@ def states_to_views(unmatched_state_ids, org, cycle, StateClass):
                 processed_views.append(existing_view)
                 merged_state_ids.append(merged_state.id)
 
-            for state in promote_states:
-                promoted_ids.append(state.id)
-                created_view = state.promote(cycle)
-                processed_views.append(created_view)
+            promote_states = list(promote_states)
+            promoted_ids = [state.id for state in promote_states]
+            processed_views.extend(StateClass.promote_many(promote_states, cycle))
     except IntegrityError as e:
         raise IntegrityError("Could not merge results with error: %s" % (e))
 
     new_count = len(promoted_ids)
     # update merge_state while excluding any states that were a product of a previous, file-inclusive merge
     StateClass.objects.filter(pk__in=promoted_ids).exclude(merge_state=MERGE_STATE_MERGED).update(
-        merge_state=MERGE_STATE_NEW
+        merge_state=MERGE_STATE_NEW,
+        updated=timezone.now()
     )
     matched_count = StateClass.objects.filter(pk__in=merged_state_ids).update(
         data_state=DATA_STATE_MATCHING,
-        merge_state=MERGE_STATE_MERGED
+        merge_state=MERGE_STATE_MERGED,
+        updated=timezone.now()
     )
 
     return list(set(processed_views)), duplicate_count, new_count, matched_count, merged_between_existing_count
@@ -401,22 +467,26 @@ def states_to_views(unmatched_state_ids, org, cycle, StateClass):
 
 def link_views(merged_views, ViewClass):
     """
-    Run each of the given -Views through a linking round.
+    Run the given -Views through a linking round. The matches of all the -Views
+    are looked up together and each group of matches is merged and linked once.
 
     For details on the actual linking logic, please refer to the the
-    match_merge_link() method.
+    match_merge_link() and match_merge_link_many() methods.
     """
     if ViewClass == PropertyView:
         state_class_name = "PropertyState"
     else:
         state_class_name = "TaxLotState"
 
+    _merge_count, _link_count, target_view_ids = match_merge_link_many(
+        [view.id for view in merged_views], state_class_name
+    )
+    target_views = ViewClass.objects.in_bulk(list(set(target_view_ids.values())))
+
     processed_views = []
     for view in merged_views:
-        _merge_count, _link_count, view_id = match_merge_link(view.id, state_class_name)
-
-        if view_id is not None:
-            processed_views.append(ViewClass.objects.get(pk=view_id))
+        if view.id in target_view_ids:
+            processed_views.append(target_views[target_view_ids[view.id]])
         else:
             processed_views.append(view)
 
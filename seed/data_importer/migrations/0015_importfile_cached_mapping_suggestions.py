@@ -0,0 +1,19 @@
+# Generated by Django 2.2.13 on 2026-10-18 12:00
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_importer', '0014_importfile_has_generated_headers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importfile',
+            name='cached_mapping_suggestions',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -9,6 +9,7 @@ import hashlib
 import json
 import logging
 import math
+import os
 import tempfile
 
 try:
@@ -668,6 +669,9 @@ class ImportFile(NotDeletableModel, TimeStampedModel):
     # This should really be a many-to-many with the column/ColumnMapping table.
     cached_mapped_columns = models.TextField(blank=True, null=True)
     cached_second_to_fifth_row = models.TextField(blank=True, null=True)
+    # Save the suggested column mappings of the file along with the version of the columns of the
+    # organization they were suggested against, see seed.utils.mapping.get_mapping_suggestions
+    cached_mapping_suggestions = JSONField(default=dict, blank=True)
     has_header_row = models.BooleanField(default=True)
     has_generated_headers = models.BooleanField(default=False)
     mapping_completion = models.IntegerField(blank=True, null=True)
@@ -728,13 +732,23 @@ class ImportFile(NotDeletableModel, TimeStampedModel):
     @property
     def local_file(self):
         if not hasattr(self, '_local_file'):
-            temp_file = tempfile.NamedTemporaryFile(mode='w+b', delete=False)
-            for chunk in self.file.chunks(1024):
-                temp_file.write(chunk)
-            temp_file.flush()
-            temp_file.close()
-            self.file.close()
-            self._local_file = open(temp_file.name, 'rU')
+            try:
+                # Files on the local file system are read in place instead of being copied. This
+                # matters for the raw save chunk tasks which each only read their own slice.
+                file_path = self.file.path
+            except NotImplementedError:
+                file_path = None
+
+            if file_path and os.path.exists(file_path):
+                self._local_file = open(file_path, 'rU')
+            else:
+                temp_file = tempfile.NamedTemporaryFile(mode='w+b', delete=False)
+                for chunk in self.file.chunks(1024):
+                    temp_file.write(chunk)
+                temp_file.flush()
+                temp_file.close()
+                self.file.close()
+                self._local_file = open(temp_file.name, 'rU')
 
         self._local_file.seek(0)
         return self._local_file
@@ -17,7 +17,7 @@ from _csv import Error
 from builtins import str
 from collections import namedtuple
 from datetime import date, datetime
-from itertools import chain
+from itertools import chain, islice
 from math import ceil
 import zipfile
 
@@ -27,7 +27,7 @@ from celery.utils.log import get_task_logger
 from django.contrib.gis.geos import GEOSGeometry
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.db import IntegrityError, DataError
-from django.db import connection, transaction
+from django.db import transaction
 from django.db.utils import ProgrammingError
 from django.utils import timezone as tz
 from django.utils.timezone import make_naive
@@ -61,6 +61,7 @@ from seed.models import (
     Column,
     ColumnMapping,
     Meter,
+    MeterReading,
     PropertyState,
     PropertyView,
     TaxLotView,
@@ -80,6 +81,7 @@ from seed.models.data_quality import (
     Rule,
 )
 from seed.utils.buildings import get_source_type
+from seed.utils.cache import ProcessLRUCache
 from seed.utils.geocode import geocode_buildings, MapQuestAPIKeyError
 from seed.utils.ubid import decode_unique_ids
 
@@ -89,6 +91,12 @@ _log = get_task_logger(__name__)
 
 STR_TO_CLASS = {'TaxLotState': TaxLotState, 'PropertyState': PropertyState}
 
+# number of rows per INSERT statement when writing the mapped states and their audit logs
+MAP_BULK_CREATE_BATCH_SIZE = 500
+
+# number of rows per INSERT statement when writing the raw states
+RAW_BULK_CREATE_BATCH_SIZE = 500
+
 
 @shared_task(ignore_result=True)
 def check_data_chunk(model, ids, dq_id):
@@ -242,6 +250,32 @@ def _build_cleaner(org):
     return cleaners.Cleaner(ontology)
 
 
+# The cleaner and the column mappings of the organizations are kept by the worker processes
+# between the map_row_chunk tasks, until the columns or the mappings of the organization change
+_cleaner_cache = ProcessLRUCache()
+_column_mappings_cache = ProcessLRUCache()
+
+
+def _retrieve_cleaner(org):
+    """Return the cleaner of the organization, see _build_cleaner"""
+    return _cleaner_cache.get_or_build(
+        org.id, Column.retrieve_columns_version(org.id), lambda: _build_cleaner(org)
+    )
+
+
+def _retrieve_column_mappings_by_table_name(org):
+    """
+    Return a copy of the column mappings of the organization by table name, see
+    ColumnMapping.get_column_mappings_by_table_name. The copy can be modified by the caller.
+    """
+    table_mappings = _column_mappings_cache.get_or_build(
+        org.id,
+        Column.retrieve_columns_version(org.id),
+        lambda: ColumnMapping.get_column_mappings_by_table_name(org)
+    )
+    return copy.deepcopy(table_mappings)
+
+
 @shared_task(ignore_result=True)
 def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
     """Does the work of matching a mapping to a source type and saving
@@ -259,10 +293,10 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
     elif source_type == BUILDINGSYNC_RAW:
         save_type = BUILDINGSYNC_RAW
 
-    org = Organization.objects.get(pk=import_file.import_record.super_organization.pk)
+    org = Organization.objects.get(pk=import_file.import_record.super_organization_id)
 
     # get all the table_mappings that exist for the organization
-    table_mappings = ColumnMapping.get_column_mappings_by_table_name(org)
+    table_mappings = _retrieve_column_mappings_by_table_name(org)
 
     # Remove any of the mappings that are not in the current list of raw columns because this
     # can really mess up the mapping of delimited_fields.
@@ -279,7 +313,7 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
             if not table_mappings[table]:
                 del table_mappings[table]
 
-    map_cleaner = _build_cleaner(org)
+    map_cleaner = _retrieve_cleaner(org)
 
     # *** BREAK OUT INTO SEPARATE METHOD ***
     # figure out which import field is defined as the unique field that may have a delimiter of
@@ -335,14 +369,20 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
                         footprint_details['raw_field'] = k
                         footprint_details['obj_field'] = v[1]
 
+                # hash of an object with no data, used to skip rows that did not map to anything
+                empty_hash = hash_state_object(
+                    STR_TO_CLASS[table](organization=import_file.import_record.super_organization),
+                    include_extra_data=False
+                )
+
                 # All the data live in the PropertyState.extra_data field when the data are imported
                 data = PropertyState.objects.filter(id__in=ids).only('extra_data',
                                                                      'bounding_box').iterator()
 
-                # Since we are importing CSV, then each extra_data field will have the same fields.
-                # So save the map_model_obj outside of for loop to pass into the `save_column_names`
-                # methods
-                map_model_obj = None
+                # Collect all of the mapped objects for this table in memory and write them with
+                # bulk_create at the end of the chunk. Keep the original row with the object so
+                # that the BuildingSync files can be linked back to the raw PropertyState.
+                mapped_objs = []
 
                 # Loop over all the rows
                 for original_row in data:
@@ -392,9 +432,7 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
                         # the test data the tax lot id is the same for many rows. Make sure
                         # to only create/save the object if it hasn't been created before.
                         if hash_state_object(map_model_obj, include_extra_data=False) == \
-                            hash_state_object(
-                                STR_TO_CLASS[table](organization=map_model_obj.organization),
-                                include_extra_data=False):
+                                empty_hash:
                             # Skip this object as it has no data...
                             _log.warn(
                                 "Skipping property or taxlot during mapping because it is identical to another row")
@@ -408,62 +446,44 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
                                 _store_raw_footprint_and_create_rule(footprint_details, table, org, import_file,
                                                                      original_row, map_model_obj)
 
-                        # There was an error with a field being too long [> 255 chars].
-                        map_model_obj.save()
-
-                        # if importing BuildingSync create a BuildingFile for the property
-                        if source_type == BUILDINGSYNC_RAW:
-                            raw_ps_id = original_row.id
-                            xml_filename = import_file.raw_property_state_to_filename.get(str(raw_ps_id))
-                            if xml_filename is None:
-                                raise Exception('Expected ImportFile to have the raw PropertyStates id in its raw_property_state_to_filename dict')
-
-                            from_zipfile = import_file.uploaded_filename.endswith('.zip')
-                            # if user uploaded a zipfile, find the xml file related to this property and use it
-                            # else, the user uploaded a sole xml file and we can just use that one.
-                            if from_zipfile:
-                                with zipfile.ZipFile(import_file.file, 'r', zipfile.ZIP_STORED) as openzip:
-                                    new_file = SimpleUploadedFile(
-                                        name=xml_filename,
-                                        content=openzip.read(xml_filename),
-                                        content_type='application/xml')
-                            else:
-                                xml_filename = import_file.uploaded_filename
-                                if xml_filename == '':
-                                    raise Exception('Expected ImportFiles uploaded_filename to be non-empty')
-                                new_file = SimpleUploadedFile(
-                                    name=xml_filename,
-                                    content=import_file.file.read(),
-                                    content_type='application/xml'
-                                )
-
-                            building_file = BuildingFile.objects.create(
-                                file=new_file,
-                                filename=xml_filename,
-                                file_type=BuildingFile.BUILDINGSYNC,
-                            )
-
-                            # link the property state to the building file
-                            building_file.property_state = map_model_obj
-                            building_file.save()
-
-                        # Create an audit log record for the new map_model_obj that was created.
-
-                        AuditLogClass = PropertyAuditLog if isinstance(
-                            map_model_obj, PropertyState) else TaxLotAuditLog
-                        AuditLogClass.objects.create(
+                        # bulk_create skips save(), so calculate the normalized address and the
+                        # hash exactly as save() would have.
+                        map_model_obj.set_normalized_address_and_hash()
+                        mapped_objs.append((original_row, map_model_obj))
+
+                if not mapped_objs:
+                    continue
+
+                # There was an error with a field being too long [> 255 chars].
+                STR_TO_CLASS[table].objects.bulk_create(
+                    [obj for _, obj in mapped_objs], batch_size=MAP_BULK_CREATE_BATCH_SIZE
+                )
+
+                # if importing BuildingSync create a BuildingFile for the property
+                if source_type == BUILDINGSYNC_RAW:
+                    for original_row, obj in mapped_objs:
+                        _create_building_file_for_mapped_state(import_file, original_row, obj)
+
+                # Create an audit log record for each of the new map_model_objs that were created.
+                AuditLogClass = PropertyAuditLog if table == 'PropertyState' else TaxLotAuditLog
+                AuditLogClass.objects.bulk_create(
+                    [
+                        AuditLogClass(
                             organization=org,
-                            state=map_model_obj,
+                            state=obj,
                             name='Import Creation',
                             description='Creation from Import file.',
                             import_filename=import_file,
                             record_type=AUDIT_IMPORT
                         )
+                        for _, obj in mapped_objs
+                    ],
+                    batch_size=MAP_BULK_CREATE_BATCH_SIZE
+                )
 
                 # Make sure that we've saved all of the extra_data column names from the first item
                 # in list
-                if map_model_obj:
-                    Column.save_column_names(map_model_obj)
+                Column.save_column_names(mapped_objs[-1][1])
     except IntegrityError as e:
         progress_data.finish_with_error('Could not map_row_chunk with error', str(e))
         raise IntegrityError("Could not map_row_chunk with error: %s" % str(e))
@@ -481,6 +501,49 @@ def map_row_chunk(ids, file_pk, source_type, prog_key, **kwargs):
     return True
 
 
+def _create_building_file_for_mapped_state(import_file, original_row, map_model_obj):
+    """
+    Create the BuildingFile for a mapped BuildingSync PropertyState and link the two together.
+
+    :param import_file: ImportFile, the file that is being mapped
+    :param original_row: PropertyState, the raw state that the mapped state was created from
+    :param map_model_obj: PropertyState, the saved mapped state
+    """
+    raw_ps_id = original_row.id
+    xml_filename = import_file.raw_property_state_to_filename.get(str(raw_ps_id))
+    if xml_filename is None:
+        raise Exception('Expected ImportFile to have the raw PropertyStates id in its raw_property_state_to_filename dict')
+
+    from_zipfile = import_file.uploaded_filename.endswith('.zip')
+    # if user uploaded a zipfile, find the xml file related to this property and use it
+    # else, the user uploaded a sole xml file and we can just use that one.
+    if from_zipfile:
+        with zipfile.ZipFile(import_file.file, 'r', zipfile.ZIP_STORED) as openzip:
+            new_file = SimpleUploadedFile(
+                name=xml_filename,
+                content=openzip.read(xml_filename),
+                content_type='application/xml')
+    else:
+        xml_filename = import_file.uploaded_filename
+        if xml_filename == '':
+            raise Exception('Expected ImportFiles uploaded_filename to be non-empty')
+        new_file = SimpleUploadedFile(
+            name=xml_filename,
+            content=import_file.file.read(),
+            content_type='application/xml'
+        )
+
+    building_file = BuildingFile.objects.create(
+        file=new_file,
+        filename=xml_filename,
+        file_type=BuildingFile.BUILDINGSYNC,
+    )
+
+    # link the property state to the building file
+    building_file.property_state = map_model_obj
+    building_file.save()
+
+
 def _store_raw_footprint_and_create_rule(footprint_details, table, org, import_file, original_row, map_model_obj):
     column_name = footprint_details['raw_field'] + ' (Invalid Footprint)'
 
@@ -652,6 +715,70 @@ def map_data(import_file_id, remap=False, mark_as_done=True):
     return progress_data.result()
 
 
+def _save_raw_data_rows(rows, import_file):
+    """
+    Save the raw rows of a file to the database as PropertyStates in the DATA_STATE_IMPORT state
+
+    The raw PropertyStates are only staging data for the mapping step, so they are written with
+    a single bulk_create per chunk. This skips PropertyState.save() and therefore the
+    address normalization and hashing, neither of which is used for the raw rows. The mapped
+    states created in map_row_chunk are hashed as usual.
+
+    :param rows: iterable, dicts of the raw rows to save
+    :param import_file: ImportFile, the file the rows were read from
+    :return: dict, BuildingSync only, property state ID to its source filename
+    """
+    # Save our "column headers" and sample rows for F/E.
+    source_type = get_source_type(import_file)
+    org = import_file.import_record.super_organization
+
+    raw_properties = []
+    source_filenames = []
+    for c in rows:
+        raw_property = PropertyState(organization=org)
+        raw_property.import_file = import_file
+
+        # sanitize c and remove any diacritics
+        new_chunk = {}
+        source_filename = None
+        for k, v in c.items():
+            # remove extra spaces surrounding keys.
+            key = k.strip()
+
+            if key == "bounding_box":  # capture bounding_box GIS field on raw record
+                raw_property.bounding_box = v
+            elif key == "_source_filename":  # grab source filename (for BSync)
+                source_filename = v
+            elif isinstance(v, basestring):
+                new_chunk[key] = unidecode(v)
+            elif isinstance(v, (datetime, date)):
+                raise TypeError(
+                    "Datetime class not supported in Extra Data. Needs to be a string.")
+            else:
+                new_chunk[key] = v
+        raw_property.extra_data = new_chunk
+        raw_property.source_type = source_type
+        raw_property.data_state = DATA_STATE_IMPORT
+
+        raw_properties.append(raw_property)
+        source_filenames.append(source_filename)
+
+    try:
+        with transaction.atomic():
+            # the ids of the new rows are set on the objects by bulk_create
+            PropertyState.objects.bulk_create(raw_properties, batch_size=RAW_BULK_CREATE_BATCH_SIZE)
+    except IntegrityError as e:
+        raise IntegrityError("Could not save_raw_data_chunk with error: %s" % (e))
+
+    # BuildingSync only: track property state ID to its source filename
+    raw_property_state_to_filename = {}
+    for raw_property, source_filename in zip(raw_properties, source_filenames):
+        if source_filename is not None:
+            raw_property_state_to_filename[str(raw_property.id)] = source_filename
+
+    return raw_property_state_to_filename
+
+
 @shared_task(ignore_result=True)
 def _save_raw_data_chunk(chunk, file_pk, progress_key):
     """
@@ -662,49 +789,35 @@ def _save_raw_data_chunk(chunk, file_pk, progress_key):
     :param progress_key: string, Progress Key to append progress
     :return: Bool, Always true
     """
-    import_file = ImportFile.objects.get(pk=file_pk)
+    import_file = ImportFile.objects.select_related('import_record__super_organization').get(pk=file_pk)
 
-    # Save our "column headers" and sample rows for F/E.
-    source_type = get_source_type(import_file)
+    raw_property_state_to_filename = _save_raw_data_rows(chunk, import_file)
 
-    # BuildingSync only: track property state ID to its source filename
-    raw_property_state_to_filename = {}
-    try:
-        with transaction.atomic():
-            for c in chunk:
-                raw_property = PropertyState(
-                    organization=import_file.import_record.super_organization)
-                raw_property.import_file = import_file
-
-                # sanitize c and remove any diacritics
-                new_chunk = {}
-                for k, v in c.items():
-                    # remove extra spaces surrounding keys.
-                    key = k.strip()
-
-                    source_filename = None
-                    if key == "bounding_box":  # capture bounding_box GIS field on raw record
-                        raw_property.bounding_box = v
-                    elif key == "_source_filename":  # grab source filename (for BSync)
-                        source_filename = v
-                    elif isinstance(v, basestring):
-                        new_chunk[key] = unidecode(v)
-                    elif isinstance(v, (datetime, date)):
-                        raise TypeError(
-                            "Datetime class not supported in Extra Data. Needs to be a string.")
-                    else:
-                        new_chunk[key] = v
-                raw_property.extra_data = new_chunk
-                raw_property.source_type = source_type
-                raw_property.data_state = DATA_STATE_IMPORT
-                raw_property.organization = import_file.import_record.super_organization
-                raw_property.save()
-
-                if source_filename is not None:
-                    raw_property_state_to_filename[str(raw_property.id)] = source_filename
+    # Indicate progress
+    progress_data = ProgressData.from_key(progress_key)
+    progress_data.step()
 
-    except IntegrityError as e:
-        raise IntegrityError("Could not save_raw_data_chunk with error: %s" % (e))
+    return raw_property_state_to_filename
+
+
+@shared_task(ignore_result=True)
+def _save_raw_data_chunk_from_file(offset, num_rows, file_pk, progress_key):
+    """
+    Save a slice of the raw data of a CSV file to the database. The rows are read directly from
+    the import file instead of being passed in the task message, so only the offset of the slice
+    goes through the broker.
+
+    :param offset: int, offset of the first row of the slice as returned by MCMParser.row_offsets
+    :param num_rows: int, number of rows in the slice
+    :param file_pk: ImportFile Primary Key
+    :param progress_key: string, Progress Key to append progress
+    :return: dict, always empty since BuildingSync files are not streamed
+    """
+    import_file = ImportFile.objects.select_related('import_record__super_organization').get(pk=file_pk)
+
+    parser = reader.MCMParser(import_file.local_file)
+    parser.seek_to_offset(offset)
+    raw_property_state_to_filename = _save_raw_data_rows(islice(parser.data, num_rows), import_file)
 
     # Indicate progress
     progress_data = ProgressData.from_key(progress_key)
@@ -777,8 +890,11 @@ def _save_greenbutton_data_create_tasks(file_pk, progress_key):
     GreenButton import contains MeterReadings for only 1 Meter.
 
     By first getting or creating the single Meter for this file's MeterReadings,
-    the ID of this Meter can be passed to the individual tasks that will
-    actually create the readings.
+    the ID of this Meter can be passed to the task that will actually create the
+    readings. The Meter and the summary are built from the first reading and the
+    rest are only counted here, so the readings are never all held in memory nor
+    sent in the task messages. The readings are instead streamed from the file
+    by the save task.
     """
     progress_data = ProgressData.from_key(progress_key)
 
@@ -791,12 +907,12 @@ def _save_greenbutton_data_create_tasks(file_pk, progress_key):
     import_file.save()
 
     parser = reader.GreenButtonParser(import_file.local_file)
-    raw_meter_data = list(parser.data)
+    raw_meter_data = parser.data
 
-    meters_parser = MetersParser(org_id, raw_meter_data, source_type=Meter.GREENBUTTON, property_id=property_id)
+    meters_parser = MetersParser(org_id, list(islice(raw_meter_data, 1)), source_type=Meter.GREENBUTTON, property_id=property_id)
     meter_readings = meters_parser.meter_and_reading_objs[0]  # there should only be one meter (1 property, 1 type/unit)
 
-    readings = meter_readings['readings']
+    incoming = len(meter_readings['readings']) + sum(1 for _ in raw_meter_data)
     meter_only_details = {k: v for k, v in meter_readings.items() if k != 'readings'}
     meter, _created = Meter.objects.get_or_create(**meter_only_details)
     meter_id = meter.id
@@ -806,26 +922,28 @@ def _save_greenbutton_data_create_tasks(file_pk, progress_key):
     chunk_size = 1000
 
     # add in the proposed_imports into the progress key to be used later. (This used to be the summary).
-    progress_data.update_summary(meters_parser.proposed_imports)
-    progress_data.total = ceil(len(readings) / chunk_size)
+    proposed_imports = meters_parser.proposed_imports
+    proposed_imports[0]['incoming'] = incoming
+    progress_data.update_summary(proposed_imports)
+    progress_data.total = ceil(incoming / chunk_size)
     progress_data.save()
 
-    tasks = []
-    # Add in the save raw data chunks to the background tasks
-    for batch_readings in batch(readings, chunk_size):
-        tasks.append(_save_greenbutton_data_task.s(batch_readings, meter_id, meter_usage_point_id, progress_data.key))
-
-    return chord(tasks, interval=15)(finish_raw_save.s(file_pk, progress_data.key))
+    return celery_chain(
+        _save_greenbutton_data_task.s(file_pk, org_id, property_id, meter_id, meter_usage_point_id, chunk_size, progress_data.key),
+        finish_raw_save.s(file_pk, progress_data.key)
+    )()
 
 
 @shared_task
-def _save_greenbutton_data_task(readings, meter_id, meter_usage_point_id, progress_key):
+def _save_greenbutton_data_task(file_pk, org_id, property_id, meter_id, meter_usage_point_id, chunk_size, progress_key):
     """
-    This method defines an individual task to save MeterReadings for a single
-    Meter. Each task returns the results of the import.
+    This method defines the task to save the MeterReadings of the single Meter
+    of a GreenButton import. The readings are streamed from the file and saved
+    a batch of chunk_size readings at a time. The results of the import of each
+    batch are returned.
 
-    The query creates or updates readings while associating them to the meter
-    via raw SQL upsert. Specifically, meter_id, start_time, and end_time must be
+    The readings are created or updated while associating them to the meter
+    via MeterReading.upsert. Specifically, meter_id, start_time, and end_time must be
     unique or an update occurs. Otherwise, a new reading entry is created.
 
     If the query leads to an error regarding trying to update the same row
@@ -834,46 +952,36 @@ def _save_greenbutton_data_task(readings, meter_id, meter_usage_point_id, progre
     """
     progress_data = ProgressData.from_key(progress_key)
     meter = Meter.objects.get(pk=meter_id)
+    import_file = ImportFile.objects.get(pk=file_pk)
 
-    result = {}
     result_summary_key = "{} - {} - {}".format(
         meter.property_id,
         meter_usage_point_id,
         meter.get_type_display()
     )
 
-    try:
-        with transaction.atomic():
-            reading_strings = [
-                f"({meter_id}, '{reading['start_time'].isoformat(' ')}', '{reading['end_time'].isoformat(' ')}', {reading['reading']}, '{reading['source_unit']}', {reading['conversion_factor']})"
-                for reading
-                in readings
-            ]
+    results = []
+    parser = reader.GreenButtonParser(import_file.local_file)
+    for raw_meter_data in batch(parser.data, chunk_size):
+        meters_parser = MetersParser(org_id, raw_meter_data, source_type=Meter.GREENBUTTON, property_id=property_id)
+        readings = meters_parser.meter_and_reading_objs[0]['readings']
 
-            sql = (
-                'INSERT INTO seed_meterreading(meter_id, start_time, end_time, reading, source_unit, conversion_factor)' +
-                ' VALUES ' + ', '.join(reading_strings) +
-                ' ON CONFLICT (meter_id, start_time, end_time)' +
-                ' DO UPDATE SET reading = EXCLUDED.reading, source_unit = EXCLUDED.source_unit, conversion_factor = EXCLUDED.conversion_factor' +
-                ' RETURNING reading;'
-            )
-            with connection.cursor() as cursor:
-                cursor.execute(sql)
-                result[result_summary_key] = {'count': len(cursor.fetchall())}
-    except ProgrammingError as e:
-        if 'ON CONFLICT DO UPDATE command cannot affect row a second time' in str(e):
-            result[result_summary_key] = {'error': 'Overlapping readings.'}
-        else:
+        try:
+            results.append({result_summary_key: {'count': MeterReading.upsert(meter_id, readings)}})
+        except ProgrammingError as e:
+            if 'ON CONFLICT DO UPDATE command cannot affect row a second time' in str(e):
+                results.append({result_summary_key: {'error': 'Overlapping readings.'}})
+            else:
+                progress_data.finish_with_error('data failed to import')
+                raise e
+        except Exception as e:
             progress_data.finish_with_error('data failed to import')
             raise e
-    except Exception as e:
-        progress_data.finish_with_error('data failed to import')
-        raise e
 
-    # Indicate progress
-    progress_data.step()
+        # Indicate progress
+        progress_data.step()
 
-    return result
+    return results
 
 
 @shared_task
@@ -882,8 +990,8 @@ def _save_pm_meter_usage_data_task(meter_readings, file_pk, progress_key):
     This method defines an individual task to get or create a single Meter and its
     corresponding MeterReadings. Each task returns the results of the import.
 
-    Within the query, get or create the meter without it's readings. Then,
-    create or update readings while associating them to the meter via raw SQL upsert.
+    Within the transaction, get or create the meter without it's readings. Then,
+    create or update readings while associating them to the meter via MeterReading.upsert.
     Specifically, meter_id, start_time, and end_time must be unique or an update
     occurs. Otherwise, a new reading entry is created.
 
@@ -902,27 +1010,12 @@ def _save_pm_meter_usage_data_task(meter_readings, file_pk, progress_key):
 
             meter, _created = Meter.objects.get_or_create(**meter_only_details)
 
-            reading_strings = [
-                f"({meter.id}, '{reading['start_time'].isoformat(' ')}', '{reading['end_time'].isoformat(' ')}', {reading['reading']}, '{reading['source_unit']}', {reading['conversion_factor']})"
-                for reading
-                in readings
-            ]
-
-            sql = (
-                'INSERT INTO seed_meterreading(meter_id, start_time, end_time, reading, source_unit, conversion_factor)' +
-                ' VALUES ' + ', '.join(reading_strings) +
-                ' ON CONFLICT (meter_id, start_time, end_time)' +
-                ' DO UPDATE SET reading = EXCLUDED.reading, source_unit = EXCLUDED.source_unit, conversion_factor = EXCLUDED.conversion_factor' +
-                ' RETURNING reading;'
+            key = "{} - {} - {}".format(
+                meter.property_id,
+                meter.source_id,
+                meter.get_type_display()
             )
-            with connection.cursor() as cursor:
-                cursor.execute(sql)
-                key = "{} - {} - {}".format(
-                    meter.property_id,
-                    meter.source_id,
-                    meter.get_type_display()
-                )
-                result[key] = {'count': len(cursor.fetchall())}
+            result[key] = {'count': MeterReading.upsert(meter.id, readings)}
     except ProgrammingError as e:
         if 'ON CONFLICT DO UPDATE command cannot affect row a second time' in str(e):
             type_lookup = dict(Meter.ENERGY_TYPES)
@@ -1063,20 +1156,24 @@ def _save_raw_data_create_tasks(file_pk, progress_key):
     import_file.num_rows = 0
     import_file.num_columns = parser.num_columns()
 
-    chunks = []
-    for batch_chunk in batch(parser.data, 100):
-        import_file.num_rows += len(batch_chunk)
-        chunks.append(batch_chunk)
+    # Add in the save raw data chunks to the background tasks
+    tasks = []
+    if isinstance(parser, reader.MCMParser) and parser.can_seek:
+        # CSV files are not loaded into memory. Only the offset of each chunk is recorded and
+        # each task reads its own rows from the file. Excel files are parsed once here, since
+        # reading a slice of a sheet would parse the whole workbook in every task.
+        for offset, num_rows in parser.row_offsets(100):
+            import_file.num_rows += num_rows
+            tasks.append(_save_raw_data_chunk_from_file.s(offset, num_rows, file_pk, progress_data.key))
+    else:
+        for batch_chunk in batch(parser.data, 100):
+            import_file.num_rows += len(batch_chunk)
+            tasks.append(_save_raw_data_chunk.s(batch_chunk, file_pk, progress_data.key))
     import_file.save()
 
-    progress_data.total = len(chunks)
+    progress_data.total = len(tasks)
     progress_data.save()
 
-    # Add in the save raw data chunks to the background tasks
-    tasks = []
-    for chunk in chunks:
-        tasks.append(_save_raw_data_chunk.s(chunk, file_pk, progress_data.key))
-
     return chord(tasks, interval=15)(finish_raw_save.s(file_pk, progress_data.key))
 
 
@@ -1545,78 +1642,65 @@ def pair_new_states(merged_property_views, merged_taxlot_views):
     # taxlot_keys = [taxlot_m2m_keygen.calculate_comparison_key(tl): tl.pk for tl in taxlot_objects}
 
     # Calculate a key for each of the split fields.
-    property_keys_orig = dict(
-        [(property_m2m_keygen.calculate_comparison_key(p), p.pk) for p in property_objects])
-
-    # property_keys = copy.deepcopy(property_keys_orig)
-
-    # Do this inelegant step to make sure we are correctly splitting.
-    property_keys = collections.defaultdict(list)
-    for k in property_keys_orig:
-        if k[0] and ";" in k[0]:
-            for lotnum in map(lambda x: x.strip(), k[0].split(";")):
-                k_copy = list(copy.deepcopy(k))
-                k_copy[0] = lotnum
-                property_keys[tuple(k_copy)] = property_keys_orig[k]
-        else:
-            property_keys[k] = property_keys_orig[k]
+    property_keys = {}
+    for p in property_objects:
+        for key in _split_lot_number_keys(property_m2m_keygen.calculate_comparison_key(p)):
+            property_keys[key] = p.pk
 
     taxlot_keys = dict(
         [(taxlot_m2m_keygen.calculate_comparison_key(p), p.pk) for p in taxlot_objects])
 
-    # property_comparison_keys = {property_m2m_keygen.calculate_comparison_key_key(p): p.pk for p in property_objects}
-    # property_canonical_keys = {property_m2m_keygen.calculate_canonical_key(p): p.pk for p in property_objects}
+    # Index the keys by each of their values so that the keys of the merged views are only
+    # compared with the keys they share a value with.
+    property_key_index = EquivalencePartitioner.make_key_index(property_keys)
+    taxlot_key_index = EquivalencePartitioner.make_key_index(taxlot_keys)
 
-    possible_merges = []  # List of prop.id, tl.id merges.
+    possible_merges = set()  # Set of prop.id, tl.id merges.
 
     for pv in merged_property_views:
-        # if pv.state.lot_number and ";" in pv.state.lot_number:
-        #     pdb.set_trace()
-
         pv_key = property_m2m_keygen.calculate_comparison_key(pv.state)
-        # TODO: Refactor pronto.  Iterating over the tax lot is bad implementation.
-        for tlk in taxlot_keys:
-            if pv_key[0] and ";" in pv_key[0]:
-                for lotnum in map(lambda x: x.strip(), pv_key[0].split(";")):
-                    pv_key_copy = list(copy.deepcopy(pv_key))
-                    pv_key_copy[0] = lotnum
-                    pv_key_copy = tuple(pv_key_copy)
-                    if property_m2m_keygen.calculate_key_equivalence(pv_key_copy, tlk):
-                        possible_merges.append((property_keys[pv_key_copy], taxlot_keys[tlk]))
-            else:
-                if property_m2m_keygen.calculate_key_equivalence(pv_key, tlk):
-                    possible_merges.append((property_keys[pv_key], taxlot_keys[tlk]))
+        for pv_key_split in _split_lot_number_keys(pv_key):
+            for tlk in EquivalencePartitioner.find_equivalent_keys(pv_key_split, taxlot_key_index):
+                possible_merges.add((property_keys[pv_key_split], taxlot_keys[tlk]))
 
     for tlv in merged_taxlot_views:
         tlv_key = taxlot_m2m_keygen.calculate_comparison_key(tlv.state)
-        for pv_key in property_keys:
-            if property_m2m_keygen.calculate_key_equivalence(tlv_key, pv_key):
-                possible_merges.append((property_keys[pv_key], taxlot_keys[tlv_key]))
-
-    for m2m in set(possible_merges):
-        pv_pk, tlv_pk = m2m
+        for pv_key in EquivalencePartitioner.find_equivalent_keys(tlv_key, property_key_index):
+            possible_merges.add((property_keys[pv_key], taxlot_keys[tlv_key]))
 
-        # PropertyView.objects.get(pk=pv_pk)
-        # TaxLotView.objects.get(pk=tlv_pk)
-
-        count = TaxLotProperty.objects.filter(
-            property_view_id=pv_pk,
-            taxlot_view_id=tlv_pk
-        ).count()
+    if not possible_merges:
+        return
 
-        if count:
-            continue
+    # Skip the pairs that already exist, and only make the first pair of a property view primary
+    existing_merges = set(TaxLotProperty.objects.filter(
+        property_view_id__in={pv_pk for pv_pk, _tlv_pk in possible_merges}
+    ).values_list('property_view_id', 'taxlot_view_id'))
+    paired_property_view_ids = {pv_pk for pv_pk, _tlv_pk in existing_merges}
 
-        is_primary = TaxLotProperty.objects.filter(property_view_id=pv_pk).count() == 0
-        m2m_join = TaxLotProperty(
+    m2m_joins = []
+    for pv_pk, tlv_pk in sorted(possible_merges - existing_merges):
+        m2m_joins.append(TaxLotProperty(
             property_view_id=pv_pk,
             taxlot_view_id=tlv_pk,
             cycle=cycle,
-            primary=is_primary
-        )
-        m2m_join.save()
+            primary=pv_pk not in paired_property_view_ids
+        ))
+        paired_property_view_ids.add(pv_pk)
+
+    TaxLotProperty.objects.bulk_create(m2m_joins)
+
 
-    return
+def _split_lot_number_keys(key):
+    """
+    Return the comparison keys of a property for each of the lot numbers of its key, which can
+    hold several lot numbers separated by semicolons.
+
+    :param key: tuple, see EquivalencePartitioner.calculate_comparison_key
+    :return: list of tuples
+    """
+    if key[0] and ";" in key[0]:
+        return [(lotnum.strip(),) + tuple(key[1:]) for lotnum in key[0].split(";")]
+    return [key]
 
 
 @shared_task
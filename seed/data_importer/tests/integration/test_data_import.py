@@ -31,8 +31,11 @@ from seed.models import (
     ASSESSED_RAW,
     ASSESSED_BS,
     DATA_STATE_IMPORT,
+    DATA_STATE_MAPPING,
+    DATA_STATE_MATCHING,
     PORTFOLIO_RAW,
     Column,
+    PropertyAuditLog,
     PropertyState,
     PropertyView,
     TaxLotState,
@@ -514,6 +517,40 @@ class TestMappingExampleData(DataMappingBaseTestCase):
         props = PropertyView.objects.all()
         self.assertEqual(len(props), 2)
 
+    def test_promote_many_properties(self):
+        """Test if the bulk promoting of properties matches promoting them one at a time"""
+        tasks.save_raw_data(self.import_file.pk)
+        Column.create_mappings(self.fake_mappings, self.org, self.user, self.import_file.pk)
+        tasks.map_data(self.import_file.pk)
+
+        states = list(PropertyState.objects.filter(
+            import_file=self.import_file, data_state=DATA_STATE_MAPPING
+        ).order_by('id'))
+        self.assertGreater(len(states), 1)
+
+        # promote one of them beforehand, promote_many should return its existing view
+        pv1 = states[0].promote(self.cycle)
+
+        views = PropertyState.promote_many(states, self.cycle)
+        self.assertEqual(len(views), len(states))
+        self.assertEqual(views[0], pv1)
+        self.assertEqual([v.state_id for v in views], [s.id for s in states])
+        self.assertEqual(len(set(v.property_id for v in views)), len(states))
+        for view in views:
+            self.assertEqual(view.cycle_id, self.cycle.id)
+            self.assertEqual(view.property.organization_id, self.org.id)
+
+        self.assertEqual(PropertyView.objects.filter(cycle=self.cycle).count(), len(states))
+        self.assertFalse(
+            PropertyState.objects.filter(pk__in=[s.id for s in states]).exclude(
+                data_state=DATA_STATE_MATCHING
+            ).exists()
+        )
+
+        # promoting again does not create anything new
+        self.assertEqual(PropertyState.promote_many(states, self.cycle), views)
+        self.assertEqual(PropertyView.objects.filter(cycle=self.cycle).count(), len(states))
+
 
 # For some reason if you comment out the next two test cases (TestMappingPropertiesOnly and
 # TestMappingTaxLotsOnly), the test_views_matching.py file will fail. I cannot figure out
@@ -559,6 +596,26 @@ class TestMappingPropertiesOnly(DataMappingBaseTestCase):
         self.assertEqual(ps.site_eui.magnitude, 1202)
         self.assertEqual(ps.extra_data['jurisdiction_tax_lot_id'], '11160509')
 
+    def test_mapping_bulk_create_matches_save(self):
+        tasks.save_raw_data(self.import_file.pk)
+        Column.create_mappings(self.fake_mappings, self.org, self.user, self.import_file.pk)
+        tasks.map_data(self.import_file.pk)
+
+        mapped = PropertyState.objects.filter(import_file=self.import_file, data_state=DATA_STATE_MAPPING)
+        self.assertGreater(mapped.count(), 0)
+        for ps in mapped:
+            # the bulk created states must have the same hash and address as if they were saved
+            stored_hash = ps.hash_object
+            stored_address = ps.normalized_address
+            ps.set_normalized_address_and_hash()
+            self.assertEqual(stored_hash, ps.hash_object)
+            self.assertEqual(stored_address, ps.normalized_address)
+
+            # and each one gets its own import creation audit log
+            self.assertEqual(
+                PropertyAuditLog.objects.filter(state=ps, name='Import Creation').count(), 1
+            )
+
 
 class TestMappingTaxLotsOnly(DataMappingBaseTestCase):
     def setUp(self):
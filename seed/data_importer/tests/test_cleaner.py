@@ -110,3 +110,19 @@ class TestCleaner(TestCase):
             cleaner.clean_value('123,456', 'random'),
             '123,456'
         )
+
+    def test_retrieve_cleaner_is_rebuilt_when_the_columns_change(self):
+        cleaner = tasks._retrieve_cleaner(self.org)
+        self.assertIs(tasks._retrieve_cleaner(self.org), cleaner)
+        self.assertEqual(cleaner.clean_value('4,567', 'new_float_col'), '4,567')
+
+        Column.objects.create(
+            table_name='PropertyState',
+            column_name='new_float_col',
+            unit=Unit.objects.create(unit_name='new unit', unit_type=Unit.FLOAT),
+            organization=self.org,
+            is_extra_data=True,
+        )
+
+        cleaner = tasks._retrieve_cleaner(self.org)
+        self.assertEqual(cleaner.clean_value('4,567', 'new_float_col'), 4567)
@@ -82,3 +82,35 @@ class TestEquivalenceClassGenerator(DataMappingBaseTestCase):
         self.assertEqual(tls3.jurisdiction_tax_lot_id, "1")
         self.assertEqual(tls3.custom_id_1, "100")
         self.assertEqual(tls3.normalized_address, "123 fake street")
+
+    def test_key_index_finds_the_same_keys_as_key_equivalence(self):
+        property_keys = [
+            ('1', None, None, '123 fake street', '100', None),
+            ('2', 'abc+123', None, None, None, '10'),
+            (None, None, 'c1', None, None, None),
+            (None, None, None, None, None, None),
+        ]
+        taxlot_keys = [
+            ('1', None, None, None, None),
+            (None, None, 'c1', '123 fake street', 'c1'),
+            ('3', None, None, None, '100'),
+            (None, None, None, None, None),
+        ]
+
+        taxlot_key_index = EquivalencePartitioner.make_key_index(taxlot_keys)
+        property_key_index = EquivalencePartitioner.make_key_index(property_keys)
+        for property_key in property_keys:
+            self.assertSetEqual(
+                EquivalencePartitioner.find_equivalent_keys(property_key, taxlot_key_index),
+                {k for k in taxlot_keys if EquivalencePartitioner.calculate_key_equivalence(property_key, k)}
+            )
+        for taxlot_key in taxlot_keys:
+            self.assertSetEqual(
+                EquivalencePartitioner.find_equivalent_keys(taxlot_key, property_key_index),
+                {k for k in property_keys if EquivalencePartitioner.calculate_key_equivalence(taxlot_key, k)}
+            )
+
+        self.assertSetEqual(
+            EquivalencePartitioner.find_equivalent_keys(property_keys[0], taxlot_key_index),
+            {taxlot_keys[0], taxlot_keys[1], taxlot_keys[2]}
+        )
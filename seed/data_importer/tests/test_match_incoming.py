@@ -35,6 +35,7 @@ from seed.test_helpers.fake import (
     FakeTaxLotStateFactory,
 )
 from seed.tests.util import DataMappingBaseTestCase
+from seed.utils.match import states_with_existing_matches
 
 
 class TestMatchingInImportFile(DataMappingBaseTestCase):
@@ -107,6 +108,34 @@ class TestMatchingInImportFile(DataMappingBaseTestCase):
         deleted = TaxLotState.objects.get(data_state=DATA_STATE_DELETE)
         self.assertNotIn(deleted.id, TaxLotView.objects.values_list('state_id', flat=True))
 
+    def test_matching_results_include_geocoding_results(self):
+        base_details = {
+            'import_file_id': self.import_file.id,
+            'data_state': DATA_STATE_MAPPING,
+            'no_default_data': False,
+        }
+        self.property_state_factory.get_property_state(
+            address_line_1='123 Match Street', latitude=39.765251, longitude=-104.986138, **base_details
+        )
+        self.property_state_factory.get_property_state(
+            address_line_1='123 Different Ave', geocoding_confidence='Missing address components (N/A)', **base_details
+        )
+        self.taxlot_state_factory.get_taxlot_state(
+            address_line_1='123 Match Street', geocoding_confidence='Missing address components (N/A)', **base_details
+        )
+
+        self.import_file.mapping_done = True
+        self.import_file.save()
+        geocode_and_match_buildings_task(self.import_file.id)
+
+        results = ImportFile.objects.get(pk=self.import_file.id).matching_results_data
+        self.assertEqual(results['property_new'], 2)
+        self.assertEqual(results['property_geocoded_high_confidence'], 0)
+        self.assertEqual(results['property_geocoded_manually'], 1)
+        self.assertEqual(results['property_geocode_not_possible'], 1)
+        self.assertEqual(results['tax_lot_geocoded_manually'], 0)
+        self.assertEqual(results['tax_lot_geocode_not_possible'], 1)
+
     def test_match_properties_if_all_default_fields_match(self):
         base_details = {
             'address_line_1': '123 Match Street',
@@ -1033,3 +1062,38 @@ class TestMatchingHelperMethods(DataMappingBaseTestCase):
         # There should be 6 uniq states. 5 from the second call, and one of 'The Same Address'
         self.assertEqual(len(uniq_state_ids), 6)
         self.assertEqual(dup_state_count, 9)
+
+    def test_states_with_existing_matches(self):
+        column_names = ['normalized_address', 'pm_property_id']
+
+        # existing -States in the Cycle, only the first two share their criteria
+        existing_1 = self.property_state_factory.get_property_state(
+            no_default_data=True, address_line_1='123 Match Street', pm_property_id=None
+        )
+        existing_2 = self.property_state_factory.get_property_state(
+            no_default_data=True, address_line_1='123 Match Street', pm_property_id=None
+        )
+        existing_3 = self.property_state_factory.get_property_state(
+            no_default_data=True, address_line_1='123 Match Street', pm_property_id='1234'
+        )
+        for state in [existing_1, existing_2, existing_3]:
+            state.promote(self.cycle)
+
+        # None only matches None
+        incoming_1 = self.property_state_factory.get_property_state(
+            no_default_data=True, address_line_1='123 Match Street', pm_property_id=None
+        )
+        incoming_2 = self.property_state_factory.get_property_state(
+            no_default_data=True, address_line_1='123 Match Street', pm_property_id='1234'
+        )
+        incoming_3 = self.property_state_factory.get_property_state(
+            no_default_data=True, address_line_1='123 Other Street', pm_property_id=None
+        )
+
+        matches = states_with_existing_matches(
+            [incoming_1.id, incoming_2.id, incoming_3.id], self.cycle.id, column_names, PropertyState
+        )
+
+        self.assertCountEqual(matches[incoming_1.id], [existing_1.id, existing_2.id])
+        self.assertEqual(matches[incoming_2.id], [existing_3.id])
+        self.assertNotIn(incoming_3.id, matches)
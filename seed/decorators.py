@@ -8,6 +8,7 @@ import json
 from functools import wraps
 
 from django.http import HttpResponse, HttpResponseForbidden, HttpResponseBadRequest
+from django.http.response import HttpResponseBase
 
 from seed.lib.superperms.orgs.models import OrganizationUser
 from seed.serializers.pint import PintJSONEncoder
@@ -103,8 +104,9 @@ def ajax_request(func):
             if response.get('status') == 'error' or response.get('success') is False:
                 status_code = 400
 
-        # convert the response into an HttpResponse if it is not already.
-        if not isinstance(response, HttpResponse):
+        # convert the response into an HttpResponse if it is not already (streaming responses
+        # are not HttpResponses, but are responses all the same).
+        if not isinstance(response, HttpResponseBase):
             data = FORMAT_TYPES[format_type](response)
             response = HttpResponse(data, content_type=format_type, status=status_code)
             response['content-length'] = len(data)
@@ -149,8 +151,9 @@ def ajax_request_class(func):
             if response.get('status') == 'error' or response.get('success') is False:
                 status_code = 400
 
-        # convert the response into an HttpResponse if it is not already.
-        if not isinstance(response, HttpResponse):
+        # convert the response into an HttpResponse if it is not already (streaming responses
+        # are not HttpResponses, but are responses all the same).
+        if not isinstance(response, HttpResponseBase):
             data = FORMAT_TYPES[format_type](response)
             response = HttpResponse(data, content_type=format_type,
                                     status=status_code)
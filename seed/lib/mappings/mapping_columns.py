@@ -40,7 +40,8 @@ class MappingColumns(object):
                  threshold=0):
         """
         :param raw_columns: list of str. The column names we're trying to map.
-        :param dest_columns: list of str. The columns we're mapping to.
+        :param dest_columns: list of str. The columns we're mapping to, or a matchers.MatchIndex
+            of them (e.g. Column.retrieve_match_index) to reuse their previous matches.
         :param previous_mapping: Method that contains previous mapped columns
 
             .. code:
@@ -56,6 +57,9 @@ class MappingColumns(object):
         :return dict: {'raw_column': ('dest_column', score), 'raw_column_2': ('dest_column_2',...)}
         """
         self.data = {}
+        if not isinstance(dest_columns, matchers.MatchIndex):
+            dest_columns = matchers.MatchIndex(dest_columns)
+
         for raw in raw_columns:
             attempt_best_match = False
             # We want previous mappings to be at the top of the list.
@@ -90,7 +94,7 @@ class MappingColumns(object):
                 if raw_test.lower() == 'ubi':
                     raw_test = 'jurisdiction_tax_lot_id'
 
-                matches = matchers.best_match(raw_test, dest_columns, top_n=5)
+                matches = dest_columns.best_match(raw_test, top_n=5)
 
                 # go get the top 5 matches. format will be [('PropertyState', 'building_count', 62), ...]
                 self.add_mappings(raw, matches)
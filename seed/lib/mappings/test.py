@@ -9,6 +9,7 @@ import logging
 from django.test import TestCase
 
 from seed.lib.mappings.mapping_columns import MappingColumns
+from seed.lib.mcm.matchers import MatchIndex, best_match
 
 logger = logging.getLogger(__name__)
 
@@ -49,3 +50,28 @@ class TestMappingColumns(TestCase):
             'stomach': ['PropertyState', 'stomach', 100]
         }
         self.assertDictEqual(expected, results.final_mappings)
+
+    def test_match_index_returns_the_same_matches(self):
+        raw_columns = ['address', 'Year Built', 'zip', 'gba', 'energy star score']
+        dest_columns = [
+            ('PropertyState', 'address_line_1'),
+            ('TaxLotState', 'address_line_1'),
+            ('PropertyState', 'year_built'),
+            ('PropertyState', 'postal_code'),
+            ('TaxLotState', 'postal_code'),
+            ('PropertyState', 'gross_floor_area'),
+            ('PropertyState', 'energy_score'),
+            ('PropertyState', 'site_eui'),
+            ('TaxLotState', 'jurisdiction_tax_lot_id'),
+        ]
+        index = MatchIndex(dest_columns)
+        for raw in raw_columns:
+            self.assertEqual(best_match(raw, dest_columns), index.best_match(raw))
+            # the matches are remembered, but not shared with the caller
+            index.best_match(raw).pop()
+            self.assertEqual(best_match(raw, dest_columns), index.best_match(raw))
+
+        self.assertDictEqual(
+            MappingColumns(raw_columns, dest_columns).final_mappings,
+            MappingColumns(raw_columns, index).final_mappings
+        )
@@ -4,8 +4,9 @@
 :copyright (c) 2014 - 2020, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
 :author
 """
+import heapq
 from builtins import str
-from functools import cmp_to_key
+from itertools import chain, repeat
 
 import jellyfish
 
@@ -30,6 +31,110 @@ def sort_scores(a, b):
         return 1
 
 
+def _normalize(s):
+    """Normalize a string the way it is compared by best_match."""
+    return str(s.encode('ascii', 'replace').lower())
+
+
+def _max_jaro_winkler(len_a, len_b):
+    """
+    Return the upper bound of the Jaro-Winkler similarity of two strings of the given lengths,
+    i.e. when all the characters of the shortest one match without transposition, with the
+    maximum prefix bonus.
+    """
+    common_chars = float(min(len_a, len_b))
+    weight = (common_chars / len_a + common_chars / len_b + 1) / 3
+    return weight + 0.4 * (1.0 - weight)
+
+
+class MatchIndex(object):
+    """
+    Index of categories to find the best matches of many strings against. The categories are
+    normalized once and grouped by length, and categories with the same normalized name (e.g. the
+    same column of the PropertyState and of the TaxLotState) are scored once. Since the similarity
+    is bounded by the lengths of the strings, the lengths that cannot make it to the top matches
+    are not scored at all. The matches of a normalized string are remembered, so that looking up
+    the same headers again is free.
+
+    Usage:
+            >>> index = MatchIndex([('_', 'Michigan'), ('_', 'Ohio'), ('_', 'Illinois')])
+            >>> index.best_match('illinois', 2)
+            [('_', 'Illinois', 100), ('_', 'Ohio', 77)]
+    """
+
+    def __init__(self, categories):
+        """
+        :param categories: list of tuples to compare against, see best_match
+        """
+        # {length: (distinct normalized names, categories of each name as (sort key, table, category))}
+        self._by_length = {}
+        positions = {}
+        for cat in categories:
+            # verify that the category has two elements, if not, then just
+            # return _ for the first category. Need this because fuzzy_in_set uses the
+            # same method
+            table_name = '_'
+            if isinstance(cat, tuple):
+                table_name = cat[0]
+                category = cat[1]
+            else:
+                category = cat
+
+            name = _normalize(category)
+            names, name_categories = self._by_length.setdefault(len(name), ([], []))
+            if name not in positions:
+                positions[name] = len(names)
+                names.append(name)
+                name_categories.append([])
+            name_categories[positions[name]].append(
+                ('.'.join([table_name, category]), table_name, category)
+            )
+
+        self._matches = {}
+
+    def _score(self, name, top_n):
+        bounds = sorted(
+            ((_max_jaro_winkler(len(name), length), length) for length in self._by_length),
+            reverse=True
+        )
+
+        # best scores first, then biased by the table name, see sort_scores
+        candidates = []
+        for bound, length in bounds:
+            # allow for the rounding of the scores
+            if top_n and len(candidates) == top_n and bound + 1e-9 < -candidates[-1][0]:
+                break
+
+            names, name_categories = self._by_length[length]
+            scores = map(jellyfish.jaro_winkler, repeat(name), names)
+            candidates = heapq.nsmallest(top_n, chain(candidates, (
+                (-score, sort_key, table_name, category)
+                for score, categories in zip(scores, name_categories)
+                for sort_key, table_name, category in categories
+            )))
+
+        # convert to hundreds
+        return [
+            (table_name, category, int(-score * 100))
+            for score, _sort_key, table_name, category in candidates
+        ]
+
+    def best_match(self, s, top_n=5):
+        """
+        Return the top N best matches of the string, see best_match.
+
+        :param s: str value to find best match
+        :param top_n: number of matches to return
+        :return: list of tuples (table, guess, percentage)
+        """
+        name = _normalize(s)
+        key = (name, top_n)
+        if key not in self._matches:
+            self._matches[key] = self._score(name, top_n)
+
+        return list(self._matches[key])
+
+
 def best_match(s, categories, top_n=5):
     """
     Return the top N best matches from your categories with the best match
@@ -46,51 +151,17 @@ def best_match(s, categories, top_n=5):
     Args:
         s: str value to find best match
         categories: list of tuples to compare against. needs to be
-        [('table1', 'value1'), ('table2', 'value2')]
+        [('table1', 'value1'), ('table2', 'value2')], or a MatchIndex of them
         top_n: number of matches to return
 
     Returns:
         list of tuples (table, guess, percentage)
 
     """
+    if not isinstance(categories, MatchIndex):
+        categories = MatchIndex(categories)
 
-    # print('starting match on {}'.format(s))
-    scores = []
-    for cat in categories:
-        # verify that the category has two elements, if not, then just
-        # return _ for the first category. Need this because fuzzy_in_set uses the
-        # same method
-        table_name = '_'
-        category = None
-        if isinstance(cat, tuple):
-            table_name = cat[0]
-            category = cat[1]
-        else:
-            category = cat
-
-        scores.append(
-            (
-                table_name,
-                category,
-                jellyfish.jaro_winkler(
-                    str(s.encode('ascii', 'replace').lower()),
-                    str(category.encode('ascii', 'replace').lower())
-                )
-            )
-        )
-
-        # sort first by the ones
-
-    # print('all scores for {} are {}'.format(s, scores))
-    scores.sort()
-    scores = sorted(scores, key=cmp_to_key(sort_scores))
-    # take the top n number of matches
-    scores = scores[:top_n]
-    # convert to hundreds
-    scores = [(score[0], score[1], int(score[2] * 100)) for score in scores]
-    # print('ending all categories match of {} with scores {}'.format(s, scores))
-
-    return scores
+    return categories.best_match(s, top_n)
 
 
 def fuzzy_in_set(column_name, ontology, percent_confidence=95):
@@ -14,10 +14,10 @@ import json
 import mmap
 import operator
 import re
-import xmltodict
 
 from builtins import str
-from csv import DictReader, Sniffer
+from csv import DictReader, Sniffer, reader
+from xml.etree.ElementTree import iterparse
 
 from past.builtins import basestring
 from seed.data_importer.utils import kbtu_thermal_conversion_factors
@@ -75,7 +75,6 @@ class GreenButtonParser(object):
 
     def __init__(self, xml_file):
         self._xml_file = xml_file
-        self._cache_data = None
 
         # Codes taken from https://bedes.lbl.gov/sites/default/files/Green%20Button%20V0.7.2%20to%20BEDES%20V2.1%20Mapping%2020170927.pdf
         self.kind_codes = {
@@ -122,60 +121,82 @@ class GreenButtonParser(object):
         Reads the sections of the GreenButton XML file to parse and reformat
         the data as needed by the MetersParser.
 
-        If a valid type and unit could not be found, an empty list is returned.
-        """
-        if self._cache_data is None:
-            xml_string = self._xml_file.read()
-            raw_data = xmltodict.parse(xml_string)
-
-            readings_entry = raw_data['feed']['entry'][3]
-
-            href = readings_entry['link']['@href']
-            source_id = re.sub(r'/v./', '', href)
-
-            readings = readings_entry['content']['IntervalBlock']['IntervalReading']
-
-            type, unit, multiplier = self._parse_type_and_unit(raw_data)
-
-            if type and unit:
-                self._cache_data = [
-                    {
-                        'start_time': int(reading['timePeriod']['start']),
-                        'source_id': source_id,
-                        'duration': int(reading['timePeriod']['duration']),
-                        'Meter Type': type,
-                        'Usage Units': unit,
-                        'Usage/Quantity': float(reading['value']) * multiplier,
-                    }
-                    for reading
-                    in readings
-                ]
-            else:
-                self._cache_data = []
+        The file is parsed incrementally and each IntervalReading is yielded as
+        soon as it has been read, then discarded from the parsed tree, so the
+        memory used doesn't grow with the number of readings. Each access
+        returns a new generator which reads the file from the beginning.
 
-        return self._cache_data
+        If a valid type and unit could not be found, nothing is yielded.
+        """
+        self._xml_file.seek(0)
+
+        entry_index = -1
+        kind = None
+        reading_type = {}
+        source_id = None
+        type, unit, multiplier = None, None, 1
+        parents = []
+
+        for event, element in iterparse(self._xml_file, events=('start', 'end')):
+            tag = self._local_name(element.tag)
+
+            if event == 'start':
+                if tag == 'entry' and len(parents) == 1:
+                    entry_index += 1
+                    if entry_index == 3:
+                        # the kind and the reading type entries have been read at this point
+                        type, unit, multiplier = self._parse_type_and_unit(kind, reading_type)
+                        if not (type and unit):
+                            return
+                parents.append(element)
+                continue
+
+            parents.pop()
+
+            if entry_index == 0 and tag == 'kind':
+                kind = element.text
+            elif entry_index == 2 and tag in ('uom', 'powerOfTenMultiplier'):
+                reading_type[tag] = element.text
+            elif entry_index == 3 and tag == 'link' and source_id is None:
+                source_id = re.sub(r'/v./', '', element.get('href'))
+            elif entry_index == 3 and tag == 'IntervalReading':
+                reading = {self._local_name(e.tag): e.text for e in element.iter()}
+                yield {
+                    'start_time': int(reading['start']),
+                    'source_id': source_id,
+                    'duration': int(reading['duration']),
+                    'Meter Type': type,
+                    'Usage Units': unit,
+                    'Usage/Quantity': float(reading['value']) * multiplier,
+                }
+                # drop the readings read so far from the IntervalBlock
+                parents[-1].clear()
+            elif tag == 'entry':
+                element.clear()
+
+    def _local_name(self, tag):
+        """
+        Returns the tag name without its namespace, i.e. '{http://naesb.org/espi}kind' -> 'kind'
+        """
+        return tag.rsplit('}', 1)[-1]
 
-    def _parse_type_and_unit(self, raw_data):
+    def _parse_type_and_unit(self, kind, reading_type):
         """
-        Parses raw XML to read the kind and uom/powerOfTenMultiplier. Using
-        those, an attempt is made to validate the type and unit as a combination
-        that the application accepts.
+        Uses the kind and uom/powerOfTenMultiplier read from the XML to validate
+        the type and unit as a combination that the application accepts.
 
         The if the type and unit are parsable and valid, they are returned,
         otherwise, None is returned as applicable.
         """
-        kind_entry = raw_data['feed']['entry'][0]
-        kind = kind_entry['content']['UsagePoint']['ServiceCategory']['kind']
-        type = self.kind_codes.get(int(kind), None)
+        type = None if kind is None else self.kind_codes.get(int(kind), None)
 
         if type is None:
             return None, None, 1
 
-        uom_entry = raw_data['feed']['entry'][2]['content']['ReadingType']
-        uom = uom_entry['uom']
-        raw_base_unit = self.uom_codes.get(int(uom), '')
+        uom = reading_type.get('uom')
+        raw_base_unit = '' if uom is None else self.uom_codes.get(int(uom), '')
 
-        power_of_ten_multiplier = int(uom_entry['powerOfTenMultiplier'])
+        power_of_ten_multiplier = int(reading_type.get('powerOfTenMultiplier', 0))
 
         resulting_unit, multiplier = self._parse_valid_unit_and_multiplier(
             type,
@@ -442,6 +463,7 @@ class CSVParser(object):
         fieldnames, generated_headers = clean_fieldnames(
             DictReader(self.csvfile, dialect=dialect).fieldnames
         )
+        self.dialect = dialect
         self.has_generated_headers = generated_headers
         self.csvfile.seek(0)  # not positive this is required, but adding it just in case
         self.csvreader = DictReader(self.csvfile, dialect=dialect, fieldnames=fieldnames)
@@ -453,6 +475,43 @@ class CSVParser(object):
         # skip header row
         self.csvfile.__next__()
 
+    def row_offsets(self, chunk_size):
+        """yields (offset, number of rows) for each chunk of at most chunk_size rows
+
+        The rows are read one at a time and are not kept, so the file is never loaded into memory.
+        The offsets are positions in the file and are only valid for a file opened the same way.
+
+        :param chunk_size: int, number of rows per chunk
+        :returns: Generator yielding tuples of (offset, number of rows)
+        """
+        # tell() is not available while iterating over the file, so read the lines with readline
+        self.csvfile.seek(0)
+        self.csvfile.readline()
+        rows = reader(iter(self.csvfile.readline, ''), dialect=self.dialect)
+
+        offset = self.csvfile.tell()
+        count = 0
+        for row in rows:
+            # empty rows are skipped by the DictReader, so don't count them
+            if not row:
+                continue
+
+            count += 1
+            if count == chunk_size:
+                yield offset, count
+                offset = self.csvfile.tell()
+                count = 0
+
+        if count:
+            yield offset, count
+
+    def seek_to_offset(self, offset):
+        """seeks to an offset returned by ``row_offsets``
+
+        :param offset: int, position in the file of the first row to read
+        """
+        self.csvfile.seek(offset)
+
     def num_columns(self):
         """gets the number of columns for the file"""
         return len(self.csvreader.fieldnames)
@@ -524,6 +583,22 @@ class MCMParser(object):
 
         return self.reader.seek_to_beginning()
 
+    @property
+    def can_seek(self):
+        """whether the rows can be read from an offset, see row_offsets. Only CSV files can,
+        Excel files have to be parsed as a whole to read any of their rows."""
+        return isinstance(self.reader, CSVParser)
+
+    def row_offsets(self, chunk_size):
+        """calls the reader's row_offsets, CSV files only"""
+        return self.reader.row_offsets(chunk_size)
+
+    def seek_to_offset(self, offset):
+        """calls the reader's seek_to_offset, data will start at the first row of the chunk. CSV
+        files only"""
+        self.reader.seek_to_offset(offset)
+        self.data = self.reader.csvreader
+
     def num_columns(self):
         """returns the number of columns of the file"""
         return self.reader.num_columns()
@@ -61,6 +61,21 @@ class CSVParserTest(TestCase):
 
         self.assertEqual(self.parser.first_five_rows, expectation)
 
+    def test_it_reads_rows_from_an_offset(self):
+        self.assertTrue(self.parser.can_seek)
+        offsets = list(self.parser.row_offsets(1))
+        self.assertEqual([num_rows for _offset, num_rows in offsets], [1, 1])
+
+        # a new parser on the same file returns the second row after seeking to its offset
+        file_path = os.path.dirname(os.path.abspath(__file__)) + "/test_data/test_csv.csv"
+        with open(file_path, "r", encoding="utf-8") as f:
+            parser = MCMParser(f)
+            parser.seek_to_offset(offsets[1][0])
+            data = [dict(row) for row in parser.data]
+
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["column 1"], "7")
+
 
 class CSVMissingHeadersParserTest(TestCase):
     def setUp(self):
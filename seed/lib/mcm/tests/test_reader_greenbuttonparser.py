@@ -34,7 +34,7 @@ class GreenButtonParserTest(TestCase):
             }
         ]
 
-        self.assertEqual(parser.data, expectation)
+        self.assertEqual(list(parser.data), expectation)
 
     def test_data_property_can_handle_gas_MBtu(self):
         # Different case when powerOfTenMultiplier + base unit = exact match of known unit
@@ -61,7 +61,7 @@ class GreenButtonParserTest(TestCase):
             }
         ]
 
-        self.assertEqual(parser.data, expectation)
+        self.assertEqual(list(parser.data), expectation)
 
     def test_data_property_can_handle_gas_J_with_power_of_ten_of_negative_3(self):
         # Case when base unit approximated and powerOfTenMultiplier used as conversion
@@ -88,7 +88,7 @@ class GreenButtonParserTest(TestCase):
             }
         ]
 
-        self.assertEqual(parser.data, expectation)
+        self.assertEqual(list(parser.data), expectation)
 
     def test_data_property_can_handle_gas_therms_with_power_of_ten_of_negative_3(self):
         # Case when only base unit == exact match and powerOfTenMultiplier used as conversion
@@ -115,18 +115,31 @@ class GreenButtonParserTest(TestCase):
             }
         ]
 
-        self.assertEqual(parser.data, expectation)
+        self.assertEqual(list(parser.data), expectation)
 
     def test_data_property_can_handle_invalid_energy_type_of_time(self):
         file_path = os.path.dirname(os.path.abspath(__file__)) + "/test_data/greenbutton/example-GreenButton-data-invalid-time-service-kind.xml"
         file = open(file_path, "r", encoding="utf-8")
         parser = GreenButtonParser(file)
 
-        self.assertEqual(parser.data, [])
+        self.assertEqual(list(parser.data), [])
 
     def test_data_property_can_handle_invalid_electricity_cubic_feet(self):
         file_path = os.path.dirname(os.path.abspath(__file__)) + "/test_data/greenbutton/example-GreenButton-data-invalid-electricity-cf.xml"
         file = open(file_path, "r", encoding="utf-8")
         parser = GreenButtonParser(file)
 
-        self.assertEqual(parser.data, [])
+        self.assertEqual(list(parser.data), [])
+
+    def test_data_property_yields_readings_lazily_and_can_be_read_again(self):
+        file_path = os.path.dirname(os.path.abspath(__file__)) + "/test_data/greenbutton/example-GreenButton-data-electricity-wh.xml"
+        file = open(file_path, "r", encoding="utf-8")
+        parser = GreenButtonParser(file)
+
+        readings = parser.data
+        self.assertEqual(next(readings)['start_time'], 1299387600)
+        self.assertEqual(next(readings)['start_time'], 1299388500)
+        with self.assertRaises(StopIteration):
+            next(readings)
+
+        self.assertEqual(len(list(parser.data)), 2)
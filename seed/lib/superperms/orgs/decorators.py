@@ -11,12 +11,15 @@ from django.conf import settings
 from django.http import HttpResponseForbidden
 
 from seed.lib.superperms.orgs.models import (
+    ORG_CONTEXT_CACHE_TIMEOUT,
     ROLE_OWNER,
     ROLE_MEMBER,
     ROLE_VIEWER,
     Organization,
-    OrganizationUser
+    OrganizationUser,
+    get_org_context_version,
 )
+from seed.utils.cache import get_cache_raw, set_cache_raw
 
 # Allow Super Users to ignore permissions.
 ALLOW_SUPER_USER_PERMS = getattr(settings, 'ALLOW_SUPER_USER_PERMS', True)
@@ -32,13 +35,7 @@ def requires_parent_org_owner(org_user):
 
 def requires_owner(org_user):
     """Owners, and only owners have owner perms."""
-    is_parent_org_owner = False
-    parent = org_user.organization.parent_org
-    if parent:
-        is_parent_org_owner = OrganizationUser.objects.filter(
-            organization=parent, user=org_user.user, role_level__gte=ROLE_OWNER
-        ).exists()
-    return is_parent_org_owner or org_user.role_level >= ROLE_OWNER
+    return org_user.role_level >= ROLE_OWNER or org_user.is_parent_org_owner
 
 
 def requires_member(org_user):
@@ -90,10 +87,7 @@ def can_modify_org_settings(org_user):
         return True
     # otherwise, there may be a parent org, so see if this user
     # is an owner of the parent.
-    org = org_user.organization
-    if org.parent_org is not None and org.parent_org.is_owner(org_user.user):
-        return True
-    return False
+    return org_user.is_parent_org_owner
 
 
 def can_view_sub_org_settings(org_user):
@@ -187,6 +181,98 @@ def _get_org_id(request):
     return org_id
 
 
+def _request_org_contexts(request):
+    """Return the org contexts resolved for the request, {org_id: context}"""
+    # DRF requests wrap the HttpRequest, keep the contexts on the latter so the view shares them
+    http_request = getattr(request, '_request', request)
+    return vars(http_request).setdefault('_org_contexts', {})
+
+
+def get_org_context(request, org_id):
+    """
+    Return the organization and the membership of the user of the request in it, i.e.
+    {'org': Organization, 'org_user': OrganizationUser or None}, or None if the organization
+    does not exist.
+
+    The context is resolved once per request. It is also kept in the shared cache for
+    ORG_CONTEXT_CACHE_TIMEOUT seconds, or until the organization, its parent or their members
+    change, so that most requests don't query the organization and the membership at all.
+
+    :param request: request object
+    :param org_id: int or str, Organization ID
+    :return: dict or None
+    """
+    try:
+        org_id = int(org_id)
+    except (TypeError, ValueError):
+        return None
+
+    contexts = _request_org_contexts(request)
+    if org_id in contexts:
+        return contexts[org_id]
+
+    user = request.user
+    cache_key = None
+    if user.pk is not None:
+        version = get_org_context_version(org_id)
+        if version is not None:
+            cache_key = 'org_context__{}__{}__{}'.format(org_id, user.pk, version)
+
+    context = get_cache_raw(cache_key) if cache_key else None
+    if context is None:
+        org = Organization.objects.select_related('parent_org').filter(pk=org_id).first()
+        if org is None:
+            context = None
+        else:
+            org_user = OrganizationUser.objects.filter(user_id=user.pk, organization=org).first()
+            if org_user is not None:
+                org_user.organization = org
+                # resolved now so that it is cached with the context
+                org_user.is_parent_org_owner
+            context = {'org': org, 'org_user': org_user}
+            if cache_key:
+                set_cache_raw(cache_key, context, ORG_CONTEXT_CACHE_TIMEOUT)
+
+    if context is not None and context['org_user'] is not None:
+        context['org_user'].user = user
+
+    contexts[org_id] = context
+    return context
+
+
+def get_request_org(request, org_id):
+    """
+    Return the Organization, reusing the one resolved when checking the permissions of the
+    request if there is one.
+
+    :param request: request object
+    :param org_id: int or str, Organization ID
+    :return: Organization, raises Organization.DoesNotExist if it does not exist
+    """
+    try:
+        context = _request_org_contexts(request).get(int(org_id))
+    except (TypeError, ValueError):
+        context = None
+    if context is not None:
+        return context['org']
+    return Organization.objects.get(pk=org_id)
+
+
+def _check_perm(request, perm_name):
+    """Return the error response if the user from request doesn't have ``perm_name``."""
+    context = get_org_context(request, _get_org_id(request))
+    if context is None:
+        return _make_resp('org_dne')
+
+    if context['org_user'] is None:
+        return _make_resp('user_dne')
+
+    if not PERMS.get(perm_name, lambda x: False)(context['org_user']):
+        return _make_resp('perm_denied')
+
+    return None
+
+
 def has_perm(perm_name):
     """Proceed if user from request has ``perm_name``."""
 
@@ -197,22 +283,9 @@ def has_perm(perm_name):
             if request.user.is_superuser and ALLOW_SUPER_USER_PERMS:
                 return fn(request, *args, **kwargs)
 
-            org_id = _get_org_id(request)
-
-            try:
-                org = Organization.objects.get(pk=org_id)
-            except Organization.DoesNotExist:
-                return _make_resp('org_dne')
-
-            try:
-                org_user = OrganizationUser.objects.get(
-                    user=request.user, organization=org
-                )
-            except OrganizationUser.DoesNotExist:
-                return _make_resp('user_dne')
-
-            if not PERMS.get(perm_name, lambda x: False)(org_user):
-                return _make_resp('perm_denied')
+            error_response = _check_perm(request, perm_name)
+            if error_response is not None:
+                return error_response
 
             # Logic to see if person has permission required.
             return fn(request, *args, **kwargs)
@@ -232,22 +305,9 @@ def has_perm_class(perm_name):
             if request.user.is_superuser and ALLOW_SUPER_USER_PERMS:
                 return fn(self, request, *args, **kwargs)
 
-            org_id = _get_org_id(request)
-
-            try:
-                org = Organization.objects.get(pk=org_id)
-            except Organization.DoesNotExist:
-                return _make_resp('org_dne')
-
-            try:
-                org_user = OrganizationUser.objects.get(
-                    user=request.user, organization=org
-                )
-            except OrganizationUser.DoesNotExist:
-                return _make_resp('user_dne')
-
-            if not PERMS.get(perm_name, lambda x: False)(org_user):
-                return _make_resp('perm_denied')
+            error_response = _check_perm(request, perm_name)
+            if error_response is not None:
+                return error_response
 
             # Logic to see if person has permission required.
             return fn(self, request, *args, **kwargs)
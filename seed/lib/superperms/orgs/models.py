@@ -5,14 +5,17 @@
 :author
 """
 import logging
+from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.postgres.fields import JSONField
-from django.db import models
-from django.db.models.signals import pre_delete
+from django.db import connection, models, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils.functional import cached_property
 
 from seed.lib.superperms.orgs.exceptions import TooManyNestedOrgs
+from seed.utils.cache import add_cache_raw, get_cache_raw, set_cache_raw
 
 _log = logging.getLogger(__name__)
 
@@ -40,6 +43,53 @@ STATUS_CHOICES = (
     (STATUS_REJECTED, 'Rejected'),
 )
 
+# Seconds the organization contexts of the users are kept in the shared cache
+ORG_CONTEXT_CACHE_TIMEOUT = 60
+
+# Seconds the versions of the organization contexts are kept in the shared cache
+ORG_CONTEXT_VERSION_TIMEOUT = 60 * 60 * 24
+
+
+def _org_context_version_key(org_id):
+    return 'org_context_version__{}'.format(org_id)
+
+
+def get_org_context_version(org_id):
+    """
+    Return the current version of the cached contexts of an organization. The version changes
+    whenever the organization, its parent or their members change.
+
+    :param org_id: int, Organization ID
+    :return: str, or None if the shared cache is not available
+    """
+    version_key = _org_context_version_key(org_id)
+    version = get_cache_raw(version_key)
+    if version is None:
+        # another process may be setting the first version at the same time
+        add_cache_raw(version_key, uuid4().hex, ORG_CONTEXT_VERSION_TIMEOUT)
+        version = get_cache_raw(version_key)
+
+    return version
+
+
+def invalidate_org_context(org_id):
+    """
+    Invalidate the cached contexts of the organization and of its sub-organizations by giving
+    them a new version. When called within a transaction, the contexts are invalidated again once
+    it is committed so that contexts read in the meantime by other processes are not kept.
+
+    :param org_id: int, Organization ID
+    """
+    org_ids = [org_id] + list(Organization.objects.filter(parent_org_id=org_id).values_list('id', flat=True))
+
+    def set_new_versions():
+        for invalidated_org_id in org_ids:
+            set_cache_raw(_org_context_version_key(invalidated_org_id), uuid4().hex, ORG_CONTEXT_VERSION_TIMEOUT)
+
+    set_new_versions()
+    if connection.in_atomic_block:
+        transaction.on_commit(set_new_versions)
+
 
 # This should be cleaned/DRYed up with Organization._default_display_meter_units
 def _get_default_display_meter_units():
@@ -101,6 +151,16 @@ class OrganizationUser(models.Model):
                     raise UserWarning('Did not find suitable user to promote')
         super().delete(*args, **kwargs)
 
+    @cached_property
+    def is_parent_org_owner(self):
+        """True if the user is an owner of the parent of the organization, if it has one."""
+        parent_org = self.organization.parent_org
+        if parent_org is None:
+            return False
+        return OrganizationUser.objects.filter(
+            organization=parent_org, user_id=self.user_id, role_level__gte=ROLE_OWNER
+        ).exists()
+
     def __str__(self):
         return 'OrganizationUser: {0} <{1}> ({2})'.format(
             self.user.username, self.organization.name, self.pk
@@ -288,4 +348,16 @@ def organization_pre_delete(sender, instance, **kwargs):
     ImportRecord.raw_objects.filter(super_organization_id=instance.pk).delete()
 
 
+def invalidate_org_context_of_organization(sender, instance, **kwargs):
+    invalidate_org_context(instance.pk)
+
+
+def invalidate_org_context_of_organization_user(sender, instance, **kwargs):
+    invalidate_org_context(instance.organization_id)
+
+
 pre_delete.connect(organization_pre_delete, sender=Organization)
+post_save.connect(invalidate_org_context_of_organization, sender=Organization)
+post_delete.connect(invalidate_org_context_of_organization, sender=Organization)
+post_save.connect(invalidate_org_context_of_organization_user, sender=OrganizationUser)
+post_delete.connect(invalidate_org_context_of_organization_user, sender=OrganizationUser)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+:copyright (c) 2014 - 2020, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+
+Compare the time and the number of queries of the setup done by each chunk task of an import
+(organization, column mappings, cleaner, columns and data quality rules) in a fresh worker
+process, i.e. with empty process caches, against a worker process that already ran a task for
+the organization.
+
+All of the records created by the benchmark are rolled back.
+"""
+from __future__ import unicode_literals
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from seed.data_importer import tasks
+from seed.landing.models import SEEDUser as User
+from seed.lib.superperms.orgs.models import Organization
+from seed.models import Column, data_quality
+from seed.models import columns as columns_module
+from seed.models.data_quality import DataQualityCheck
+from seed.utils.organizations import create_organization
+
+
+def _clear_process_caches():
+    """Empty the caches of the process, as in a newly started worker process"""
+    for cache in (columns_module._columns_cache,
+                  columns_module._match_index_cache,
+                  tasks._cleaner_cache,
+                  tasks._column_mappings_cache,
+                  data_quality._rules_cache):
+        cache.clear()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the setup of the import chunk tasks with cold and warm process caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat',
+                            default=20,
+                            type=int,
+                            help='Number of chunk tasks to simulate',
+                            dest='repeat')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create(username='chunk-overhead-benchmark@example.com')
+            org, _, _ = create_organization(user)
+
+            steps = [
+                ('organization', lambda: Organization.objects.get(pk=org.id)),
+                ('column mappings', lambda: tasks._retrieve_column_mappings_by_table_name(org)),
+                ('cleaner', lambda: tasks._retrieve_cleaner(org)),
+                ('columns', lambda: Column.retrieve_all(org.id, 'PropertyState', False)),
+                ('data quality rules',
+                 lambda: DataQualityCheck.retrieve(org.id).retrieve_enabled_rules('PropertyState')),
+            ]
+
+            results = {}
+            for warm in (False, True):
+                # the first run fills the caches for the warm runs
+                _clear_process_caches()
+                for name, step in steps:
+                    step()
+
+                for name, step in steps:
+                    elapsed = 0
+                    queries = 0
+                    for _ in range(options['repeat']):
+                        if not warm:
+                            _clear_process_caches()
+                        with CaptureQueriesContext(connection) as context:
+                            start = time.time()
+                            step()
+                            elapsed += time.time() - start
+                        queries += len(context.captured_queries)
+                    results[(name, warm)] = (
+                        elapsed * 1000 / options['repeat'], queries / options['repeat']
+                    )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write('{:<20} {:>10} {:>10} {:>14} {:>14}'.format(
+            'step', 'cold ms', 'warm ms', 'cold queries', 'warm queries'
+        ))
+        totals = [0, 0, 0, 0]
+        for name, _ in steps:
+            cold_ms, cold_queries = results[(name, False)]
+            warm_ms, warm_queries = results[(name, True)]
+            for i, value in enumerate((cold_ms, warm_ms, cold_queries, warm_queries)):
+                totals[i] += value
+            self.stdout.write('{:<20} {:>10.2f} {:>10.2f} {:>14.1f} {:>14.1f}'.format(
+                name, cold_ms, warm_ms, cold_queries, warm_queries
+            ))
+        self.stdout.write('{:<20} {:>10.2f} {:>10.2f} {:>14.1f} {:>14.1f}'.format('total', *totals))
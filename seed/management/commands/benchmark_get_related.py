@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+:copyright (c) 2014 - 2020, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+
+Time TaxLotProperty.get_related for one page of tax lots while the number of
+property/tax lot pairings of another organization grows. The time per page
+should stay flat since get_related only reads the pairings of the page.
+
+All of the records created by the benchmark are rolled back.
+"""
+from __future__ import unicode_literals
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from seed.landing.models import SEEDUser as User
+from seed.models import (
+    Column,
+    Cycle,
+    Property,
+    PropertyState,
+    PropertyView,
+    TaxLot,
+    TaxLotProperty,
+    TaxLotState,
+    TaxLotView,
+)
+from seed.utils.organizations import create_organization
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks TaxLotProperty.get_related for a page of tax lots against the size of the pairings table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size',
+                            default=100,
+                            type=int,
+                            help='Number of tax lots on the page',
+                            dest='page_size')
+
+        parser.add_argument('--sizes',
+                            default='0,10000,50000',
+                            help='Comma separated numbers of pairings of the other organization',
+                            dest='sizes')
+
+        parser.add_argument('--repeat',
+                            default=5,
+                            type=int,
+                            help='Number of times to call get_related for each size',
+                            dest='repeat')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+
+        self.stdout.write('{:>12} {:>14}'.format('pairings', 'ms per page'))
+        with transaction.atomic():
+            user = User.objects.create(username='get-related-benchmark@example.com')
+            org, _, _ = create_organization(user)
+            cycle = Cycle.objects.filter(organization=org).first()
+            page_view_ids = self._create_pairings(org, cycle, options['page_size'])
+            columns_from_database = Column.retrieve_all(org.id, 'taxlot', False)
+
+            other_user = User.objects.create(username='get-related-benchmark-other@example.com')
+            other_org, _, _ = create_organization(other_user)
+            other_cycle = Cycle.objects.filter(organization=other_org).first()
+
+            other_count = 0
+            for size in sizes:
+                self._create_pairings(other_org, other_cycle, size - other_count)
+                other_count = size
+
+                page = list(TaxLotView.objects.select_related('state').filter(pk__in=page_view_ids))
+                start = time.time()
+                for _ in range(options['repeat']):
+                    TaxLotProperty.get_related(page, None, columns_from_database)
+                elapsed = (time.time() - start) / options['repeat']
+
+                self.stdout.write('{:>12} {:>14.1f}'.format(size, elapsed * 1000))
+
+            transaction.set_rollback(True)
+
+    def _create_pairings(self, org, cycle, count):
+        """creates count property/tax lot pairings in the cycle, returns the TaxLotView ids"""
+        if count <= 0:
+            return []
+
+        property_states = PropertyState.objects.bulk_create([
+            PropertyState(organization=org, pm_property_id=str(i)) for i in range(count)
+        ])
+        properties = Property.objects.bulk_create([Property(organization=org) for _ in range(count)])
+        property_views = PropertyView.objects.bulk_create([
+            PropertyView(property=p, state=ps, cycle=cycle)
+            for p, ps in zip(properties, property_states)
+        ])
+
+        taxlot_states = TaxLotState.objects.bulk_create([
+            TaxLotState(organization=org, jurisdiction_tax_lot_id=str(i)) for i in range(count)
+        ])
+        taxlots = TaxLot.objects.bulk_create([TaxLot(organization=org) for _ in range(count)])
+        taxlot_views = TaxLotView.objects.bulk_create([
+            TaxLotView(taxlot=t, state=ts, cycle=cycle)
+            for t, ts in zip(taxlots, taxlot_states)
+        ])
+
+        TaxLotProperty.objects.bulk_create([
+            TaxLotProperty(property_view=pv, taxlot_view=tv, cycle=cycle)
+            for pv, tv in zip(property_views, taxlot_views)
+        ])
+
+        return [tv.id for tv in taxlot_views]
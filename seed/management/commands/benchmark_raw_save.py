@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+:copyright (c) 2014 - 2020, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+
+Compare the rows/sec of saving the raw rows of an import file one at a time with
+PropertyState.save() against the bulk_create path used by the raw save tasks.
+
+All of the records created by the benchmark are rolled back.
+"""
+from __future__ import unicode_literals
+
+import os
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from past.builtins import basestring
+from unidecode import unidecode
+
+from seed.data_importer.models import ImportFile, ImportRecord
+from seed.data_importer.tasks import _save_raw_data_rows
+from seed.landing.models import SEEDUser as User
+from seed.lib.mcm import reader
+from seed.models import DATA_STATE_IMPORT, PropertyState
+from seed.utils.buildings import get_source_type
+from seed.utils.organizations import create_organization
+
+SAMPLE_DATA_DIR = os.path.join(
+    os.path.dirname(__file__), '..', '..', 'tests', 'data'
+)
+
+
+def _save_raw_data_rows_one_at_a_time(rows, import_file):
+    """
+    The raw save as done before the bulk_create of _save_raw_data_rows: each row is saved with
+    PropertyState.save(), which also normalizes the address and hashes the state.
+    """
+    source_type = get_source_type(import_file)
+    with transaction.atomic():
+        for c in rows:
+            raw_property = PropertyState(organization=import_file.import_record.super_organization)
+            raw_property.import_file = import_file
+            raw_property.extra_data = {
+                k.strip(): unidecode(v) if isinstance(v, basestring) else v for k, v in c.items()
+            }
+            raw_property.source_type = source_type
+            raw_property.data_state = DATA_STATE_IMPORT
+            raw_property.save()
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the raw save of the sample import files with and without bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat',
+                            default=3,
+                            type=int,
+                            help='Number of times to save the rows of each file',
+                            dest='repeat')
+
+        parser.add_argument('files',
+                            nargs='*',
+                            help='Files to benchmark, defaults to the CSV and XLSX files in seed/tests/data')
+
+    def handle(self, *args, **options):
+        files = options['files'] or sorted(
+            os.path.join(SAMPLE_DATA_DIR, f)
+            for f in os.listdir(SAMPLE_DATA_DIR)
+            if f.endswith(('.csv', '.xlsx', '.xls')) and 'meter' not in f
+        )
+
+        self.stdout.write('{:<55} {:>8} {:>14} {:>14}'.format(
+            'file', 'rows', 'save() rows/s', 'bulk rows/s'
+        ))
+        for filepath in files:
+            try:
+                rows, save_rate, bulk_rate = self._benchmark_file(filepath, options['repeat'])
+            except Exception as e:
+                self.stdout.write('{:<55} failed: {}'.format(os.path.basename(filepath), e))
+                continue
+
+            self.stdout.write('{:<55} {:>8} {:>14.0f} {:>14.0f}'.format(
+                os.path.basename(filepath), rows, save_rate, bulk_rate
+            ))
+
+    def _benchmark_file(self, filepath, repeat):
+        """returns the number of rows, and the rows/sec of save() and of bulk_create"""
+        with transaction.atomic():
+            user = User.objects.create(username='raw-save-benchmark@example.com')
+            org, _, _ = create_organization(user)
+            import_record = ImportRecord.objects.create(
+                owner=user, last_modified_by=user, super_organization=org
+            )
+            import_file = ImportFile.objects.create(
+                import_record=import_record, source_type='Assessed Raw'
+            )
+            with open(filepath, 'rb') as f:
+                import_file.file = SimpleUploadedFile(name=os.path.basename(filepath), content=f.read())
+            import_file.save()
+
+            parser = reader.MCMParser(import_file.local_file)
+            rows = [dict(row) for row in parser.data]
+
+            rates = []
+            for save_rows in (_save_raw_data_rows_one_at_a_time, _save_raw_data_rows):
+                start = time.time()
+                for _ in range(repeat):
+                    save_rows(rows, import_file)
+                rates.append(len(rows) * repeat / max(time.time() - start, 1e-9))
+
+            import_file.file.delete(save=False)
+            transaction.set_rollback(True)
+
+        return len(rows), rates[0], rates[1]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.13 on 2020-12-01 10:00
+
+import django.contrib.postgres.fields.jsonb
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('seed', '0131_analysis_analysisinputfile_analysismessage_analysisoutputfile_analysispropertyview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyStateListRow',
+            fields=[
+                ('updated', models.DateTimeField()),
+                ('data', django.contrib.postgres.fields.jsonb.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('state', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='list_row', serialize=False, to='seed.PropertyState')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TaxLotStateListRow',
+            fields=[
+                ('updated', models.DateTimeField()),
+                ('data', django.contrib.postgres.fields.jsonb.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('state', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='list_row', serialize=False, to='seed.TaxLotState')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -10,21 +10,36 @@ import csv
 import logging
 import os.path
 from collections import OrderedDict
+from uuid import uuid4
 
 from django.apps import apps
 from django.db import IntegrityError
 from django.core.exceptions import ValidationError
 from django.db import (
+    connection,
     models,
     transaction,
 )
-from django.db.models import Q
-from django.db.models.signals import pre_save
+from django.contrib.postgres.fields import JSONField
+from django.db.models import F, Func, Q, Value
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
 from django.utils.translation import ugettext_lazy as _
 
+from seed.lib.mcm.matchers import MatchIndex
 from seed.lib.superperms.orgs.models import Organization as SuperOrganization
 from seed.models.column_mappings import ColumnMapping
 from seed.models.models import Unit
+from seed.utils.cache import (
+    ProcessLRUCache,
+    add_cache_raw,
+    get_cache_raw,
+    set_cache_raw,
+)
 
 INVENTORY_DISPLAY = {
     'PropertyState': 'Property',
@@ -34,6 +49,72 @@ INVENTORY_DISPLAY = {
 }
 _log = logging.getLogger(__name__)
 
+# Seconds the serialized columns of an organization are kept in the shared cache
+COLUMNS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Serialized columns of the organizations read by this process
+_columns_cache = ProcessLRUCache()
+
+# Mapping suggestion indexes of the organizations built by this process
+_match_index_cache = ProcessLRUCache()
+
+
+def _columns_cache_version_key(org_id):
+    return 'column_metadata_version__{}'.format(org_id)
+
+
+def _columns_cache_key(org_id, version):
+    return 'column_metadata__{}__{}'.format(org_id, version)
+
+
+def invalidate_columns_cache(org_id):
+    """
+    Invalidate the cached columns of the organization in every process by giving them a new
+    version. When called within a transaction, the columns are invalidated again once it is
+    committed so that columns read in the meantime by other processes are not kept.
+
+    :param org_id: int, Organization ID
+    """
+    def set_new_version():
+        set_cache_raw(_columns_cache_version_key(org_id), uuid4().hex, COLUMNS_CACHE_TIMEOUT)
+
+    set_new_version()
+    if connection.in_atomic_block:
+        transaction.on_commit(set_new_version)
+
+
+class JsonbGetKey(Func):
+    """Value of a key of a jsonb object, i.e. jsonb -> text"""
+    arg_joiner = ' -> '
+    template = '(%(expressions)s)'
+    output_field = JSONField()
+
+
+class JsonbGetKeyText(Func):
+    """Value of a key of a jsonb object as text, i.e. jsonb ->> text"""
+    arg_joiner = ' ->> '
+    template = '(%(expressions)s)'
+    output_field = models.TextField()
+
+
+class JsonbDeleteKey(Func):
+    """The jsonb object without the key, i.e. jsonb - text"""
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = JSONField()
+
+
+class JsonbConcat(Func):
+    """Concatenation of jsonb objects, the keys of the last objects take precedence"""
+    arg_joiner = ' || '
+    template = '(%(expressions)s)'
+    output_field = JSONField()
+
+
+class JsonbBuildObject(Func):
+    function = 'jsonb_build_object'
+    output_field = JSONField()
+
 
 class Column(models.Model):
     """The name of a column for a given organization."""
@@ -619,45 +700,58 @@ class Column(models.Model):
                         'Column \'%s\':\'%s\' is not a field in the database and not marked as extra data. Mark as extra data to save column.') % (
                         self.table_name, self.column_name)})
 
-    def rename_column(self, new_column_name, force=False):
+    def check_rename_column(self, new_column_name, force=False):
+        """
+        Check that the column can be renamed to the new column name, i.e. that neither of them
+        is reserved and that the new column doesn't exist unless its data are overwritten.
+
+        :param new_column_name: string new name of column
+        :param force: boolean force the overwrite of data in the column?
+        :return: list, [True, ''] or [False, error message]
+        """
+        # restricted columns to rename to or from
+        if new_column_name in self.EXCLUDED_RENAME_TO_FIELDS:
+            return [False, "Column name '%s' is a reserved name. Choose another." % new_column_name]
+
+        # Do not allow moving data out of the property based columns
+        if self.column_name in self.EXCLUDED_RENAME_FROM_FIELDS or \
+                self.table_name in ['Property', 'TaxLot']:
+            return [False, "Can't move data out of reserved column '%s'" % self.column_name]
+
+        if not force and Column.objects.filter(table_name=self.table_name, column_name=new_column_name,
+                                               organization=self.organization).exists():
+            return [False, 'New column already exists, specify overwrite data if desired']
+
+        return [True, '']
+
+    def rename_column(self, new_column_name, force=False, progress_key=None):
         """
         Rename the column and move all the data to the new column. This can move the
         data from a canonical field to an extra data field or vice versa. By default the
         column.
 
+        The data are moved with a single UPDATE of the -States in the database, the
+        normalized addresses and hashes of the -States are then recalculated in batches.
+
         :param new_column_name: string new name of column
         :param force: boolean force the overwrite of data in the column?
+        :param progress_key: string, optional key of a ProgressData to step while moving the data
         :return:
         """
-        from datetime import (
-            datetime as datetime_type,
-            date as date_type,
-        )
+        from django.db.models.functions import Cast, Now
         from django.db.utils import DataError
         from pint.errors import DimensionalityError
+        from seed.data_importer.utils import chunk_iterable
+        from seed.lib.progress_data.progress_data import ProgressData
         from seed.models.properties import PropertyState
         from seed.models.tax_lots import TaxLotState, DATA_STATE_MATCHING
         from quantityfield import ureg
+        from quantityfield.fields import QuantityField
         STR_TO_CLASS = {'TaxLotState': TaxLotState, 'PropertyState': PropertyState}
 
-        def _serialize_for_extra_data(column_value):
-            if isinstance(column_value, datetime_type):
-                return column_value.isoformat()
-            elif isinstance(column_value, date_type):
-                return column_value.isoformat()
-            elif isinstance(column_value, ureg.Quantity):
-                return column_value.magnitude
-            else:
-                return column_value
-
-        # restricted columns to rename to or from
-        if new_column_name in self.EXCLUDED_RENAME_TO_FIELDS:
-            return [False, "Column name '%s' is a reserved name. Choose another." % new_column_name]
-
-        # Do not allow moving data out of the property based columns
-        if self.column_name in self.EXCLUDED_RENAME_FROM_FIELDS or \
-                self.table_name in ['Property', 'TaxLot']:
-            return [False, "Can't move data out of reserved column '%s'" % self.column_name]
+        result = self.check_rename_column(new_column_name, force)
+        if not result[0]:
+            return result
 
         try:
             with transaction.atomic():
@@ -665,9 +759,6 @@ class Column(models.Model):
                 new_column = Column.objects.filter(table_name=self.table_name, column_name=new_column_name,
                                                    organization=self.organization)
                 if len(new_column) > 0:
-                    if not force:
-                        return [False, 'New column already exists, specify overwrite data if desired']
-
                     new_column = new_column.first()
 
                     # update the fields in the new column to match the old columns
@@ -697,35 +788,59 @@ class Column(models.Model):
                         merge_protection=self.merge_protection
                     )
 
-                # go through the data and move it to the new field. I'm not sure yet on how long this is
-                # going to take to run, so we may have to move this to a background task
-                orig_data = STR_TO_CLASS[self.table_name].objects.filter(
+                StateClass = STR_TO_CLASS[self.table_name]
+                orig_data = StateClass.objects.filter(
                     organization=self.organization,
                     data_state=DATA_STATE_MATCHING
                 )
+
+                # move the data in the database. Casting the values to the type of the new field
+                # raises a DataError if any of them can't be converted.
+                if self.is_extra_data:
+                    value = JsonbGetKey(F('extra_data'), Value(self.column_name))
+                    updates = {'extra_data': JsonbDeleteKey(F('extra_data'), Value(self.column_name))}
+                else:
+                    value = F(self.column_name)
+                    updates = {self.column_name: None}
+
                 if new_column.is_extra_data:
-                    if self.is_extra_data:
-                        for datum in orig_data:
-                            datum.extra_data[new_column.column_name] = datum.extra_data.get(self.column_name, None)
-                            datum.extra_data.pop(self.column_name, None)
-                            datum.save()
-                    else:
-                        for datum in orig_data:
-                            column_value = _serialize_for_extra_data(getattr(datum, self.column_name))
-                            datum.extra_data[new_column.column_name] = column_value
-                            setattr(datum, self.column_name, None)
-                            datum.save()
+                    updates['extra_data'] = JsonbConcat(
+                        updates.get('extra_data', F('extra_data')),
+                        JsonbBuildObject(Value(new_column.column_name), value)
+                    )
                 else:
+                    new_field = StateClass._meta.get_field(new_column.column_name)
                     if self.is_extra_data:
-                        for datum in orig_data:
-                            setattr(datum, new_column.column_name, datum.extra_data.get(self.column_name, None))
-                            datum.extra_data.pop(self.column_name, None)
-                            datum.save()
+                        value = JsonbGetKeyText(F('extra_data'), Value(self.column_name))
                     else:
-                        for datum in orig_data:
-                            setattr(datum, new_column.column_name, getattr(datum, self.column_name))
-                            setattr(datum, self.column_name, None)
-                            datum.save()
+                        old_field = StateClass._meta.get_field(self.column_name)
+                        if isinstance(old_field, QuantityField) and isinstance(new_field, QuantityField):
+                            # raises a DimensionalityError if the units can't be converted
+                            value = value * ureg.Quantity(1, old_field.base_units).to(new_field.base_units).magnitude
+                    if not isinstance(new_field, (models.CharField, models.TextField)):
+                        value = Cast(value, output_field=new_field)
+                    updates[new_column.column_name] = value
+
+                # the updated datetime is set explicitly since update() doesn't call save()
+                orig_data.update(updated=Now(), **updates)
+
+                state_ids = list(orig_data.order_by('id').values_list('id', flat=True))
+                if progress_key is not None:
+                    progress_data = ProgressData.from_key(progress_key)
+                    progress_data.total = len(range(0, len(state_ids), 1000)) + 1
+                    progress_data.save()
+                    progress_data.step('Moving data to the new column')
+
+                # update() skips save(), so recalculate the normalized addresses and hashes
+                for batch_ids in chunk_iterable(state_ids, 1000):
+                    states = list(StateClass.objects.filter(id__in=batch_ids))
+                    for state in states:
+                        state.set_normalized_address_and_hash()
+                        state.updated = Now()
+                    StateClass.objects.bulk_update(states, ['normalized_address', 'hash_object', 'updated'])
+
+                    if progress_key is not None:
+                        progress_data.step('Updating the hashes of the records')
         except (ValidationError, DataError):
             return [False, "The column data aren't formatted properly for the new column due to type constraints (e.g., Datatime, Quantities, etc.)."]
         except DimensionalityError:
@@ -1272,25 +1387,19 @@ class Column(models.Model):
         return columns
 
     @staticmethod
-    def retrieve_all(org_id, inventory_type=None, only_used=False):
+    def _serialize_all(org_id):
         """
-        Retrieve all the columns for an organization. This method will query for all the columns in the
-        database assigned to the organization. It will then go through and cleanup the names to ensure that
-        there are no duplicates. The name column is used for uniquely labeling the columns for UI Grid purposes.
+        Query and serialize all the columns of an organization that are assigned to a table_name,
+        ordered with extra_data last so that extra data duplicate-checking will happen after
+        processing standard columns.
 
         :param org_id: Organization ID
-        :param inventory_type: Inventory Type (property|taxlot) from the requester. This sets the related columns if requested.
-        :param only_used: View only the used columns that exist in the Column's table
-
-        :return: dict
+        :return: list of dict
         """
         from seed.serializers.columns import ColumnSerializer
 
-        # Grab all the columns out of the database for the organization that are assigned to a
-        # table_name. Order extra_data last so that extra data duplicate-checking will happen after
-        # processing standard columns
         columns_db = Column.objects.filter(organization_id=org_id).exclude(table_name='').exclude(
-            table_name=None).order_by('is_extra_data', 'column_name')
+            table_name=None).order_by('is_extra_data', 'column_name').select_related('unit')
         columns = []
         for c in columns_db:
             if c.column_name in Column.EXCLUDED_COLUMN_RETURN_FIELDS:
@@ -1310,6 +1419,110 @@ class Column(models.Model):
             if not new_c['display_name']:
                 new_c['display_name'] = new_c['column_name']
 
+            columns.append(dict(new_c))
+
+        # validate that the field 'name' is unique.
+        uniq = set()
+        for c in columns:
+            if (c['table_name'], c['column_name']) in uniq:
+                raise Exception("Duplicate name '{}' found in columns".format(c['name']))
+            else:
+                uniq.add((c['table_name'], c['column_name']))
+
+        return columns
+
+    @staticmethod
+    def retrieve_columns_version(org_id):
+        """
+        Return the current version of the columns of an organization. The version changes
+        whenever the columns or the column mappings of the organization change, so it can be used
+        to invalidate anything derived from them.
+
+        :param org_id: Organization ID
+        :return: str, or None if the shared cache is not available
+        """
+        # the organization is sometimes given as an instance or as a query param string
+        org_id = int(getattr(org_id, 'pk', org_id))
+
+        version_key = _columns_cache_version_key(org_id)
+        version = get_cache_raw(version_key)
+        if version is None:
+            # another process may be setting the first version at the same time
+            add_cache_raw(version_key, uuid4().hex, COLUMNS_CACHE_TIMEOUT)
+            version = get_cache_raw(version_key)
+
+        return version
+
+    @staticmethod
+    def _retrieve_serialized(org_id):
+        """
+        Return the serialized columns of an organization (see _serialize_all). These are cached
+        per version, in this process and in the shared cache, until the columns or the column
+        mappings of the organization change. The returned columns must not be modified.
+
+        :param org_id: Organization ID
+        :return: list of dict
+        """
+        org_id = int(getattr(org_id, 'pk', org_id))
+        version = Column.retrieve_columns_version(org_id)
+        if version is None:
+            return Column._serialize_all(org_id)
+
+        def build():
+            columns = get_cache_raw(_columns_cache_key(org_id, version))
+            if columns is None:
+                columns = Column._serialize_all(org_id)
+                set_cache_raw(_columns_cache_key(org_id, version), columns, COLUMNS_CACHE_TIMEOUT)
+            return columns
+
+        return _columns_cache.get_or_build(org_id, version, build)
+
+    @staticmethod
+    def retrieve_match_index(org_id):
+        """
+        Return the index of the columns of an organization to suggest mappings against (see
+        retrieve_all_by_tuple and matchers.MatchIndex). The index is kept by this process, along
+        with the matches it has already found, until the columns of the organization change.
+
+        :param org_id: Organization ID
+        :return: MatchIndex
+        """
+        org_id = int(getattr(org_id, 'pk', org_id))
+        version = Column.retrieve_columns_version(org_id)
+        return _match_index_cache.get_or_build(
+            org_id, version, lambda: MatchIndex(Column.retrieve_all_by_tuple(org_id))
+        )
+
+    @staticmethod
+    def retrieve_all(org_id, inventory_type=None, only_used=False):
+        """
+        Retrieve all the columns for an organization. This method will query for all the columns in the
+        database assigned to the organization. It will then go through and cleanup the names to ensure that
+        there are no duplicates. The name column is used for uniquely labeling the columns for UI Grid purposes.
+
+        The serialized columns are cached per organization, see _retrieve_serialized.
+
+        :param org_id: Organization ID
+        :param inventory_type: Inventory Type (property|taxlot) from the requester. This sets the related columns if requested.
+        :param only_used: View only the used columns that exist in the Column's table
+
+        :return: dict
+        """
+        used_column_ids = None
+        if only_used:
+            used_column_ids = set(
+                Column.objects.filter(organization_id=org_id, mapped_mappings__isnull=False)
+                .values_list('id', flat=True)
+            )
+
+        columns = []
+        for c in Column._retrieve_serialized(org_id):
+            # only add the column if it is in a ColumnMapping object
+            if used_column_ids is not None and c['id'] not in used_column_ids:
+                continue
+
+            new_c = dict(c)
+
             # Related fields
             new_c['related'] = False
             if inventory_type:
@@ -1319,23 +1532,7 @@ class Column(models.Model):
                     new_c['display_name'] = new_c['display_name'] + ' (%s)' % INVENTORY_DISPLAY[
                         new_c['table_name']]
 
-            # only add the column if it is in a ColumnMapping object
-            if only_used:
-                if ColumnMapping.objects.filter(column_mapped=c).exists():
-                    columns.append(new_c)
-            else:
-                columns.append(new_c)
-
-        # import json
-        # print(json.dumps(columns, indent=2))
-
-        # validate that the field 'name' is unique.
-        uniq = set()
-        for c in columns:
-            if (c['table_name'], c['column_name']) in uniq:
-                raise Exception("Duplicate name '{}' found in columns".format(c['name']))
-            else:
-                uniq.add((c['table_name'], c['column_name']))
+            columns.append(new_c)
 
         return columns
 
@@ -1364,7 +1561,7 @@ class Column(models.Model):
         :param org_id: organization with the columns
         :return: dict
         """
-        columns = Column.retrieve_all(org_id, 'property', False)
+        columns = Column._retrieve_serialized(org_id)
         # The TaxLot and Property are not used in merging, they are just here to prevent errors
         priorities = {
             'PropertyState': {'extra_data': {}},
@@ -1420,4 +1617,30 @@ def validate_model(sender, **kwargs):
         instance.full_clean()
 
 
+def invalidate_columns_cache_of_column(sender, instance, **kwargs):
+    if instance.organization_id is not None:
+        invalidate_columns_cache(instance.organization_id)
+
+
+def invalidate_columns_cache_of_column_mapping(sender, instance, **kwargs):
+    if instance.super_organization_id is not None:
+        invalidate_columns_cache(instance.super_organization_id)
+
+
+def invalidate_columns_cache_of_mapped_columns(sender, instance, action, **kwargs):
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+
+    if isinstance(instance, ColumnMapping):
+        invalidate_columns_cache_of_column_mapping(sender, instance)
+    else:
+        invalidate_columns_cache_of_column(sender, instance)
+
+
 pre_save.connect(validate_model, sender=Column)
+post_save.connect(invalidate_columns_cache_of_column, sender=Column)
+post_delete.connect(invalidate_columns_cache_of_column, sender=Column)
+post_save.connect(invalidate_columns_cache_of_column_mapping, sender=ColumnMapping)
+post_delete.connect(invalidate_columns_cache_of_column_mapping, sender=ColumnMapping)
+m2m_changed.connect(invalidate_columns_cache_of_mapped_columns, sender=ColumnMapping.column_raw.through)
+m2m_changed.connect(invalidate_columns_cache_of_mapped_columns, sender=ColumnMapping.column_mapped.through)
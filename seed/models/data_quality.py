@@ -4,16 +4,20 @@
 :copyright (c) 2014 - 2020, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
 :author
 """
+import heapq
 import json
 import logging
 import re
 from builtins import str
+from collections import defaultdict
 from datetime import date, datetime
 from random import randint
+from uuid import uuid4
 
 import pytz
 from django.apps import apps
-from django.db import models, IntegrityError
+from django.db import connection, models, transaction, IntegrityError
+from django.db.models.signals import post_delete, post_save
 from django.utils.timezone import get_current_timezone, make_aware, make_naive
 from past.builtins import basestring
 from pint.errors import DimensionalityError
@@ -29,12 +33,44 @@ from seed.models import (
 from seed.models import obj_to_dict
 from seed.serializers.pint import pretty_units
 from seed.utils.cache import (
-    set_cache_raw, get_cache_raw
+    ProcessLRUCache,
+    add_cache_raw,
+    delete_many_cache,
+    get_cache_raw,
+    get_many_cache_raw,
+    increment_cache_raw,
+    set_cache_raw,
 )
 from seed.utils.time import convert_datestr
 
 _log = logging.getLogger(__name__)
 
+# Seconds the version of the rules of a DataQualityCheck is kept in the shared cache
+RULES_VERSION_TIMEOUT = 60 * 60 * 24
+
+# The enabled rules of the DataQualityChecks are kept by the worker processes between the
+# check_data_chunk tasks, until the rules change
+_rules_cache = ProcessLRUCache()
+
+
+def _rules_version_key(dq_id):
+    return 'data_quality_rules_version__{}'.format(dq_id)
+
+
+def invalidate_rules_cache(dq_id):
+    """
+    Invalidate the cached rules of the DataQualityCheck in every process by giving them a new
+    version, again once the current transaction is committed if any.
+
+    :param dq_id: int, DataQualityCheck ID
+    """
+    def set_new_version():
+        set_cache_raw(_rules_version_key(dq_id), uuid4().hex, RULES_VERSION_TIMEOUT)
+
+    set_new_version()
+    if connection.in_atomic_block:
+        transaction.on_commit(set_new_version)
+
 
 class ComparisonError(Exception):
     pass
@@ -540,6 +576,9 @@ class DataQualityCheck(models.Model):
         'TaxLotState': ['address_line_1', 'custom_id_1', 'jurisdiction_tax_lot_id'],
     }
 
+    # seconds the results are kept in the cache
+    RESULTS_TIMEOUT = 86400  # 24 hours
+
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
     name = models.CharField(max_length=255, default='Default Data Quality Check')
 
@@ -592,8 +631,9 @@ class DataQualityCheck(models.Model):
         Initialize the cache for storing the results. This is called before the
         celery tasks are chunked up.
 
-        The cache_key is different than the indentifier. The cache_key is where all the results are
-        to be stored for the data quality checks, the identifier, is the random number (or specified
+        The cache_key is different than the indentifier. The cache_key is where the number of
+        chunks of results stored for the data quality checks is kept (each chunk is then stored
+        under its own key, see save_to_cache), the identifier, is the random number (or specified
         value that is used to identifier both the progress and the data storage
 
         :param identifier: Identifier for cache, if None, then creates a random one
@@ -602,23 +642,65 @@ class DataQualityCheck(models.Model):
         if identifier is None:
             identifier = randint(100, 100000)
         cache_key = DataQualityCheck.cache_key(identifier)
-        set_cache_raw(cache_key, [])
+
+        # remove the results of a previous run
+        chunk_count = get_cache_raw(cache_key)
+        if isinstance(chunk_count, int):
+            delete_many_cache([
+                DataQualityCheck.chunk_cache_key(identifier, chunk) for chunk in range(1, chunk_count + 1)
+            ])
+        set_cache_raw(cache_key, 0, DataQualityCheck.RESULTS_TIMEOUT)
         return cache_key, identifier
 
     @staticmethod
     def cache_key(identifier):
         """
-        Static method to return the location of the data_quality results from redis.
+        Static method to return the location of the number of chunks of data_quality results
+        from redis.
 
         :param identifier: Import file primary key
         :return:
         """
         return "data_quality_results__%s" % identifier
 
+    @staticmethod
+    def chunk_cache_key(identifier, chunk):
+        """
+        Static method to return the location of a chunk of data_quality results from redis.
+
+        :param identifier: Import file primary key
+        :param chunk: int, number of the chunk, starting at 1
+        :return:
+        """
+        return "data_quality_results__%s__%s" % (identifier, chunk)
+
+    @staticmethod
+    def get_results(identifier):
+        """
+        Read all the chunks of results saved for the identifier, merged into one list sorted by
+        the ids of the rows.
+
+        :param identifier: Import file primary key
+        :return: list of dicts, or None if no results were initialized (or they expired)
+        """
+        chunk_count = get_cache_raw(DataQualityCheck.cache_key(identifier))
+        if not isinstance(chunk_count, int):
+            return None
+
+        keys = [DataQualityCheck.chunk_cache_key(identifier, chunk) for chunk in range(1, chunk_count + 1)]
+        chunks = get_many_cache_raw(keys)
+
+        # each chunk is already sorted
+        return list(heapq.merge(*[chunks[key] for key in keys if key in chunks], key=lambda k: k['id']))
+
     def check_data(self, record_type, rows):
         """
         Send in data as a queryset from the Property/Taxlot ids.
 
+        The rows are checked as a whole: the linked views and their labels are read once for all
+        the rows, each rule is evaluated across all the rows, and the status labels are then added
+        and removed in bulk.
+
         :param record_type: one of PropertyState | TaxLotState
         :param rows: rows of data to be checked for data quality
         :return: None
@@ -629,11 +711,11 @@ class DataQualityCheck(models.Model):
             self.column_lookup[(c['table_name'], c['column_name'])] = c['display_name']
 
         # grab all the rules once, save query time
-        rules = self.rules.filter(enabled=True, table_name=record_type).order_by('field',
-                                                                                 'severity')
+        rules = self.retrieve_enabled_rules(record_type)
 
         # Get the list of the field names that will show in every result
         fields = self.get_fieldnames(record_type)
+        rows = list(rows)
         for row in rows:
             # Initialize the ID if it does not exist yet. Add in the other
             # fields that are of interest to the GUI
@@ -643,14 +725,36 @@ class DataQualityCheck(models.Model):
                     self.results[row.id][field] = getattr(row, field)
                 self.results[row.id]['data_quality_results'] = []
 
-            # Run the checks
-            self._check(rules, row)
+        # Run the checks
+        self._check(record_type, rules, rows)
 
         # Prune the results will remove any entries that have zero data_quality_results
         for k, v in self.results.copy().items():
             if not v['data_quality_results']:
                 del self.results[k]
 
+    def retrieve_enabled_rules(self, record_type):
+        """
+        Return the enabled rules of the record type with their status label. These are kept in
+        this process until the rules of the DataQualityCheck change. The returned rules must not
+        be modified.
+
+        :param record_type: one of PropertyState | TaxLotState
+        :return: list of Rule
+        """
+        def build():
+            return list(self.rules.filter(enabled=True, table_name=record_type).select_related(
+                'status_label').order_by('field', 'severity'))
+
+        version_key = _rules_version_key(self.id)
+        version = get_cache_raw(version_key)
+        if version is None:
+            # another process may be setting the first version at the same time
+            add_cache_raw(version_key, uuid4().hex, RULES_VERSION_TIMEOUT)
+            version = get_cache_raw(version_key)
+
+        return _rules_cache.get_or_build((self.id, record_type), version, build)
+
     def get_fieldnames(self, record_type):
         """Get fieldnames to apply to results."""
         field_names = ['id']
@@ -660,130 +764,207 @@ class DataQualityCheck(models.Model):
     def reset_results(self):
         self.results = {}
 
-    def _check(self, rules, row):
+    @staticmethod
+    def _linked_views(record_type, rows):
         """
-        Check for errors in the min/max of the values.
+        Look up the views of the rows, with the parent organization of their property/taxlot and
+        their labels.
 
+        :param record_type: one of PropertyState | TaxLotState
+        :param rows: list, PropertyStates or TaxLotStates
+        :return: tuple, ({state_id: view_id}, {view_id: parent organization id}, {view_id: set of label ids})
+        """
+        if record_type == 'PropertyState':
+            view_class, label_class, obj, view_field = PropertyView, apps.get_model(
+                'seed', 'PropertyView_labels'), 'property', 'propertyview_id'
+        else:
+            view_class, label_class, obj, view_field = TaxLotView, apps.get_model(
+                'seed', 'TaxLotView_labels'), 'taxlot', 'taxlotview_id'
+
+        state_views = {}
+        parent_org_ids = {}
+        for state_id, view_id, org_id, parent_org_id in view_class.objects.filter(
+                state_id__in=[row.id for row in rows]).values_list(
+                'state_id', 'id', obj + '__organization_id', obj + '__organization__parent_org_id'):
+            state_views[state_id] = view_id
+            # see Organization.get_parent
+            parent_org_ids[view_id] = parent_org_id or org_id
+
+        view_labels = defaultdict(set)
+        for view_id, label_id in label_class.objects.filter(
+                **{view_field + '__in': list(state_views.values())}).values_list(view_field, 'statuslabel_id'):
+            view_labels[view_id].add(label_id)
+
+        return state_views, parent_org_ids, view_labels
+
+    def _check(self, record_type, rules, rows):
+        """
+        Check for errors in the min/max of the values. Each rule is evaluated for all the rows
+        before moving to the next rule, the status labels to add or remove are collected along the
+        way and applied at the end.
+
+        :param record_type: one of PropertyState | TaxLotState
         :param rules: list, rules to run from database objects
-        :param row: PropertyState or TaxLotState, row of data to check
+        :param rows: list, PropertyStates or TaxLotStates, rows of data to check
         :return: None
         """
-        # check if the row has any rules applied to it
-        model_labels = {'linked_id': None, 'label_ids': []}
-        if row.__class__.__name__ == 'PropertyState':
-            label = apps.get_model('seed', 'PropertyView_labels')
-            if PropertyView.objects.filter(state=row).exists():
-                model_labels['linked_id'] = PropertyView.objects.get(state=row).id
-                model_labels['label_ids'] = list(
-                    label.objects.filter(propertyview_id=model_labels['linked_id']).values_list(
-                        'statuslabel_id', flat=True)
-                )
-                # _log.debug("Property {} has {} labels".format(model_labels['linked_id'],
-                #                                               len(model_labels['label_ids'])))
-        elif row.__class__.__name__ == 'TaxLotState':
-            label = apps.get_model('seed', 'TaxLotView_labels')
-            if TaxLotView.objects.filter(state=row).exists():
-                model_labels['linked_id'] = TaxLotView.objects.get(state=row).id
-                model_labels['label_ids'] = list(
-                    label.objects.filter(taxlotview_id=model_labels['linked_id']).values_list(
-                        'statuslabel_id', flat=True)
-                )
-                # _log.debug("TaxLot {} has {} labels".format(model_labels['linked_id'],
-                #                                             len(model_labels['label_ids'])))
+        if not rows:
+            return
+
+        state_views, parent_org_ids, view_labels = self._linked_views(record_type, rows)
+
+        # {(view_id, label_id): True to add the label, False to remove it}, the last rule wins
+        label_actions = {}
 
         for rule in rules:
-            value = None
+            # get the display name of the rule
+            display_name = self.column_lookup.get((rule.table_name, rule.field), rule.field)
+            in_column_lookup = (rule.table_name, rule.field) in self.column_lookup
+            is_extra_data = not hasattr(rows[0], rule.field)
+
+            for row in rows:
+                label_applied = False
+                linked_id = state_views.get(row.id)
+
+                if not is_extra_data:
+                    value = getattr(row, rule.field)
+                    # TODO cleanup after the cleaner is better able to handle fields with units on import
+                    # If the rule doesn't specify units only consider the value for the purposes of numerical comparison
+                    if isinstance(value, ureg.Quantity) and rule.units == '':
+                        value = value.magnitude
+                else:  # rule is for extra_data
+                    value = row.extra_data.get(rule.field, None)
+
+                    if ' (Invalid Footprint)' in rule.field and value is not None:
+                        self.add_invalid_geometry_entry_provided(row.id, rule, display_name, value)
+                        continue
+
+                    try:
+                        value = rule.str_to_data_type(value)
+                    except DataQualityTypeCastError:
+                        self.add_result_type_error(row.id, rule, display_name, value)
+                        continue
+
+                if not in_column_lookup:
+                    # If the rule is not in the column lookup, then it may have been a required
+                    # field that wasn't mapped
+                    if rule.condition == Rule.RULE_REQUIRED:
+                        self.add_result_missing_req(row.id, rule, display_name, value)
+                        label_applied = self._apply_status_label(rule, linked_id, row.id, parent_org_ids,
+                                                                 label_actions)
+                elif value is None or value == '':
+                    if rule.condition == Rule.RULE_REQUIRED:
+                        self.add_result_missing_and_none(row.id, rule, display_name, value)
+                        label_applied = self._apply_status_label(rule, linked_id, row.id, parent_org_ids,
+                                                                 label_actions)
+                    elif rule.condition == Rule.RULE_NOT_NULL:
+                        self.add_result_is_null(row.id, rule, display_name, value)
+                        label_applied = self._apply_status_label(rule, linked_id, row.id, parent_org_ids,
+                                                                 label_actions)
+                elif rule.condition == Rule.RULE_INCLUDE or rule.condition == Rule.RULE_EXCLUDE:
+                    if not rule.valid_text(value):
+                        self.add_result_string_error(row.id, rule, display_name, value)
+                        label_applied = self._apply_status_label(rule, linked_id, row.id, parent_org_ids,
+                                                                 label_actions)
+                elif rule.condition == Rule.RULE_RANGE:
+                    try:
+                        if not rule.minimum_valid(value):
+                            if rule.severity == Rule.SEVERITY_ERROR or rule.severity == Rule.SEVERITY_WARNING:
+                                s_min, s_max, s_value = rule.format_strings(value)
+                                self.add_result_min_error(row.id, rule, display_name, s_value, s_min)
+                                label_applied = self._apply_status_label(rule, linked_id, row.id, parent_org_ids,
+                                                                         label_actions)
+                    except ComparisonError:
+                        s_min, s_max, s_value = rule.format_strings(value)
+                        self.add_result_comparison_error(row.id, rule, display_name, s_value, s_min)
+                        continue
+                    except DataQualityTypeCastError:
+                        s_min, s_max, s_value = rule.format_strings(value)
+                        self.add_result_type_error(row.id, rule, display_name, s_value)
+                        continue
+                    except UnitMismatchError:
+                        self.add_result_dimension_error(row.id, rule, display_name, value)
+                        continue
+
+                    try:
+                        if not rule.maximum_valid(value):
+                            if rule.severity == Rule.SEVERITY_ERROR or rule.severity == Rule.SEVERITY_WARNING:
+                                s_min, s_max, s_value = rule.format_strings(value)
+                                self.add_result_max_error(row.id, rule, display_name, s_value, s_max)
+                                label_applied = self._apply_status_label(rule, linked_id, row.id, parent_org_ids,
+                                                                         label_actions)
+                    except ComparisonError:
+                        s_min, s_max, s_value = rule.format_strings(value)
+                        self.add_result_comparison_error(row.id, rule, display_name, s_value, s_max)
+                        continue
+                    except DataQualityTypeCastError:
+                        s_min, s_max, s_value = rule.format_strings(value)
+                        self.add_result_type_error(row.id, rule, display_name, s_value)
+                        continue
+                    except UnitMismatchError:
+                        self.add_result_dimension_error(row.id, rule, display_name, value)
+                        continue
+
+                    # Check min and max values for valid data:
+                    if rule.minimum_valid(value) and rule.maximum_valid(value):
+                        if rule.severity == Rule.SEVERITY_VALID:
+                            label_applied = self._apply_status_label(rule, linked_id, row.id, parent_org_ids,
+                                                                     label_actions, False)
+
+                if not label_applied and rule.status_label_id in view_labels.get(linked_id, ()):
+                    label_actions[(linked_id, rule.status_label_id)] = False
+
+        self._save_status_labels(record_type, label_actions, view_labels)
+
+    def _apply_status_label(self, rule, linked_id, row_id, parent_org_ids, label_actions, add_to_results=True):
+        """
+        Collect the status label of the rule to be added to the view, see update_status_label
 
-            label_applied = False
-            display_name = rule.field
+        :return: boolean, if labeled was applied
+        """
+        if rule.status_label_id is not None and linked_id is not None:
+            label_org_id = rule.status_label.super_organization_id
+            if parent_org_ids[linked_id] != label_org_id:
+                raise IntegrityError(
+                    'Label with super_organization_id={} cannot be applied to a record with parent '
+                    'organization_id={}.'.format(
+                        label_org_id,
+                        parent_org_ids[linked_id]
+                    )
+                )
+            label_actions[(linked_id, rule.status_label_id)] = True
 
-            if hasattr(row, rule.field):
-                value = getattr(row, rule.field)
-                # TODO cleanup after the cleaner is better able to handle fields with units on import
-                # If the rule doesn't specify units only consider the value for the purposes of numerical comparison
-                if isinstance(value, ureg.Quantity) and rule.units == '':
-                    value = value.magnitude
-            else:  # rule is for extra_data
-                value = row.extra_data.get(rule.field, None)
+            if add_to_results:
+                self.results[row_id]['data_quality_results'][-1]['label'] = rule.status_label.name
 
-                if ' (Invalid Footprint)' in rule.field and value is not None:
-                    self.add_invalid_geometry_entry_provided(row.id, rule, display_name, value)
-                    continue
+            return True
 
-                try:
-                    value = rule.str_to_data_type(value)
-                except DataQualityTypeCastError:
-                    self.add_result_type_error(row.id, rule, display_name, value)
-                    continue
+    @staticmethod
+    def _save_status_labels(record_type, label_actions, view_labels):
+        """
+        Add and remove the collected status labels in bulk
 
-            # get the display name of the rule
-            if (rule.table_name, rule.field) in self.column_lookup:
-                display_name = self.column_lookup[(rule.table_name, rule.field)]
-
-            # get the status_labels for the linked properties and tax lots
-            linked_id = model_labels['linked_id']
-
-            if (rule.table_name, rule.field) not in self.column_lookup:
-                # If the rule is not in the column lookup, then it may have been a required
-                # field that wasn't mapped
-                if rule.condition == Rule.RULE_REQUIRED:
-                    self.add_result_missing_req(row.id, rule, display_name, value)
-                    label_applied = self.update_status_label(label, rule, linked_id, row.id)
-            elif value is None or value == '':
-                if rule.condition == Rule.RULE_REQUIRED:
-                    self.add_result_missing_and_none(row.id, rule, display_name, value)
-                    label_applied = self.update_status_label(label, rule, linked_id, row.id)
-                elif rule.condition == Rule.RULE_NOT_NULL:
-                    self.add_result_is_null(row.id, rule, display_name, value)
-                    label_applied = self.update_status_label(label, rule, linked_id, row.id)
-            elif rule.condition == Rule.RULE_INCLUDE or rule.condition == Rule.RULE_EXCLUDE:
-                if not rule.valid_text(value):
-                    self.add_result_string_error(row.id, rule, display_name, value)
-                    label_applied = self.update_status_label(label, rule, linked_id, row.id)
-            elif rule.condition == Rule.RULE_RANGE:
-                try:
-                    if not rule.minimum_valid(value):
-                        if rule.severity == Rule.SEVERITY_ERROR or rule.severity == Rule.SEVERITY_WARNING:
-                            s_min, s_max, s_value = rule.format_strings(value)
-                            self.add_result_min_error(row.id, rule, display_name, s_value, s_min)
-                            label_applied = self.update_status_label(label, rule, linked_id, row.id)
-                except ComparisonError:
-                    s_min, s_max, s_value = rule.format_strings(value)
-                    self.add_result_comparison_error(row.id, rule, display_name, s_value, s_min)
-                    continue
-                except DataQualityTypeCastError:
-                    s_min, s_max, s_value = rule.format_strings(value)
-                    self.add_result_type_error(row.id, rule, display_name, s_value)
-                    continue
-                except UnitMismatchError:
-                    self.add_result_dimension_error(row.id, rule, display_name, value)
-                    continue
+        :param record_type: one of PropertyState | TaxLotState
+        :param label_actions: dict, {(view_id, label_id): True to add the label, False to remove it}
+        :param view_labels: dict, {view_id: set of the label ids the view had before the checks}
+        :return: None
+        """
+        if record_type == 'PropertyState':
+            label_class, view_field = apps.get_model('seed', 'PropertyView_labels'), 'propertyview_id'
+        else:
+            label_class, view_field = apps.get_model('seed', 'TaxLotView_labels'), 'taxlotview_id'
 
-                try:
-                    if not rule.maximum_valid(value):
-                        if rule.severity == Rule.SEVERITY_ERROR or rule.severity == Rule.SEVERITY_WARNING:
-                            s_min, s_max, s_value = rule.format_strings(value)
-                            self.add_result_max_error(row.id, rule, display_name, s_value, s_max)
-                            label_applied = self.update_status_label(label, rule, linked_id, row.id)
-                except ComparisonError:
-                    s_min, s_max, s_value = rule.format_strings(value)
-                    self.add_result_comparison_error(row.id, rule, display_name, s_value, s_max)
-                    continue
-                except DataQualityTypeCastError:
-                    s_min, s_max, s_value = rule.format_strings(value)
-                    self.add_result_type_error(row.id, rule, display_name, s_value)
-                    continue
-                except UnitMismatchError:
-                    self.add_result_dimension_error(row.id, rule, display_name, value)
-                    continue
-
-                # Check min and max values for valid data:
-                if rule.minimum_valid(value) and rule.maximum_valid(value):
-                    if rule.severity == Rule.SEVERITY_VALID:
-                        label_applied = self.update_status_label(label, rule, linked_id, row.id, False)
-
-            if not label_applied and rule.status_label_id in model_labels['label_ids']:
-                self.remove_status_label(label, rule, linked_id)
+        new_labels = []
+        removed_labels = defaultdict(list)
+        for (view_id, label_id), add in label_actions.items():
+            if add and label_id not in view_labels.get(view_id, ()):
+                new_labels.append(label_class(**{view_field: view_id, 'statuslabel_id': label_id}))
+            elif not add:
+                removed_labels[label_id].append(view_id)
+
+        label_class.objects.bulk_create(new_labels, ignore_conflicts=True)
+        for label_id, view_ids in removed_labels.items():
+            label_class.objects.filter(**{view_field + '__in': view_ids, 'statuslabel_id': label_id}).delete()
 
     def save_to_cache(self, identifier):
         """
@@ -792,22 +973,23 @@ class DataQualityCheck(models.Model):
         a dict of dict. This is important to remember because the data from the
         cache cannot be simply loaded into the above structure.
 
+        The results of each call are stored as a chunk under their own key and are never
+        read or rewritten by the other calls, so the celery tasks checking the other chunks
+        of rows can save their results at the same time. Use get_results to read them back.
+
         :param identifier: Import file primary key
         :return: None
         """
+        if not self.results:
+            return
 
         # change the format of the data in the cache. Make this a list of
         # objects instead of object of objects.
-        existing_results = get_cache_raw(DataQualityCheck.cache_key(identifier)) or []
+        results = sorted(self.results.values(), key=lambda k: k['id'])
 
-        results = []
-        for key, value in self.results.items():
-            results.append(value)
-
-        existing_results += results
-
-        z = sorted(existing_results, key=lambda k: k['id'])
-        set_cache_raw(DataQualityCheck.cache_key(identifier), z, 86400)  # 24 hours
+        chunk = increment_cache_raw(DataQualityCheck.cache_key(identifier), DataQualityCheck.RESULTS_TIMEOUT)
+        set_cache_raw(DataQualityCheck.chunk_cache_key(identifier, chunk), results,
+                      DataQualityCheck.RESULTS_TIMEOUT)
 
     def initialize_rules(self):
         """
@@ -818,6 +1000,9 @@ class DataQualityCheck(models.Model):
         for rule in Rule.DEFAULT_RULES:
             self.rules.add(Rule.objects.create(**rule))
 
+        # adding the rules does not send any signal
+        invalidate_rules_cache(self.id)
+
     def remove_all_rules(self):
         """
         Removes all the rules associated with this DataQualityCheck instance.
@@ -861,6 +1046,7 @@ class DataQualityCheck(models.Model):
             raise TypeError("Rule data is not defined correctly: {}".format(e))
 
         self.rules.add(r)
+        invalidate_rules_cache(self.id)
 
     def add_rule_if_new(self, rule):
         """
@@ -1114,3 +1300,22 @@ class DataQualityCheck(models.Model):
     def __str__(self):
         return 'DataQuality ({}:{}) - Rule Count: {}'.format(self.pk, self.name,
                                                              self.rules.count())
+
+
+def invalidate_rules_cache_of_rule(sender, instance, **kwargs):
+    if instance.data_quality_check_id is not None:
+        invalidate_rules_cache(instance.data_quality_check_id)
+
+
+def invalidate_rules_cache_of_status_label(sender, instance, **kwargs):
+    dq_ids = Rule.objects.filter(status_label_id=instance.id).values_list(
+        'data_quality_check_id', flat=True).distinct()
+    for dq_id in dq_ids:
+        if dq_id is not None:
+            invalidate_rules_cache(dq_id)
+
+
+post_save.connect(invalidate_rules_cache_of_rule, sender=Rule)
+post_delete.connect(invalidate_rules_cache_of_rule, sender=Rule)
+post_save.connect(invalidate_rules_cache_of_status_label, sender=StatusLabel)
+post_delete.connect(invalidate_rules_cache_of_status_label, sender=StatusLabel)
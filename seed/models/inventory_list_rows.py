@@ -0,0 +1,131 @@
+# !/usr/bin/env python
+# encoding: utf-8
+"""
+:copyright (c) 2014 - 2020, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+"""
+from django.contrib.postgres.fields import JSONField
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.dateparse import parse_date
+from quantityfield import ureg
+from quantityfield.fields import QuantityField
+
+from seed.models import (
+    PropertyState,
+    TaxLotProperty,
+    TaxLotState,
+)
+
+
+class InventoryListRow(models.Model):
+    """
+    The flattened fields of a -State as returned in the inventory lists, i.e. the result of
+    TaxLotProperty.model_to_dict_with_mapping without a mapping (extra_data and many to many
+    fields excluded). The rows are built the first time a -State is listed and are rebuilt
+    whenever the -State has been saved since, which is checked with the updated datetime of
+    the -State. Bulk updates of -States (QuerySet.update, bulk_update) must therefore also set
+    their updated datetime.
+
+    Quantities are stored as their magnitude in the base units of the field and dates as ISO
+    strings, and are converted back when the rows are read.
+    """
+    # updated datetime of the -State when the row was built
+    updated = models.DateTimeField()
+    data = JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def _state_class(cls):
+        return cls._meta.get_field('state').related_model
+
+    @classmethod
+    def state_to_data(cls, state):
+        """
+        Flatten the -State into a JSON serializable dict
+
+        :param state: PropertyState or TaxLotState
+        :return: dict
+        """
+        fields = [f.name for f in cls._state_class()._meta.concrete_fields if f.name != 'extra_data']
+        data = TaxLotProperty.model_to_dict_with_mapping(state, {}, fields=fields)
+
+        for f in cls._state_class()._meta.concrete_fields:
+            value = data.get(f.name)
+            if value is None:
+                continue
+            if isinstance(f, QuantityField) and isinstance(value, ureg.Quantity):
+                data[f.name] = value.to(f.base_units).magnitude
+            elif isinstance(f, models.DateField) and not isinstance(f, models.DateTimeField):
+                data[f.name] = value.isoformat()
+
+        return data
+
+    @classmethod
+    def data_to_dict(cls, data):
+        """
+        Convert the stored row back to the values model_to_dict_with_mapping would have returned
+
+        :param data: dict, stored row
+        :return: dict
+        """
+        result = dict(data)
+        for f in cls._state_class()._meta.concrete_fields:
+            value = result.get(f.name)
+            if value is None:
+                continue
+            if isinstance(f, QuantityField):
+                result[f.name] = float(value) * ureg(f.base_units)
+            elif isinstance(f, models.DateField) and not isinstance(f, models.DateTimeField):
+                result[f.name] = parse_date(value)
+
+        return result
+
+    @classmethod
+    def get_rows(cls, states):
+        """
+        Return the rows of the given -States, building the missing and outdated ones in bulk.
+
+        This writes to the database even though it is called by the list (GET) requests. Concurrent
+        requests may rebuild the rows of the same -States: each row is keyed by its -State, the
+        rows built by another request in the meantime are kept (ignore_conflicts) and a row built
+        from an older version of a -State is rebuilt the next time it is read.
+
+        :param states: list of PropertyStates or TaxLotStates
+        :return: dict, {state_id: dict of the flattened fields}
+        """
+        states = {state.id: state for state in states}
+        rows = {}
+        outdated_state_ids = []
+        for state_id, updated, data in cls.objects.filter(state_id__in=list(states.keys())).values_list(
+                'state_id', 'updated', 'data'):
+            if updated == states[state_id].updated:
+                rows[state_id] = cls.data_to_dict(data)
+            else:
+                outdated_state_ids.append(state_id)
+
+        new_rows = [
+            cls(state_id=state.id, updated=state.updated, data=cls.state_to_data(state))
+            for state_id, state in states.items()
+            if state_id not in rows
+        ]
+        if new_rows:
+            cls.objects.filter(state_id__in=outdated_state_ids).delete()
+            # another request may have built some of the same rows in the meantime
+            cls.objects.bulk_create(new_rows, ignore_conflicts=True)
+            for row in new_rows:
+                rows[row.state_id] = cls.data_to_dict(row.data)
+
+        return rows
+
+
+class PropertyStateListRow(InventoryListRow):
+    state = models.OneToOneField(PropertyState, on_delete=models.CASCADE, primary_key=True,
+                                 related_name='list_row')
+
+
+class TaxLotStateListRow(InventoryListRow):
+    state = models.OneToOneField(TaxLotState, on_delete=models.CASCADE, primary_key=True,
+                                 related_name='list_row')
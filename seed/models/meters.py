@@ -6,7 +6,10 @@
 from django.db import (
     connection,
     models,
+    transaction,
 )
+from psycopg2.extras import execute_values
+
 from seed.models import Property, Scenario
 
 
@@ -104,22 +107,12 @@ class Meter(models.Model):
         bulk_create is used.
         """
         if overlaps_possible:
-            reading_strings = [
-                f"({self.id}, '{reading.start_time}', '{reading.end_time}', {reading.reading}, '{reading.source_unit}', {reading.conversion_factor})"
-                for reading
-                in source_meter.meter_readings.all()
-            ]
-
-            sql = (
-                "INSERT INTO seed_meterreading(meter_id, start_time, end_time, reading, source_unit, conversion_factor)" +
-                " VALUES " + ", ".join(reading_strings) +
-                " ON CONFLICT (meter_id, start_time, end_time)" +
-                " DO UPDATE SET reading = EXCLUDED.reading, source_unit = EXCLUDED.source_unit, conversion_factor = EXCLUDED.conversion_factor" +
-                " RETURNING reading;"
+            MeterReading.upsert(
+                self.id,
+                source_meter.meter_readings.values(
+                    'start_time', 'end_time', 'reading', 'source_unit', 'conversion_factor'
+                ).iterator()
             )
-
-            with connection.cursor() as cursor:
-                cursor.execute(sql)
         else:
             readings = {
                 MeterReading(
@@ -155,5 +148,66 @@ class MeterReading(models.Model):
     source_unit = models.CharField(max_length=255, null=True, blank=True)
     conversion_factor = models.FloatField()
 
+    # number of readings sent to the database per statement when staging an upsert
+    UPSERT_PAGE_SIZE = 1000
+
     class Meta:
         unique_together = ('meter', 'start_time', 'end_time')
+
+    @classmethod
+    def upsert(cls, meter_id, readings):
+        """
+        Creates or updates MeterReadings of a Meter. The readings are first staged in a
+        temporary table, a page at a time with the values passed as query parameters, and then
+        merged into the MeterReadings with a single upsert. Specifically, meter_id, start_time,
+        and end_time must be unique or an update occurs. Otherwise, a new reading entry is
+        created.
+
+        If the readings contain the same start_time and end_time more than once, the upsert
+        raises a ProgrammingError ('ON CONFLICT DO UPDATE command cannot affect row a second
+        time') and none of the readings are saved.
+
+        :param meter_id: int, ID of the Meter
+        :param readings: iterable of dicts with the start_time, end_time, reading, source_unit
+            and conversion_factor of each reading
+        :return: int, number of readings created or updated
+        """
+        rows = (
+            (
+                meter_id,
+                reading['start_time'],
+                reading['end_time'],
+                reading['reading'],
+                reading['source_unit'],
+                reading['conversion_factor'],
+            )
+            for reading
+            in readings
+        )
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'CREATE TEMPORARY TABLE tmp_meterreading'
+                    ' (LIKE seed_meterreading INCLUDING DEFAULTS) ON COMMIT DROP'
+                )
+                execute_values(
+                    cursor.cursor,
+                    'INSERT INTO tmp_meterreading'
+                    ' (meter_id, start_time, end_time, reading, source_unit, conversion_factor) VALUES %s',
+                    rows,
+                    page_size=cls.UPSERT_PAGE_SIZE
+                )
+                cursor.execute(
+                    'INSERT INTO seed_meterreading'
+                    ' (meter_id, start_time, end_time, reading, source_unit, conversion_factor)'
+                    ' SELECT meter_id, start_time, end_time, reading, source_unit, conversion_factor'
+                    ' FROM tmp_meterreading'
+                    ' ON CONFLICT (meter_id, start_time, end_time)'
+                    ' DO UPDATE SET reading = EXCLUDED.reading, source_unit = EXCLUDED.source_unit,'
+                    ' conversion_factor = EXCLUDED.conversion_factor'
+                )
+                count = cursor.rowcount
+                cursor.execute('DROP TABLE tmp_meterreading')
+
+        return count
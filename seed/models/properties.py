@@ -22,6 +22,7 @@ from django.db import (
 from django.db.models.signals import pre_delete, pre_save, post_save, m2m_changed
 from django.dispatch import receiver
 from django.forms.models import model_to_dict
+from django.utils import timezone
 from past.builtins import basestring
 from quantityfield.fields import QuantityField
 
@@ -338,6 +339,53 @@ class PropertyState(models.Model):
 
             return None
 
+    @classmethod
+    def promote_many(cls, states, cycle):
+        """
+        Promote many PropertyStates to the view table for the given cycle. This is the bulk
+        version of promote and creates the Properties and PropertyViews with one statement each.
+
+        Args:
+            states: list of PropertyStates
+            cycle: Cycle to assign the views
+
+        Returns:
+            The resulting PropertyViews, in the same order as the states
+
+        """
+        states = list(states)
+        views = {
+            pv.state_id: pv
+            for pv in PropertyView.objects.filter(cycle=cycle, state__in=states)
+        }
+        new_states = [state for state in states if state.id not in views]
+
+        if new_states:
+            if any(state.organization_id is None for state in new_states):
+                _log.warn("organization is None")
+
+            properties = Property.objects.bulk_create([
+                Property(organization_id=state.organization_id) for state in new_states
+            ])
+            # bulk_create does not send post_save, so post_save_property_view does not touch the
+            # Properties. They were created just above which already sets their updated datetime.
+            new_views = PropertyView.objects.bulk_create([
+                PropertyView(property=prop, cycle=cycle, state=state)
+                for prop, state in zip(properties, new_states)
+            ])
+            views.update({pv.state_id: pv for pv in new_views})
+
+            # data_state is neither part of the hash_object nor of the normalized_address, so
+            # there is no need to go through save() for each state.
+            cls.objects.filter(pk__in=[state.id for state in new_states]).update(
+                data_state=DATA_STATE_MATCHING,
+                updated=timezone.now()
+            )
+            for state in new_states:
+                state.data_state = DATA_STATE_MATCHING
+
+        return [views[state.id] for state in states]
+
     def __str__(self):
         return 'Property State - %s' % self.pk
 
@@ -381,8 +429,11 @@ class PropertyState(models.Model):
 
         return d
 
-    def save(self, *args, **kwargs):
-        # Calculate and save the normalized address
+    def set_normalized_address_and_hash(self):
+        """
+        Calculate the normalized address and the hash of the object. This is called on every save
+        and must also be called before the state is written with bulk_create, which skips save().
+        """
         if self.address_line_1 is not None:
             self.normalized_address = normalize_address_str(self.address_line_1)
         else:
@@ -392,6 +443,9 @@ class PropertyState(models.Model):
         from seed.data_importer.tasks import hash_state_object
         self.hash_object = hash_state_object(self)
 
+    def save(self, *args, **kwargs):
+        self.set_normalized_address_and_hash()
+
         return super().save(*args, **kwargs)
 
     def history(self):
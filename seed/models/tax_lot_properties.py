@@ -18,11 +18,6 @@ from django.db.models import Count
 from django.utils.timezone import make_naive
 
 from seed.models.columns import Column
-from seed.utils.geocode import (
-    bounding_box_wkt,
-    long_lat_wkt,
-)
-from seed.utils.ubid import centroid_wkt
 
 logger = logging.getLogger(__name__)
 
@@ -114,6 +109,23 @@ class TaxLotProperty(models.Model):
                 data[f.name] = list(data[f.name])
         return data
 
+    @classmethod
+    def list_row_to_dict_with_mapping(cls, row, mappings, fields):
+        """
+        Same as model_to_dict_with_mapping with extra_data excluded, but reading the fields from
+        the precomputed list row of the -State (see InventoryListRow).
+
+        :param row: dict, list row of the -State
+        :param mappings: dict, mapping names { "from_name": "to_name", ...}
+        :param fields: list, fields to include
+        :return: dict
+        """
+        return {
+            mappings.get(name, name): value
+            for name, value in row.items()
+            if name in fields
+        }
+
     @classmethod
     def get_related(cls, object_list, show_columns, columns_from_database):
         """
@@ -149,11 +161,13 @@ class TaxLotProperty(models.Model):
                 'obj_state_id': 'property_state_id',
                 'obj_view_id': 'property_view_id',
                 'obj_id': 'property_id',
+                'list_row_class': apps.get_model('seed', 'PropertyStateListRow'),
                 'centroid': 'centroid',
                 'bounding_box': 'bounding_box',
                 'long_lat': 'long_lat',
                 'related_audit_log_class': apps.get_model('seed', 'TaxLotAuditLog'),
                 'related_class': 'TaxLotView',
+                'related_list_row_class': apps.get_model('seed', 'TaxLotStateListRow'),
                 'related_query_in': 'taxlot_view_id__in',
                 'select_related': 'taxlot',
                 'related_view': 'taxlot_view',
@@ -170,11 +184,13 @@ class TaxLotProperty(models.Model):
                 'obj_state_id': 'taxlot_state_id',
                 'obj_view_id': 'taxlot_view_id',
                 'obj_id': 'taxlot_id',
+                'list_row_class': apps.get_model('seed', 'TaxLotStateListRow'),
                 'centroid': 'centroid',
                 'bounding_box': 'bounding_box',
                 'long_lat': 'long_lat',
                 'related_audit_log_class': apps.get_model('seed', 'PropertyAuditLog'),
                 'related_class': 'PropertyView',
+                'related_list_row_class': apps.get_model('seed', 'PropertyStateListRow'),
                 'related_query_in': 'property_view_id__in',
                 'select_related': 'property',
                 'related_view': 'property_view',
@@ -191,8 +207,11 @@ class TaxLotProperty(models.Model):
         related_ids = [getattr(j, lookups['related_view_id']) for j in joins]
 
         # Get all related views from the related_class
-        related_views = apps.get_model('seed', lookups['related_class']).objects.select_related(
-            lookups['select_related'], 'state', 'cycle').filter(pk__in=related_ids)
+        related_views = list(apps.get_model('seed', lookups['related_class']).objects.select_related(
+            lookups['select_related'], 'state', 'cycle').filter(pk__in=related_ids))
+
+        # The flattened fields of the related -States
+        related_rows = lookups['related_list_row_class'].get_rows([view.state for view in related_views])
 
         # bunch of work to get only the column names that are requested in the show_columns field
         related_columns = []
@@ -218,20 +237,20 @@ class TaxLotProperty(models.Model):
                                               and col['id'] in show_columns])
 
         for related_view in related_views:
-            related_dict = TaxLotProperty.model_to_dict_with_mapping(
-                related_view.state,
+            related_row = related_rows[related_view.state_id]
+            related_dict = TaxLotProperty.list_row_to_dict_with_mapping(
+                related_row,
                 related_column_name_mapping,
-                fields=filtered_fields,
-                exclude=['extra_data']
+                fields=filtered_fields
             )
 
             related_dict[lookups['related_state_id']] = related_view.state.id
 
-            # Add GIS stuff to the related dict
+            # Add GIS stuff to the related dict, these are already converted to WKT in the list row
             # (I guess these are special fields not in columns and not directly JSON serializable...)
-            related_dict[lookups['bounding_box']] = bounding_box_wkt(related_view.state)
-            related_dict[lookups['long_lat']] = long_lat_wkt(related_view.state)
-            related_dict[lookups['centroid']] = centroid_wkt(related_view.state)
+            related_dict[lookups['bounding_box']] = related_row.get('bounding_box')
+            related_dict[lookups['long_lat']] = related_row.get('long_lat')
+            related_dict[lookups['centroid']] = related_row.get('centroid')
 
             # custom handling for when it is TaxLotView
             if lookups['obj_class'] == 'TaxLotView':
@@ -269,9 +288,13 @@ class TaxLotProperty(models.Model):
 
         # Not sure what this code is really doing, but it only exists for TaxLotViews
         if lookups['obj_class'] == 'TaxLotView':
-            # Get whole taxlotstate table:
+            # Get the jurisdiction tax lot ids of all the taxlots paired with the related properties.
+            # This is only done once per call (i.e. once per page of results) and is limited to the
+            # related properties so that it does not depend on the size of the whole table.
             tuple_prop_to_jurisdiction_tl = tuple(
-                TaxLotProperty.objects.values_list('property_view_id', 'taxlot_view__state__jurisdiction_tax_lot_id')
+                TaxLotProperty.objects.filter(property_view_id__in=related_ids).values_list(
+                    'property_view_id', 'taxlot_view__state__jurisdiction_tax_lot_id'
+                )
             )
 
             # create a mapping that defaults to an empty list
@@ -348,13 +371,16 @@ class TaxLotProperty(models.Model):
             state_id__in=models.Subquery(states_qs.values('state_id'))
         ).values_list('state_id', flat=True)
 
+        # The flattened fields of the -States
+        obj_rows = lookups['list_row_class'].get_rows([obj.state for obj in object_list])
+
         for obj in object_list:
             # Each object in the response is built from the state data, with related data added on.
-            obj_dict = TaxLotProperty.model_to_dict_with_mapping(
-                obj.state,
+            obj_row = obj_rows[obj.state_id]
+            obj_dict = TaxLotProperty.list_row_to_dict_with_mapping(
+                obj_row,
                 obj_column_name_mapping,
-                fields=filtered_fields,
-                exclude=['extra_data']
+                fields=filtered_fields
             )
 
             # Only add extra data columns if a settings profile was used
@@ -377,9 +403,9 @@ class TaxLotProperty(models.Model):
             obj_dict['merged_indicator'] = obj.state_id in merged_state_ids
 
             # bring in GIS data
-            obj_dict[lookups['bounding_box']] = bounding_box_wkt(obj.state)
-            obj_dict[lookups['long_lat']] = long_lat_wkt(obj.state)
-            obj_dict[lookups['centroid']] = centroid_wkt(obj.state)
+            obj_dict[lookups['bounding_box']] = obj_row.get('bounding_box')
+            obj_dict[lookups['long_lat']] = obj_row.get('long_lat')
+            obj_dict[lookups['centroid']] = obj_row.get('centroid')
 
             # store the property / taxlot data to the object dictionary as well. This is hacky.
             if lookups['obj_class'] == 'PropertyView':
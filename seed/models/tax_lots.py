@@ -16,6 +16,7 @@ from django.contrib.postgres.fields import JSONField
 from django.db import models
 from django.db.models.signals import post_save, pre_save, m2m_changed
 from django.dispatch import receiver
+from django.utils import timezone
 
 from seed.data_importer.models import ImportFile
 from seed.lib.superperms.orgs.models import Organization
@@ -158,6 +159,53 @@ class TaxLotState(models.Model):
 
             return None
 
+    @classmethod
+    def promote_many(cls, states, cycle):
+        """
+        Promote many TaxLotStates to the view table for the given cycle. This is the bulk
+        version of promote and creates the TaxLots and TaxLotViews with one statement each.
+
+        Args:
+            states: list of TaxLotStates
+            cycle: Cycle to assign the views
+
+        Returns:
+            The resulting TaxLotViews, in the same order as the states
+
+        """
+        states = list(states)
+        views = {
+            tlv.state_id: tlv
+            for tlv in TaxLotView.objects.filter(cycle=cycle, state__in=states)
+        }
+        new_states = [state for state in states if state.id not in views]
+
+        if new_states:
+            if any(state.organization_id is None for state in new_states):
+                _log.error("organization is None")
+
+            taxlots = TaxLot.objects.bulk_create([
+                TaxLot(organization_id=state.organization_id) for state in new_states
+            ])
+            # bulk_create does not send post_save, so post_save_taxlot_view does not touch the
+            # TaxLots. They were created just above which already sets their updated datetime.
+            new_views = TaxLotView.objects.bulk_create([
+                TaxLotView(taxlot=taxlot, cycle=cycle, state=state)
+                for taxlot, state in zip(taxlots, new_states)
+            ])
+            views.update({tlv.state_id: tlv for tlv in new_views})
+
+            # data_state is neither part of the hash_object nor of the normalized_address, so
+            # there is no need to go through save() for each state.
+            cls.objects.filter(pk__in=[state.id for state in new_states]).update(
+                data_state=DATA_STATE_MATCHING,
+                updated=timezone.now()
+            )
+            for state in new_states:
+                state.data_state = DATA_STATE_MATCHING
+
+        return [views[state.id] for state in states]
+
     def to_dict(self, fields=None, include_related_data=True):
         """
         Returns a dict version of the TaxLotState, either with all fields
@@ -186,8 +234,11 @@ class TaxLotState(models.Model):
 
         return d
 
-    def save(self, *args, **kwargs):
-        # Calculate and save the normalized address
+    def set_normalized_address_and_hash(self):
+        """
+        Calculate the normalized address and the hash of the object. This is called on every save
+        and must also be called before the state is written with bulk_create, which skips save().
+        """
         if self.address_line_1 is not None:
             self.normalized_address = normalize_address_str(self.address_line_1)
         else:
@@ -196,6 +247,9 @@ class TaxLotState(models.Model):
         # save a hash of the object to the database for quick lookup
         from seed.data_importer.tasks import hash_state_object
         self.hash_object = hash_state_object(self)
+
+    def save(self, *args, **kwargs):
+        self.set_normalized_address_and_hash()
         return super().save(*args, **kwargs)
 
     def history(self):
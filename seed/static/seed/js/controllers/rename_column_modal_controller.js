@@ -12,6 +12,7 @@ angular.module('BE.seed.controller.rename_column_modal', [])
     'column_name',
     'columns_service',
     'spinner_utility',
+    'uploader_service',
     'org_id',
     function (
       $scope,
@@ -22,6 +23,7 @@ angular.module('BE.seed.controller.rename_column_modal', [])
       column_name,
       columns_service,
       spinner_utility,
+      uploader_service,
       org_id
     ) {
       $scope.step = {
@@ -52,12 +54,33 @@ angular.module('BE.seed.controller.rename_column_modal', [])
         spinner_utility.show();
         columns_service.rename_column_for_org(org_id, $scope.column.id, $scope.column.name, $scope.settings.overwrite_preference)
           .then(function (response) {
-            $scope.results = {
-              success: response.data.success,
-              message: response.data.message
+            var show_results = function (results) {
+              $scope.results = results;
+              $scope.step.number = 2;
+              spinner_utility.hide();
             };
-            $scope.step.number = 2;
-            spinner_utility.hide();
+
+            if (!response.data.success) {
+              show_results({
+                success: false,
+                message: response.data.message
+              });
+              return;
+            }
+
+            // the data are moved in the background
+            $scope.progress = {};
+            uploader_service.check_progress_loop(response.data.progress_key, 0, 1, function (data) {
+              show_results({
+                success: data.status === 'success',
+                message: data.message
+              });
+            }, function () {
+              show_results({
+                success: false,
+                message: 'Unsuccessful: unable to check the progress of the rename'
+              });
+            }, $scope.progress);
           });
       };
 
@@ -7,6 +7,7 @@
 from __future__ import absolute_import
 
 import sys
+import traceback
 
 from celery import chord, chain
 from celery import shared_task
@@ -24,6 +25,7 @@ from seed.lib.mcm.utils import batch
 from seed.lib.progress_data.progress_data import ProgressData
 from seed.lib.superperms.orgs.models import Organization, OrganizationUser
 from seed.models import (
+    Column,
     Property, PropertyState,
     TaxLot, TaxLotState
 )
@@ -104,6 +106,35 @@ def invite_to_organization(domain, new_user, requested_by, new_org):
         pass
 
 
+def rename_column(column_pk, new_column_name, overwrite):
+    """Rename the column and move its data to the new column in the background"""
+    progress_data = ProgressData(func_name='rename_column', unique_id=column_pk)
+    # the column is kept, so remove the progress of a previous rename of the same column
+    progress_data.delete()
+
+    _rename_column.delay(column_pk, new_column_name, overwrite, progress_data.key)
+
+    return progress_data.result()
+
+
+@shared_task
+def _rename_column(column_pk, new_column_name, overwrite, prog_key):
+    try:
+        column = Column.objects.get(pk=column_pk)
+        result = column.rename_column(new_column_name, overwrite, prog_key)
+    except Exception as e:
+        # always finish the progress, otherwise the rename modal keeps waiting for it
+        logger.exception('Failed to rename column {}'.format(column_pk))
+        return ProgressData.from_key(prog_key).finish_with_error(
+            'Unhandled Error: ' + str(e), traceback.format_exc()
+        )
+
+    progress_data = ProgressData.from_key(prog_key)
+    if not result[0]:
+        return progress_data.finish_with_error(result[1])
+    return progress_data.finish_with_success(result[1])
+
+
 def delete_organization(org_pk):
     """delete_organization_buildings"""
     progress_data = ProgressData(func_name='delete_organization', unique_id=org_pk)
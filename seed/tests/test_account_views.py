@@ -462,6 +462,27 @@ class AccountsViewTests(TestCase):
         # ensure we did not just become owner
         self.assertFalse(self.org.is_owner(self.user))
 
+    def test_update_role_revokes_the_cached_permissions(self):
+        """ Once demoted, an owner can no longer use the permissions of an owner. """
+        u = User.objects.create(username='b@b.com', email='b@be.com')
+        self.org.add_member(u, role=ROLE_OWNER)
+        url = reverse_lazy('api:v3:user-role', args=[self.user.id]) + '?organization_id=' + str(self.org.id)
+
+        resp = self.client.put(
+            url,
+            data=json.dumps({'organization_id': self.org.id, 'role': 'member'}),
+            content_type='application/json',
+        )
+        self.assertEqual(json.loads(resp.content), {'status': 'success'})
+
+        resp = self.client.put(
+            url,
+            data=json.dumps({'organization_id': self.org.id, 'role': 'owner'}),
+            content_type='application/json',
+        )
+        self.assertEqual(resp.status_code, 403)
+        self.assertFalse(self.org.is_owner(self.user))
+
     def test_bad_save_request(self):
         """ A malformed request should return error-containing json. """
         url = reverse_lazy('api:v3:organizations-save-settings', args=[self.org.id])
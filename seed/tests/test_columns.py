@@ -12,6 +12,7 @@ from django.core.exceptions import ValidationError
 from django.test import TestCase
 
 from seed import models as seed_models
+from seed import tasks
 from seed.landing.models import SEEDUser as User
 from seed.lib.superperms.orgs.models import Organization
 from seed.models import (
@@ -21,10 +22,12 @@ from seed.models import (
     ColumnMapping,
 
 )
+from seed.lib.progress_data.progress_data import ProgressData
 from seed.test_helpers.fake import (
     FakePropertyStateFactory,
     FakeTaxLotStateFactory,
 )
+from seed.utils.address import normalize_address_str
 from seed.utils.organizations import create_organization
 from quantityfield import ureg
 
@@ -720,6 +723,44 @@ class TestRenameColumns(TestCase):
 
         self.assertListEqual(results, expected_data)
 
+    def test_rename_column_updates_the_hash_and_progress(self):
+        states = [
+            self.property_state_factory.get_property_state(
+                data_state=DATA_STATE_MATCHING,
+                extra_data={self.extra_data_column.column_name: '123 Main St'}
+            )
+            for i in range(0, 3)
+        ]
+
+        progress_data = ProgressData('rename_column', self.extra_data_column.pk)
+        result = self.extra_data_column.rename_column('address_line_1', force=True, progress_key=progress_data.key)
+        self.assertTrue(result[0])
+
+        for state in states:
+            renamed_state = PropertyState.objects.get(pk=state.pk)
+            self.assertEqual(renamed_state.address_line_1, '123 Main St')
+            self.assertEqual(renamed_state.normalized_address, normalize_address_str('123 Main St'))
+            self.assertNotEqual(renamed_state.hash_object, state.hash_object)
+            self.assertGreater(renamed_state.updated, state.updated)
+
+            # the stored hash is the same as the one calculated when saving
+            renamed_state.save()
+            self.assertEqual(PropertyState.objects.get(pk=state.pk).hash_object, renamed_state.hash_object)
+
+        # one step to move the data and one per batch of states
+        self.assertEqual(2, ProgressData.from_key(progress_data.key).data['total'])
+
+    def test_rename_column_task_reports_unhandled_errors(self):
+        missing_pk = Column.objects.order_by('-pk').first().pk + 1
+
+        # the progress of a previous rename of the column is not returned
+        ProgressData('rename_column', missing_pk).finish_with_success('previous rename')
+
+        result = tasks.rename_column(missing_pk, 'new_col_name', False)
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual(result['progress'], 100)
+        self.assertTrue(result['message'].startswith('Unhandled Error: '))
+
     def test_rename_property_campus_field_unsuccessful(self):
         old_column = Column.objects.filter(column_name='campus').first()
         result = old_column.rename_column("new_col_name", force=True)
@@ -1004,6 +1045,30 @@ class TestColumnsByInventory(TestCase):
             if c['name'] == 'Column A':
                 self.assertEqual(c['sharedFieldType'], 'Public')
 
+    def test_column_retrieve_all_is_cached_until_the_columns_change(self):
+        columns = Column.retrieve_all(self.fake_org.pk, 'property', False)
+        with self.assertNumQueries(0):
+            self.assertEqual(Column.retrieve_all(self.fake_org.pk, 'property', False), columns)
+            Column.retrieve_priorities(self.fake_org.pk)
+
+        new_column = seed_models.Column.objects.create(
+            column_name='new column',
+            table_name='PropertyState',
+            organization=self.fake_org,
+            is_extra_data=True
+        )
+        column_names = [c['column_name'] for c in Column.retrieve_all(self.fake_org.pk, 'property', False)]
+        self.assertIn('new column', column_names)
+
+        new_column.merge_protection = Column.COLUMN_MERGE_FAVOR_EXISTING
+        new_column.save()
+        priorities = Column.retrieve_priorities(self.fake_org.pk)
+        self.assertEqual(priorities['PropertyState']['extra_data']['new column'], 'Favor Existing')
+
+        new_column.delete()
+        column_names = [c['column_name'] for c in Column.retrieve_all(self.fake_org.pk, 'property', False)]
+        self.assertNotIn('new column', column_names)
+
     def test_column_retrieve_all_duplicate_error(self):
         seed_models.Column.objects.create(
             column_name='custom_id_1',
@@ -4,7 +4,9 @@
 :copyright (c) 2014 - 2020, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
 :author
 """
+from django.db import connection
 from django.forms.models import model_to_dict
+from django.test.utils import CaptureQueriesContext
 from quantityfield import ureg
 
 from seed.models import Column, PropertyView
@@ -307,6 +309,69 @@ class DataQualityCheckTests(DataMappingBaseTestCase):
         labels = [r['label'] for r in dq_results]
         self.assertCountEqual(['Check Site EUI', 'Check Year Built'], labels)
 
+    def test_check_data_adds_and_removes_labels_for_all_rows(self):
+        dq = DataQualityCheck.retrieve(self.org.id)
+
+        site_eui_label = StatusLabel.objects.create(name='Check Site EUI', super_organization=self.org)
+        site_eui_rule = dq.rules.get(table_name='PropertyState', field='site_eui', max='1000')
+        site_eui_rule.status_label = site_eui_label
+        site_eui_rule.save()
+
+        states = []
+        views = []
+        for site_eui in [525600, 100, 525600, 100]:
+            ps = self.property_state_factory.get_property_state(
+                None, no_default_data=True, custom_id_1='abcd', address_line_1='742 Evergreen Terrace',
+                pm_property_id='PMID', site_eui=site_eui
+            )
+            states.append(ps)
+            views.append(PropertyView.objects.create(
+                property=self.property_factory.get_property(), cycle=self.cycle, state=ps
+            ))
+
+        # the last view was labeled by a previous check, but is now within range
+        views[3].labels.add(site_eui_label)
+
+        dq.check_data('PropertyState', states)
+
+        self.assertEqual(
+            [view.id for view in PropertyView.objects.filter(labels=site_eui_label).order_by('id')],
+            [views[0].id, views[2].id]
+        )
+        for ps in [states[0], states[2]]:
+            labels = [r.get('label') for r in dq.results[ps.id]['data_quality_results']]
+            self.assertIn('Check Site EUI', labels)
+
+        # the number of queries does not depend on the number of rows
+        with CaptureQueriesContext(connection) as all_rows_queries:
+            dq.check_data('PropertyState', states)
+        with CaptureQueriesContext(connection) as one_row_queries:
+            dq.check_data('PropertyState', states[:1])
+        self.assertEqual(len(all_rows_queries), len(one_row_queries))
+
+    def test_results_are_saved_per_chunk(self):
+        states = [
+            self.property_state_factory.get_property_state(None, no_default_data=True, site_eui=525600)
+            for i in range(4)
+        ]
+
+        _cache_key, identifier = DataQualityCheck.initialize_cache()
+        self.assertEqual(DataQualityCheck.get_results(identifier), [])
+
+        # chunks checked by different tasks, saved out of order
+        for chunk in [states[2:], states[:2]]:
+            dq = DataQualityCheck.retrieve(self.org.id)
+            dq.check_data('PropertyState', chunk)
+            dq.save_to_cache(identifier)
+
+        results = DataQualityCheck.get_results(identifier)
+        self.assertEqual([r['id'] for r in results], [ps.id for ps in states])
+
+        # a new run starts from scratch
+        DataQualityCheck.initialize_cache(identifier)
+        self.assertEqual(DataQualityCheck.get_results(identifier), [])
+        self.assertIsNone(DataQualityCheck.get_results('not_initialized'))
+
     def test_text_match(self):
         dq = DataQualityCheck.retrieve(self.org.id)
         dq.remove_all_rules()
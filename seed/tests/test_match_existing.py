@@ -7,6 +7,8 @@
 
 import json
 
+import mock
+
 from config.settings.common import TIME_ZONE
 
 from datetime import datetime
@@ -20,6 +22,7 @@ from django.utils.timezone import make_aware  # make_aware is used because incon
 from pytz import timezone
 
 from seed.data_importer.tasks import geocode_and_match_buildings_task
+from seed.lib.progress_data.progress_data import ProgressData
 
 from seed.models import (
     ASSESSED_RAW,
@@ -37,10 +40,16 @@ from seed.models import (
     TaxLotView,
     VIEW_LIST_TAXLOT,
 )
+from seed.utils.cache import get_cache_raw, set_cache_raw
 from seed.utils.match import (
+    _whole_org_merge_checkpoint_key,
+    matching_criteria_column_names,
     match_merge_link,
+    match_merge_link_many,
+    start_whole_org_match_merge_link,
     whole_org_match_merge_link,
 )
+from seed.views.v3.organizations import cache_match_merge_link_result
 from seed.test_helpers.fake import (
     FakeColumnListProfileFactory,
     FakeCycleFactory,
@@ -834,6 +843,85 @@ class TestMatchMergeLink(DataMappingBaseTestCase):
             )
             self.assertCountEqual(view_ids, matching_view_ids)
 
+    def test_match_merge_link_many_for_properties(self):
+        """
+        Same set up as test_match_merge_link_for_properties, except all of the
+        -Views are given at once and a -View is unlinked in the same round.
+        """
+        base_property_details = {
+            'pm_property_id': '1st Match Set',
+            'city': '1st Match - Cycle 1 - City 1',
+            'import_file_id': self.import_file_1.id,
+            'data_state': DATA_STATE_MAPPING,
+            'no_default_data': False,
+        }
+        ps_11 = self.property_state_factory.get_property_state(**base_property_details)
+
+        base_property_details['pm_property_id'] = 'To be updated - Cycle 1 - 1st Match Set'
+        base_property_details['city'] = '1st Match - Cycle 1 - City 2'
+        self.property_state_factory.get_property_state(**base_property_details)
+
+        base_property_details['pm_property_id'] = 'Linked then unlinked'
+        base_property_details['city'] = 'Unlinked City - Cycle 1'
+        ps_13 = self.property_state_factory.get_property_state(**base_property_details)
+
+        self.import_file_1.mapping_done = True
+        self.import_file_1.save()
+        geocode_and_match_buildings_task(self.import_file_1.id)
+
+        base_property_details['import_file_id'] = self.import_file_2.id
+        base_property_details['pm_property_id'] = 'To be updated - Cycle 2 - 1st Match Set'
+        base_property_details['city'] = '1st Match - Cycle 2 - City 1'
+        self.property_state_factory.get_property_state(**base_property_details)
+
+        base_property_details['pm_property_id'] = '2nd to be updated - Cycle 2 - 1st Match Set'
+        base_property_details['city'] = '1st Match - Cycle 2 - City 2'
+        ps_22 = self.property_state_factory.get_property_state(**base_property_details)
+
+        base_property_details['pm_property_id'] = 'Linked then unlinked'
+        base_property_details['city'] = 'Unlinked City - Cycle 2'
+        ps_23 = self.property_state_factory.get_property_state(**base_property_details)
+
+        self.import_file_2.mapping_done = True
+        self.import_file_2.save()
+        geocode_and_match_buildings_task(self.import_file_2.id)
+
+        # The 'Linked then unlinked' Sets were linked on import
+        view_13 = PropertyView.objects.get(state_id=ps_13.id)
+        view_23 = PropertyView.objects.get(state_id=ps_23.id)
+        self.assertEqual(view_13.property_id, view_23.property_id)
+
+        # (Unrealistically) Make some match and unlink the others
+        PropertyState.objects.exclude(id__in=[ps_13.id, ps_23.id]).update(pm_property_id='1st Match Set')
+        PropertyState.objects.filter(id=ps_13.id).update(pm_property_id='No longer matches 1')
+        PropertyState.objects.filter(id=ps_23.id).update(pm_property_id='No longer matches 2')
+
+        # Give ps_22 priority in Cycle 2
+        PropertyState.objects.get(id=ps_22.id).save()
+
+        view_11 = PropertyView.objects.get(state_id=ps_11.id)
+        merge_count, link_count, target_view_ids = match_merge_link_many(
+            [view_11.id, view_13.id, view_23.id], 'PropertyState'
+        )
+
+        self.assertEqual(4, merge_count)
+        self.assertEqual(1, link_count)
+        self.assertEqual([view_11.id], list(target_view_ids.keys()))
+
+        # ps_11 took precedence in Cycle 1 and ps_22 in Cycle 2, and both are linked
+        target_view = PropertyView.objects.get(id=target_view_ids[view_11.id])
+        self.assertEqual('1st Match - Cycle 1 - City 1', target_view.state.city)
+        cycle_2_view = PropertyView.objects.get(cycle_id=self.cycle_2.id, state__pm_property_id='1st Match Set')
+        self.assertEqual('1st Match - Cycle 2 - City 2', cycle_2_view.state.city)
+        self.assertEqual(target_view.property_id, cycle_2_view.property_id)
+
+        # The previously linked Sets are no longer linked
+        self.assertNotEqual(
+            PropertyView.objects.get(id=view_13.id).property_id,
+            PropertyView.objects.get(id=view_23.id).property_id
+        )
+        self.assertEqual(4, PropertyView.objects.count())
+
     def test_match_merge_link_for_taxlots(self):
         """
         In this context, a "set" includes a -State, -View, and canonical record.
@@ -1684,6 +1772,65 @@ class TestMatchingExistingViewFullOrgMatchingProperties(DataMappingBaseTestCase)
             expected_summary['PropertyState']['linked_sets_count']
         )
 
+    def test_properties_whole_org_match_merge_link_job_skips_checkpointed_cycles(self):
+        PropertyState.objects.filter(pk=self.ps_12.id).update(pm_property_id='1st Match Set')
+        PropertyState.objects.filter(pk__in=[self.ps_21.id, self.ps_22.id, self.ps_23.id]).update(pm_property_id='1st Match Set')
+
+        # Cycle 1 was merged by a previous run of the job that was interrupted
+        checkpoint_key = _whole_org_merge_checkpoint_key(self.org.id, 'PropertyState', self.cycle_1.id)
+        set_cache_raw(checkpoint_key, {
+            'column_names': matching_criteria_column_names(self.org.id, 'PropertyState'),
+            'merged_count': 0,
+        })
+
+        progress_data = ProgressData('match_merge_link', 'test')
+        start_whole_org_match_merge_link(
+            self.org.id,
+            'PropertyState',
+            progress_data.key,
+            cache_match_merge_link_result.s('test', progress_data.key)
+        )
+
+        # Cycle 1 was skipped, the 3 -States of Cycle 2 were merged
+        self.assertEqual(6, PropertyView.objects.filter(cycle_id=self.cycle_1.id).count())
+        self.assertEqual(4, PropertyView.objects.filter(cycle_id=self.cycle_2.id).count())
+
+        self.assertIsNone(get_cache_raw(checkpoint_key))
+        self.assertEqual('success', ProgressData.from_key(progress_data.key).data['status'])
+
+        # no canonical record is left without a -View
+        self.assertFalse(Property.objects.filter(organization=self.org, views__isnull=True).exists())
+
+        summary = get_cache_raw('org_match_merge_link_result__test')
+        self.assertEqual(3, summary['PropertyState']['merged_count'])
+        self.assertEqual(0, summary['PropertyState']['linked_sets_count'])
+
+    def test_properties_whole_org_match_merge_link_job_reports_failed_cycles(self):
+        checkpoint_key = _whole_org_merge_checkpoint_key(self.org.id, 'PropertyState', self.cycle_1.id)
+        set_cache_raw(checkpoint_key, {
+            'column_names': matching_criteria_column_names(self.org.id, 'PropertyState'),
+            'merged_count': 0,
+        })
+
+        set_cache_raw('org_match_merge_link_result__test', {})
+        progress_data = ProgressData('match_merge_link', 'test')
+        with mock.patch('seed.utils.match._whole_org_match_merge_cycle', side_effect=Exception('deadlock detected')):
+            # the tasks run eagerly, so the error is also raised here
+            with self.assertRaises(Exception):
+                start_whole_org_match_merge_link(
+                    self.org.id,
+                    'PropertyState',
+                    progress_data.key,
+                    cache_match_merge_link_result.s('test', progress_data.key)
+                )
+
+        progress = ProgressData.from_key(progress_data.key).data
+        self.assertEqual('error', progress['status'])
+        self.assertEqual(100, progress['progress'])
+        self.assertIn('deadlock detected', progress['message'])
+        self.assertIsNone(get_cache_raw(checkpoint_key))
+        self.assertEqual({}, get_cache_raw('org_match_merge_link_result__test'))
+
 
 class TestMatchingExistingViewFullOrgMatchingTaxLots(DataMappingBaseTestCase):
     def setUp(self):
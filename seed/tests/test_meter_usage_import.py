@@ -809,6 +809,36 @@ class MeterUsageImportTest(TestCase):
         self.assertCountEqual(result_summary['message'], expected_import_summary)
         self.assertEqual(total_meters_count, 2)
 
+    def test_upsert_creates_and_updates_readings_of_a_meter(self):
+        meter = Meter.objects.create(
+            property=self.property_1,
+            source=Meter.PORTFOLIO_MANAGER,
+            source_id='5766973-0',
+            type=Meter.ELECTRICITY_GRID,
+        )
+        tz_obj = timezone(TIME_ZONE)
+        readings = [
+            {
+                'start_time': make_aware(datetime(2016, month, 1, 0, 0, 0), timezone=tz_obj),
+                'end_time': make_aware(datetime(2016, month + 1, 1, 0, 0, 0), timezone=tz_obj),
+                'reading': month * 100.0,
+                'source_unit': 'kBtu (thousand Btu)',
+                'conversion_factor': 1.00,
+            }
+            for month in [1, 2]
+        ]
+
+        self.assertEqual(MeterReading.upsert(meter.id, readings), 2)
+
+        readings[1]['reading'] = 1000.0
+        self.assertEqual(MeterReading.upsert(meter.id, readings[1:]), 1)
+
+        self.assertEqual(meter.meter_readings.count(), 2)
+        self.assertCountEqual(
+            meter.meter_readings.values_list('reading', flat=True),
+            [100.0, 1000.0]
+        )
+
 
 class MeterUsageImportAdjustedScenarioTest(DataMappingBaseTestCase):
     def setUp(self):
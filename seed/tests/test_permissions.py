@@ -9,9 +9,10 @@ All rights reserved.  # NOQA
 """
 # pylint:disable=no-name-in-module
 import mock
-from django.test import TestCase
+from django.test import RequestFactory, TestCase
 
 from seed.landing.models import SEEDUser as User
+from seed.lib.superperms.orgs.decorators import get_org_context, get_request_org
 from seed.lib.superperms.orgs.models import (
     Organization,
     OrganizationUser,
@@ -259,3 +260,54 @@ class SEEDPublicPermissionsTests(TestCase):
         for view_type in SEEDOrgPermissions.perm_map:
             mock_request.method = view_type
             self.assertTrue(permissions.has_perm(mock_request))
+
+
+class OrgContextTests(TestCase):
+    """Tests for the org contexts of the permission decorators"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('test_user@demo.com', 'test_user@demo.com', 'test_pass')
+        self.org, self.org_user, _ = create_organization(self.user)
+        self.sub_org = Organization.objects.create(name='sub', parent_org=self.org)
+        self.sub_org_user = OrganizationUser.objects.create(
+            user=self.user, organization=self.sub_org, role_level=ROLE_VIEWER
+        )
+
+    def _request(self):
+        request = RequestFactory().get('/api/v3/columns/', {'organization_id': self.sub_org.id})
+        request.user = self.user
+        return request
+
+    def test_get_org_context(self):
+        request = self._request()
+        context = get_org_context(request, self.sub_org.id)
+        self.assertEqual(context['org'], self.sub_org)
+        self.assertEqual(context['org_user'], self.sub_org_user)
+        self.assertTrue(context['org_user'].is_parent_org_owner)
+
+        # resolved once per request, then reused from the shared cache
+        with self.assertNumQueries(0):
+            self.assertIs(get_org_context(request, str(self.sub_org.id)), context)
+            self.assertIs(get_request_org(request, self.sub_org.id), context['org'])
+            context = get_org_context(self._request(), self.sub_org.id)
+            self.assertEqual(context['org_user'].role_level, ROLE_VIEWER)
+            self.assertTrue(context['org_user'].is_parent_org_owner)
+
+        self.assertIsNone(get_org_context(self._request(), self.sub_org.id * 100))
+
+    def test_get_org_context_is_invalidated_by_role_changes(self):
+        get_org_context(self._request(), self.sub_org.id)
+
+        self.sub_org_user.role_level = ROLE_MEMBER
+        self.sub_org_user.save()
+        context = get_org_context(self._request(), self.sub_org.id)
+        self.assertEqual(context['org_user'].role_level, ROLE_MEMBER)
+
+        # changes to the membership of the parent org invalidate the contexts of its sub orgs
+        self.org_user.role_level = ROLE_MEMBER
+        self.org_user.save()
+        context = get_org_context(self._request(), self.sub_org.id)
+        self.assertFalse(context['org_user'].is_parent_org_owner)
+
+        self.sub_org_user.delete()
+        self.assertIsNone(get_org_context(self._request(), self.sub_org.id)['org_user'])
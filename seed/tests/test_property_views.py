@@ -11,9 +11,11 @@ import unittest
 
 from config.settings.common import TIME_ZONE
 
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.timezone import (
     get_current_timezone,
@@ -36,6 +38,7 @@ from seed.models import (
     MeterReading,
     Note,
     Property,
+    PropertyAuditLog,
     PropertyState,
     PropertyView,
     TaxLotView,
@@ -59,6 +62,7 @@ from seed.test_helpers.fake import (
     FakeColumnListProfileFactory,
 )
 from seed.tests.util import DataMappingBaseTestCase
+from seed.utils.meters import PropertyMeterReadingsExporter
 from seed.utils.organizations import create_organization
 
 COLUMNS_TO_SEND = [
@@ -310,6 +314,60 @@ class PropertyViewTests(DataMappingBaseTestCase):
         self.assertEqual(result['state']['extra_data']['field_1'], 'value_1')
         self.assertFalse(result['state'].get('city', None))
 
+    def test_list_properties_filtered_and_sorted(self):
+        view_ids = []
+        for site_eui, field_1 in [(150, 'apple'), (50, 'banana'), (250, 'apricot'), (300, '12')]:
+            state = self.property_state_factory.get_property_state(
+                site_eui=site_eui, extra_data={'field_1': field_1}
+            )
+            view_ids.append(PropertyView.objects.create(
+                property=self.property_factory.get_property(), cycle=self.cycle, state=state
+            ).id)
+        Column.save_column_names(state)
+
+        columns = {
+            c['column_name']: c['name']
+            for c in Column.retrieve_all(self.org.pk, 'property', False)
+            if not c['related']
+        }
+        site_eui = columns['site_eui']
+        field_1 = columns['field_1']
+
+        url = reverse('api:v3:properties-filter')
+        base_params = '?cycle_id={}&organization_id={}&page=1&per_page=999999999'.format(
+            self.cycle.pk, self.org.pk)
+
+        # numeric expression on a database field, sorted descending
+        response = self.client.post(
+            url + base_params + '&{}=>100&order_by=-{}'.format(site_eui, site_eui),
+            content_type='application/json'
+        )
+        data = response.json()
+        self.assertEqual(data['pagination']['total'], 3)
+        self.assertEqual(
+            [r['property_view_id'] for r in data['results']],
+            [view_ids[3], view_ids[2], view_ids[0]]
+        )
+
+        # contains on an extra_data key, sorted ascending
+        response = self.client.post(
+            url + base_params + '&{}=ap&order_by={}'.format(field_1, field_1),
+            content_type='application/json'
+        )
+        data = response.json()
+        self.assertEqual(
+            [r['property_view_id'] for r in data['results']],
+            [view_ids[0], view_ids[2]]
+        )
+
+        # unknown columns are ignored and the default sort is by id
+        response = self.client.post(
+            url + base_params + '&not_a_column=1&order_by=not_a_column',
+            content_type='application/json'
+        )
+        data = response.json()
+        self.assertEqual([r['property_view_id'] for r in data['results']], view_ids)
+
     def test_properties_cycles_list(self):
         # Create Property set in cycle 1
         state = self.property_state_factory.get_property_state(extra_data={"field_1": "value_1"})
@@ -604,6 +662,38 @@ class PropertyMergeViewTests(DataMappingBaseTestCase):
         label_names = list(view.labels.values_list('name', flat=True))
         self.assertCountEqual(label_names, [label_1.name, label_2.name, label_3.name])
 
+    def test_properties_merge_of_more_than_two_views_creates_one_view_and_property(self):
+        label_factory = FakeStatusLabelFactory(organization=self.org)
+        label_1 = label_factory.get_statuslabel()
+        label_2 = label_factory.get_statuslabel()
+        self.view_1.labels.add(label_1)
+        self.view_2.labels.add(label_2)
+
+        state_3 = self.property_state_factory.get_property_state(address_line_1='3 property state')
+        view_3 = PropertyView.objects.create(
+            property=self.property_factory.get_property(), cycle=self.cycle, state=state_3
+        )
+
+        url = reverse('api:v3:properties-merge') + '?organization_id={}'.format(self.org.pk)
+        post_params = json.dumps({
+            'property_view_ids': [self.view_2.pk, self.view_1.pk, view_3.pk]
+        })
+        self.client.post(url, post_params, content_type='application/json')
+
+        self.assertEqual(PropertyView.objects.count(), 1)
+        self.assertEqual(Property.objects.count(), 1)
+
+        view = PropertyView.objects.first()
+        self.assertEqual(view.state.address_line_1, '3 property state')
+        self.assertCountEqual(view.labels.values_list('id', flat=True), [label_1.id, label_2.id])
+
+        # the audit log references the states merged so far and the last state
+        log = PropertyAuditLog.objects.get(state=view.state)
+        self.assertEqual(log.parent_state2_id, state_3.id)
+        previous_log = PropertyAuditLog.objects.get(state_id=log.parent_state1_id)
+        self.assertEqual(previous_log.parent_state1_id, self.state_2.id)
+        self.assertEqual(previous_log.parent_state2_id, self.state_1.id)
+
     def test_properties_merge_without_losing_notes(self):
         note_factory = FakeNoteFactory(organization=self.org, user=self.user)
 
@@ -1833,6 +1923,45 @@ class PropertyMeterViewTests(DataMappingBaseTestCase):
         self.assertCountEqual(result_dict['readings'], expectation['readings'])
         self.assertCountEqual(result_dict['column_defs'], expectation['column_defs'])
 
+    def test_property_meter_usage_monthly_and_annual_queries_do_not_depend_on_the_number_of_readings(self):
+        # add initial meters and readings
+        save_raw_data(self.import_file.id)
+
+        tz_obj = timezone(TIME_ZONE)
+        meter = Meter.objects.get(property_id=self.property_view_1.property.id, type=Meter.type_lookup['Electric - Grid'])
+        exporter = PropertyMeterReadingsExporter(self.property_view_1.property.id, self.org.id, [])
+        # the conversion factors are looked up once and cached by the exporter
+        exporter.readings_and_column_defs('Month')
+
+        query_counts = []
+        for year in [2017, 2018]:
+            # a daily reading for every day of the year
+            MeterReading.objects.bulk_create([
+                MeterReading(
+                    meter=meter,
+                    start_time=make_aware(datetime(year, 1, 1), timezone=tz_obj) + timedelta(days=day),
+                    end_time=make_aware(datetime(year, 1, 1), timezone=tz_obj) + timedelta(days=day + 1),
+                    reading=1,
+                    source_unit='kBtu (thousand Btu)',
+                    conversion_factor=1
+                )
+                for day in range(365)
+            ])
+
+            with CaptureQueriesContext(connection) as monthly_queries:
+                monthly = exporter.readings_and_column_defs('Month')
+            with CaptureQueriesContext(connection) as yearly_queries:
+                yearly = exporter.readings_and_column_defs('Year')
+            query_counts.append((len(monthly_queries), len(yearly_queries)))
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+        field_name = 'Electric - Grid - PM - 5766973-0'
+        december = [r for r in monthly['readings'] if r['month'] == 'December 2018'][0]
+        self.assertAlmostEqual(december[field_name], 31 / 3.41)
+        year_2018 = [r for r in yearly['readings'] if r['year'] == 2018][0]
+        self.assertAlmostEqual(year_2018[field_name], 365 / 3.41)
+
     def test_property_meter_usage_can_return_annual_meter_readings_and_column_defs_while_handling_a_nondefault_display_setting(self):
         # Update settings for display meter units to change it from the default values.
         self.org.display_meter_units['Electric - Grid'] = 'kWh (thousand Watt-hours)'
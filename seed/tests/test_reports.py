@@ -103,3 +103,41 @@ class ExportReport(DataMappingBaseTestCase):
         self.assertEqual('Gross Floor Area', agg_sheet.cell(0, 1).value)
         self.assertEqual('0-99k', agg_sheet.cell(1, 1).value)
         self.assertEqual('0-99k', agg_sheet.cell(2, 1).value)
+
+    def test_report_and_aggregated_report_are_computed_per_cycle(self):
+        # create 5 records with site_eui and gross_floor_area and 1 without site_eui
+        for i in range(1, 7):
+            state = PropertyState.objects.create(
+                organization_id=self.org.id,
+                site_eui=i if i < 6 else None,
+                gross_floor_area=i * 100
+            )
+            PropertyView.objects.create(
+                state_id=state.id,
+                property_id=Property.objects.create(organization_id=self.org.id).id,
+                cycle_id=self.cycle.id
+            )
+
+        params = '?start={}&end={}&x_var=site_eui&y_var=gross_floor_area'.format(
+            '2014-12-31T00:00:00-07:53', '2017-12-31T00:00:00-07:53'
+        )
+
+        url = reverse('api:v3:organizations-report', args=[self.org.pk])
+        data = self.client.get(url + params).json()['data']
+
+        self.assertEqual(data['property_counts'], [{
+            'yr_e': self.cycle.end.strftime('%Y'),
+            'num_properties': 6,
+            'num_properties_w-data': 5,
+        }])
+        self.assertEqual([datum['x'] for datum in data['chart_data']], [1, 2, 3, 4, 5])
+        self.assertEqual([datum['y'] for datum in data['chart_data']], [100, 200, 300, 400, 500])
+
+        url = reverse('api:v3:organizations-report-aggregated', args=[self.org.pk])
+        data = self.client.get(url + params).json()['aggregated_data']
+
+        self.assertEqual(data['chart_data'], [{
+            'x': 3,
+            'y': '0-99k',
+            'yr_e': self.cycle.end.strftime('%Y'),
+        }])
@@ -11,6 +11,7 @@ from django.test import TestCase
 from seed.utils.search import (
     is_string_expression,
     parse_expression,
+    parse_string_filter,
     STRING_EXPRESSION_REGEX,
 )
 
@@ -146,3 +147,37 @@ class ExpressionParserTests(TestCase):
         ("invalid_null_3", "<null", []),
         ("invalid_null_4", "<=null", []),
     ]
+
+
+class ParseStringFilterTests(TestCase):
+    def test_parse_string_filter_defaults_to_contains(self):
+        self.assertEqual(
+            [(False, 'field__icontains', 'abcd')],
+            query_to_child_tuples(parse_string_filter('field', 'abcd'))
+        )
+
+    def test_parse_string_filter_exact_and_case_insensitive(self):
+        self.assertEqual(
+            [(False, 'field', 'abcd')],
+            query_to_child_tuples(parse_string_filter('field', '"abcd"'))
+        )
+        self.assertEqual(
+            [(False, 'field__iexact', 'abcd')],
+            query_to_child_tuples(parse_string_filter('field', '^"abcd"'))
+        )
+
+    def test_parse_string_filter_excludes(self):
+        self.assertEqual(
+            [(True, 'field__icontains', 'abcd')],
+            query_to_child_tuples(parse_string_filter('field', '!abcd'))
+        )
+        self.assertEqual(
+            [(True, 'field', 'abcd')],
+            query_to_child_tuples(parse_string_filter('field', '!"abcd"'))
+        )
+
+    def test_parse_string_filter_expressions(self):
+        self.assertEqual(
+            [(True, 'field', 'abcd'), (True, 'field', 'wxyz')],
+            query_to_child_tuples(parse_string_filter('field', '!=abcd,<>wxyz'))
+        )
@@ -5,14 +5,20 @@
 :author
 """
 import json
+from datetime import date
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse_lazy
 
 from seed.landing.models import SEEDUser as User
 from seed.models import (
     Cycle,
+    PropertyState,
+    PropertyStateListRow,
     PropertyView,
     TaxLotProperty,
+    TaxLotView,
     Column,
     Note,
 )
@@ -20,9 +26,11 @@ from seed.test_helpers.fake import (
     FakePropertyFactory,
     FakePropertyStateFactory,
     FakePropertyViewFactory,
-    FakeStatusLabelFactory
+    FakeStatusLabelFactory,
+    FakeTaxLotPropertyFactory,
 )
 from seed.tests.util import DataMappingBaseTestCase
+from seed.utils.inventory_export import export_data_batches, export_view_batches
 from seed.utils.organizations import create_organization
 from xlrd import open_workbook
 
@@ -80,6 +88,75 @@ class TestTaxLotProperty(DataMappingBaseTestCase):
         self.assertEqual(len(data), 50)
         self.assertEqual(len(data[0]['related']), 0)
 
+    def test_tax_lot_property_get_related_uses_list_rows(self):
+        """Test to make sure get_related builds the list rows once and rebuilds them after edits"""
+        for i in range(5):
+            p = self.property_view_factory.get_property_view()
+            self.properties.append(p.id)
+        PropertyState.objects.filter(propertyview__id__in=self.properties).update(year_ending=date(2019, 12, 31))
+
+        qs = PropertyView.objects.select_related('state').filter(pk__in=self.properties).order_by('id')
+        columns_from_database = Column.retrieve_all(self.org.id, 'property', False)
+        filtered_fields = [c['column_name'] for c in columns_from_database
+                           if not c['related'] and not c['is_extra_data']]
+        mapping = {c['column_name']: c['name'] for c in columns_from_database if not c['related']}
+
+        data = TaxLotProperty.get_related(list(qs), None, columns_from_database)
+        self.assertEqual(PropertyStateListRow.objects.filter(state__propertyview__in=self.properties).count(), 5)
+
+        # the rows give the same results as flattening the -States
+        for view, row in zip(qs, data):
+            expected = TaxLotProperty.model_to_dict_with_mapping(
+                view.state, mapping, fields=filtered_fields, exclude=['extra_data']
+            )
+            for key, value in expected.items():
+                self.assertEqual(row[key], value)
+
+        # the rows are reused, then rebuilt once the -State is saved
+        self.assertEqual(TaxLotProperty.get_related(list(qs), None, columns_from_database), data)
+
+        state = PropertyView.objects.get(pk=self.properties[0]).state
+        state.property_name = 'Updated name'
+        state.save()
+
+        data = TaxLotProperty.get_related(list(qs), None, columns_from_database)
+        self.assertEqual(data[0][mapping['property_name']], 'Updated name')
+        self.assertEqual(PropertyStateListRow.objects.get(state=state).updated, state.updated)
+
+    def test_tax_lot_property_get_related_for_taxlots_is_scoped_to_the_page(self):
+        """Test to make sure get_related does not read the pairings of other taxlots"""
+        taxlot_property_factory = FakeTaxLotPropertyFactory(organization=self.org, user=self.user)
+        taxlot_view_ids = [
+            taxlot_property_factory.get_taxlot_property(cycle=self.cycle).taxlot_view_id
+            for i in range(5)
+        ]
+
+        # pairings of another organization
+        other_user = User.objects.create_user(username='other_user@demo.com', password='test_pass')
+        other_org, _, _ = create_organization(other_user)
+        other_taxlot_property_factory = FakeTaxLotPropertyFactory(organization=other_org, user=other_user)
+        other_cycle = Cycle.objects.filter(organization_id=other_org).first()
+        for i in range(5):
+            other_taxlot_property_factory.get_taxlot_property(cycle=other_cycle)
+
+        qs = TaxLotView.objects.filter(pk__in=taxlot_view_ids)
+        columns_from_database = Column.retrieve_all(self.org.id, 'taxlot', False)
+        with CaptureQueriesContext(connection) as queries:
+            data = TaxLotProperty.get_related(qs, None, columns_from_database)
+
+        self.assertEqual(len(data), 5)
+        for row in data:
+            self.assertEqual(len(row['related']), 1)
+
+        taxlot_property_table = '"{}"'.format(TaxLotProperty._meta.db_table)
+        taxlot_property_queries = [
+            q['sql'] for q in queries.captured_queries
+            if 'FROM {}'.format(taxlot_property_table) in q['sql']
+        ]
+        self.assertTrue(taxlot_property_queries)
+        for sql in taxlot_property_queries:
+            self.assertIn('WHERE', sql)
+
     def test_csv_export(self):
         """Test to make sure get_related returns the fields"""
         for i in range(50):
@@ -103,7 +180,7 @@ class TestTaxLotProperty(DataMappingBaseTestCase):
         )
 
         # parse the content as array
-        data = response.content.decode('utf-8').split('\n')
+        data = response.getvalue().decode('utf-8').split('\n')
 
         self.assertTrue('Address Line 1' in data[0].split(','))
         self.assertTrue('Property Labels\r' in data[0].split(','))
@@ -135,7 +212,7 @@ class TestTaxLotProperty(DataMappingBaseTestCase):
         )
 
         # parse the content as array
-        data = response.content.decode('utf-8').split('\r\n')
+        data = response.getvalue().decode('utf-8').split('\r\n')
         notes_string = (
             multi_line_note.created.astimezone().strftime("%Y-%m-%d %I:%M:%S %p") + "\n" +
             multi_line_note.text +
@@ -171,7 +248,7 @@ class TestTaxLotProperty(DataMappingBaseTestCase):
         )
 
         # parse the content as array
-        wb = open_workbook(file_contents=response.content)
+        wb = open_workbook(file_contents=response.getvalue())
 
         data = [row.value for row in wb.sheet_by_index(0).row(0)]
 
@@ -203,7 +280,7 @@ class TestTaxLotProperty(DataMappingBaseTestCase):
         )
 
         # parse the content as dictionary
-        data = json.loads(response.content)
+        data = json.loads(response.getvalue())
 
         first_level_keys = list(data.keys())
 
@@ -219,6 +296,40 @@ class TestTaxLotProperty(DataMappingBaseTestCase):
         # ids 52 up to and including 102
         self.assertEqual(len(data['features']), 51)
 
+    def test_export_in_batches(self):
+        for i in range(20):
+            p = self.property_view_factory.get_property_view()
+            self.properties.append(p.id)
+        views = PropertyView.objects.filter(property__organization_id=self.org.id)
+
+        # all the views, ordered by id
+        batches = list(export_view_batches(views, batch_size=7))
+        self.assertEqual([len(batch) for batch in batches], [7, 7, 7])
+        self.assertEqual(
+            [view.id for batch in batches for view in batch],
+            sorted([self.property_view.id] + self.properties)
+        )
+
+        # the given ids, in their order
+        ids = list(reversed(self.properties[:10]))
+        batches = list(export_view_batches(views, ids=ids, batch_size=4))
+        self.assertEqual([len(batch) for batch in batches], [4, 4, 2])
+        self.assertEqual([view.id for batch in batches for view in batch], ids)
+
+        # the labels and notes are added to each row
+        self.property_view.labels.add(self.label_factory.get_statuslabel())
+        self.property_view.notes.create(name='Manually Created', note_type=Note.NOTE, text='a note')
+        columns_from_database = Column.retrieve_all(self.org.id, 'property', False)
+        data = [
+            datum
+            for data in export_data_batches(
+                export_view_batches(views, ids=[self.property_view.id]), None, columns_from_database)
+            for datum in data
+        ]
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['property_labels'], self.property_view.labels.get().name)
+        self.assertTrue(data[0]['property_notes'].endswith('a note'))
+
     def tearDown(self):
         for x in self.properties:
             PropertyView.objects.get(pk=x).delete()
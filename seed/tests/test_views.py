@@ -294,6 +294,29 @@ class TestMCMViews(TestCase):
         )
         self.assertEqual('success', response.json()['status'])
 
+    def test_get_column_mapping_suggestions_are_cached_until_the_columns_change(self):
+        url = reverse_lazy('api:v3:import_files-mapping-suggestions',
+                           args=[self.import_file.pk]) + '?organization_id=' + str(self.org.pk)
+        suggestions = self.client.get(url).json()['suggested_column_mappings']
+
+        self.import_file.refresh_from_db()
+        cached = self.import_file.cached_mapping_suggestions
+        self.assertDictEqual(cached['suggestions'], suggestions)
+        self.assertEqual(self.client.get(url).json()['suggested_column_mappings'], suggestions)
+
+        # a new column invalidates the suggestions
+        Column.objects.create(
+            organization=self.org,
+            table_name='PropertyState',
+            column_name='building_id',
+            is_extra_data=True,
+        )
+        suggestions = self.client.get(url).json()['suggested_column_mappings']
+        self.assertEqual(suggestions['building id'], ['PropertyState', 'building_id', 100])
+
+        self.import_file.refresh_from_db()
+        self.assertNotEqual(self.import_file.cached_mapping_suggestions['version'], cached['version'])
+
     def test_get_raw_column_names(self):
         """Good case for ``get_raw_column_names``."""
         resp = self.client.get(
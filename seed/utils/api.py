@@ -23,6 +23,7 @@ from past.builtins import basestring
 from rest_framework import status, exceptions
 
 from seed.landing.models import SEEDUser as User
+from seed.lib.superperms.orgs.decorators import get_org_context
 from seed.lib.superperms.orgs.permissions import get_org_id, get_user_org
 from seed.models import (
     Column,
@@ -321,11 +322,11 @@ class OrgMixin(object):
                 org_id = int(getattr(org, 'pk'))
             if return_obj:
                 if not org:
-                    try:
-                        org = request.user.orgs.get(pk=org_id)
-                        self._organization = org
-                    except ObjectDoesNotExist:
+                    # the user must be a member of the org
+                    context = get_org_context(request, org_id)
+                    if context is None or context['org_user'] is None:
                         raise PermissionDenied('Incorrect org id.')
+                    self._organization = context['org']
                 else:
                     self._organization = org
             else:
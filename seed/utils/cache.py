@@ -4,9 +4,15 @@
 :copyright (c) 2014 - 2020, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
 :author
 """
+import threading
+from collections import OrderedDict
+
 from django.core.cache import cache as django_cache
 from django.core.cache.backends.base import DEFAULT_TIMEOUT
 
+# Number of organizations whose artifacts are kept by each ProcessLRUCache
+PROCESS_CACHE_SIZE = 32
+
 
 def make_key(key):
     return str(django_cache.make_key(key))
@@ -20,6 +26,25 @@ def get_cache_raw(key, default=None):
     return django_cache.get(key, default)
 
 
+def add_cache_raw(key, data, timeout=DEFAULT_TIMEOUT):
+    """Set the key only if it does not exist yet, return whether it was set"""
+    return django_cache.add(key, data, timeout)
+
+
+def get_many_cache_raw(keys):
+    """Return a dict of the values of the keys that are in the cache"""
+    return django_cache.get_many(keys)
+
+
+def increment_cache_raw(key, timeout=DEFAULT_TIMEOUT):
+    """
+    Atomically increment an integer in the cache, starting from 0 if the key does not exist, and
+    return the new value. Concurrent callers each get a different value.
+    """
+    django_cache.add(key, 0, timeout)
+    return django_cache.incr(key)
+
+
 def set_cache(progress_key, status, data):
     """
     Sets the cache key to a pickled dictionary containing at least status and progress.
@@ -79,6 +104,11 @@ def delete_cache(progress_key):
     django_cache.delete(progress_key)
 
 
+def delete_many_cache(keys):
+    """Delete the cache associated with each of the keys"""
+    django_cache.delete_many(keys)
+
+
 def lock_cache(progress_key, timeout=60):
     """Set the lock with a default timeout of 1 minute"""
     set_cache_raw(progress_key, 1, timeout)
@@ -110,3 +140,52 @@ def increment_cache(key, increment):
 
 def clear_cache():
     django_cache.clear()
+
+
+class ProcessLRUCache(object):
+    """
+    Least recently used cache of artifacts built from the data of the organizations, e.g. their
+    serialized columns, kept in the memory of the process. Each artifact is stored with the
+    version stamp of the data it was built from and is rebuilt once the version changes.
+
+    The worker processes run many tasks for many organizations, so only the most recently used
+    ``max_size`` artifacts are kept.
+    """
+
+    def __init__(self, max_size=PROCESS_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, version, build):
+        """
+        Return the artifact of the key for the version, calling build() to build it if it is not
+        cached for this version. Nothing is cached when the version is None, e.g. when the shared
+        cache holding the versions is not available.
+
+        :param key: hashable, usually the organization ID
+        :param version: str or None, version stamp of the data the artifact is built from
+        :param build: callable returning the artifact
+        :return: the artifact, which must not be modified since it is shared by the callers
+        """
+        if version is None:
+            return build()
+
+        with self._lock:
+            cached = self._items.get(key)
+            if cached is not None and cached[0] == version:
+                self._items.move_to_end(key)
+                return cached[1]
+
+        value = build()
+        with self._lock:
+            self._items[key] = (version, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
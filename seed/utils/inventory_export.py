@@ -0,0 +1,425 @@
+# !/usr/bin/env python
+# encoding: utf-8
+"""
+:copyright (c) 2014 - 2020, The Regents of the University of California,
+through Lawrence Berkeley National Laboratory (subject to receipt of any
+required approvals from the U.S. Department of Energy) and contributors.
+All rights reserved.  # NOQA
+:author
+
+Export of the inventory (properties or tax lots with their related records) as CSV, GeoJSON
+or XLSX. The views are read in batches and the files are written as the batches come in so
+that exporting a whole organization does not need to hold all of it in memory at once.
+"""
+import csv
+import datetime
+import json
+from collections import defaultdict
+
+import xlsxwriter
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from quantityfield import ureg
+
+from seed.models import (
+    Meter,
+    MeterReading,
+    Note,
+    PropertyMeasure,
+    PropertyView,
+    Scenario,
+    StatusLabel,
+    TaxLotProperty,
+)
+
+# number of views read (and passed to TaxLotProperty.get_related) at a time
+EXPORT_BATCH_SIZE = 500
+
+SCENARIO_KEYS = (
+    'id', 'name', 'description', 'annual_site_energy_savings', 'annual_source_energy_savings',
+    'annual_cost_savings', 'analysis_state', 'analysis_state_message', 'annual_electricity_savings',
+    'annual_natural_gas_savings', 'annual_site_energy', 'annual_source_energy', 'annual_natural_gas_energy',
+    'annual_electricity_energy', 'annual_peak_demand', 'annual_site_energy_use_intensity',
+    'annual_source_energy_use_intensity'
+)
+SCENARIO_KEY_MAPPINGS = {
+    'annual_site_energy_savings': 'annual_site_energy_savings_mmbtu',
+    'annual_source_energy_savings': 'annual_source_energy_savings_mmbtu',
+    'annual_cost_savings': 'annual_cost_savings_dollars',
+    'annual_site_energy': 'annual_site_energy_kbtu',
+    'annual_site_energy_use_intensity': 'annual_site_energy_use_intensity_kbtu_ft2',
+    'annual_source_energy': 'annual_source_energy_kbtu',
+    'annual_source_energy_use_intensity': 'annual_source_energy_use_intensity_kbtu_ft2',
+    'annual_natural_gas_energy': 'annual_natural_gas_energy_mmbtu',
+    'annual_electricity_energy': 'annual_electricity_energy_mmbtu',
+    'annual_peak_demand': 'annual_peak_demand_kw',
+    'annual_electricity_savings': 'annual_electricity_savings_kbtu',
+    'annual_natural_gas_savings': 'annual_natural_gas_savings_kbtu'
+}
+PROPERTY_MEASURE_KEYS = (
+    'id', 'property_measure_name', 'measure_id', 'cost_mv', 'cost_total_first',
+    'cost_installation', 'cost_material', 'cost_capital_replacement', 'cost_residual_value'
+)
+MEASURE_KEYS = ('name', 'display_name', 'category', 'category_display_name')
+POLYGON_FIELDS = ["bounding_box", "centroid", "property_footprint", "taxlot_footprint", "long_lat"]
+
+
+class Echo(object):
+    """
+    An object that implements just the write method of the file-like interface so that the
+    rows written by a csv.writer are returned instead of buffered.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_view_batches(views, ids=None, id_field='id', batch_size=EXPORT_BATCH_SIZE):
+    """
+    Read the views in batches with their labels and notes prefetched.
+
+    :param views: QuerySet of PropertyViews or TaxLotViews
+    :param ids: list, optional ids of the records to export, in the order of the export
+    :param id_field: str, field of the view that the ids refer to, e.g. 'id' or 'property_id'
+    :param batch_size: int, number of views per batch
+    :return: generator of lists of views, in the order of the ids or else ordered by the view id
+    """
+    views = views.prefetch_related(
+        Prefetch('labels', queryset=StatusLabel.objects.order_by('name')),
+        Prefetch('notes', queryset=Note.objects.order_by('created')),
+    )
+
+    if ids:
+        # remove the duplicates, keeping the order
+        ids = list(dict.fromkeys(ids))
+        for start in range(0, len(ids), batch_size):
+            order = {obj_id: index for index, obj_id in enumerate(ids[start:start + batch_size])}
+            batch = list(views.filter(**{id_field + '__in': list(order.keys())}).order_by('id'))
+            batch.sort(key=lambda view: order[getattr(view, id_field)])
+            yield batch
+    else:
+        last_id = 0
+        while True:
+            batch = list(views.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1].id
+
+
+def export_data_batches(view_batches, column_ids, columns_from_database):
+    """
+    Turn the batches of views into the data to export, see TaxLotProperty.get_related, adding
+    the labels and notes of the views.
+
+    :param view_batches: iterable of lists of views, e.g. from export_view_batches
+    :param column_ids: list, ids of the columns to export, None for all the columns
+    :param columns_from_database: list, columns from the database as list of dict
+    :return: generator of lists of dicts
+    """
+    for views in view_batches:
+        data = TaxLotProperty.get_related(views, column_ids, columns_from_database)
+
+        for datum, view in zip(data, views):
+            label_string = [label.name for label in view.labels.all()]
+            note_string = [
+                note.created.astimezone().strftime("%Y-%m-%d %I:%M:%S %p") + "\n" + note.text
+                for note in view.notes.all()
+            ]
+
+            prefix = 'property' if isinstance(view, PropertyView) else 'taxlot'
+            datum[prefix + '_labels'] = ','.join(label_string)
+            datum[prefix + '_notes'] = '\n----------\n'.join(note_string)
+
+        yield data
+
+
+def _export_value(value):
+    """Convert quantities and dates (this is typically handled in the JSON Encoder, but that isn't here)"""
+    if isinstance(value, ureg.Quantity):
+        return value.magnitude
+    elif isinstance(value, datetime.datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    elif isinstance(value, datetime.date):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def _row_values(datum, column_name_mappings):
+    """values of the datum in the order of the columns"""
+    row = []
+    for column in column_name_mappings:
+        row_result = datum.get(column, None)
+
+        # Try grabbing the value out of the related field if not found yet.
+        if row_result is None and datum.get('related'):
+            row_result = datum['related'][0].get(column, None)
+
+        row.append(_export_value(row_result))
+    return row
+
+
+def _header(column_name_mappings):
+    # check the first item in the header and make sure that it isn't ID (it can be id, or iD).
+    # excel doesn't like the first item to be ID
+    header = list(column_name_mappings.values())
+    if header and header[0] == 'ID':
+        header[0] = 'id'
+    return header
+
+
+def csv_chunks(data_batches, column_name_mappings):
+    """
+    Write the data as CSV, one chunk of rows per batch
+
+    :param data_batches: iterable of lists of dicts, e.g. from export_data_batches
+    :param column_name_mappings: OrderedDict, column name to header
+    :return: generator of str
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(_header(column_name_mappings))
+
+    # iterate over the results to preserve column order and write row.
+    for data in data_batches:
+        yield ''.join(writer.writerow(_row_values(datum, column_name_mappings)) for datum in data)
+
+
+def _serialized_coordinates(polygon_wkt):
+    string_coord_pairs = polygon_wkt.lstrip('POLYGON (').rstrip(')').split(', ')
+
+    coordinates = []
+    for coord_pair in string_coord_pairs:
+        float_coords = [float(coord) for coord in coord_pair.split(' ')]
+        coordinates.append(float_coords)
+
+    return coordinates
+
+
+def _serialized_point(point_wkt):
+    string_coords = point_wkt.lstrip('POINT (').rstrip(')').split(', ')
+
+    coordinates = []
+    for coord in string_coords[0].split(' '):
+        coordinates.append(float(coord))
+
+    return coordinates
+
+
+def _geojson_feature(datum, column_name_mappings):
+    feature = {
+        "type": "Feature",
+        "properties": {}
+    }
+
+    for key, value in datum.items():
+        if value is None:
+            continue
+
+        value = _export_value(value)
+
+        if value and any(k in key for k in POLYGON_FIELDS):
+            """
+            If object is a polygon and is populated, add the 'geometry'
+            key-value-pair in the appropriate GeoJSON format.
+            When the first geometry is added, the correct format is
+            established. When/If a second geometry is added, this is
+            appended alongside the previous geometry.
+            """
+            if key == 'long_lat':
+                # point
+                individual_geometry = {
+                    "coordinates": _serialized_point(value),
+                    "type": "Point"
+                }
+            else:
+                # polygons
+                individual_geometry = {
+                    "coordinates": [_serialized_coordinates(value)],
+                    "type": "Polygon"
+                }
+
+            if feature.get("geometry", None) is None:
+                feature["geometry"] = {
+                    "type": "GeometryCollection",
+                    "geometries": [individual_geometry]
+                }
+            else:
+                feature["geometry"]["geometries"].append(individual_geometry)
+        else:
+            # Non-polygon data
+            display_key = column_name_mappings.get(key, key)
+            feature["properties"][display_key] = value
+
+    # add style information. Note that the GeoJson will not render if no lat/lng
+    if feature["properties"].get("property_state_id") is not None:
+        feature["properties"]["stroke"] = "#185189"  # buildings color
+    elif feature["properties"].get("taxlot_state_id") is not None:
+        feature["properties"]["stroke"] = "#10A0A0"  # buildings color
+    feature["properties"]["marker-color"] = "#E74C3C"
+    feature["properties"]["fill-opacity"] = 0
+
+    return feature
+
+
+def geojson_chunks(data_batches, column_name_mappings):
+    """
+    Write the data as a GeoJSON FeatureCollection, one chunk of features per batch. The
+    related records are added as features of their own, once each.
+
+    :param data_batches: iterable of lists of dicts, e.g. from export_data_batches
+    :param column_name_mappings: OrderedDict, column name to header
+    :return: generator of str
+    """
+    yield '{"type": "FeatureCollection", "crs": {"type": "EPSG", "properties": {"code": 4326}}, "features": ['
+
+    seen_related = set()
+    separator = ''
+    for data in data_batches:
+        # extract the related records that have not been exported yet
+        related = []
+        for datum in data:
+            for record in datum.get('related') or []:
+                key = tuple(record.items())
+                if key not in seen_related:
+                    seen_related.add(key)
+                    related.append(record)
+
+        features = [
+            json.dumps(_geojson_feature(datum, column_name_mappings), cls=DjangoJSONEncoder)
+            for datum in data + related
+        ]
+        if features:
+            yield separator + ', '.join(features)
+            separator = ', '
+
+    yield ']}'
+
+
+def write_spreadsheet(output, data_batches, column_name_mappings):
+    """
+    Write the data, with the measures, scenarios and scenario meter readings of the properties,
+    as an XLSX workbook. The workbook is written in the constant memory mode of xlsxwriter, so
+    each row is flushed to a temporary file as soon as the next one is started.
+
+    :param output: file-like object to write the workbook to
+    :param data_batches: iterable of lists of dicts, e.g. from export_data_batches
+    :param column_name_mappings: OrderedDict, column name to header
+    """
+    wb = xlsxwriter.Workbook(output, {'remove_timezone': True, 'constant_memory': True})
+
+    # add tabs
+    ws1 = wb.add_worksheet('Properties')
+    ws2 = wb.add_worksheet('Measures')
+    ws3 = wb.add_worksheet('Scenarios')
+    ws4 = wb.add_worksheet('Scenario Measure Join Table')
+    ws5 = wb.add_worksheet('Meter Readings')
+    bold = wb.add_format({'bold': True})
+    # datetime formatting
+    date_format = wb.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+
+    # in the constant memory mode the rows have to be written in order, so all the headers that
+    # do not depend on the data are written first
+    for index, val in enumerate(_header(column_name_mappings)):
+        ws1.write(0, index, val, bold)
+
+    # join table
+    ws4.write('A1', 'property_id', bold)
+    ws4.write('B1', 'scenario_id', bold)
+    ws4.write('C1', 'measure_id', bold)
+
+    # scenario meter readings
+    ws5.write('A1', 'scenario_id', bold)
+    ws5.write('B1', 'meter_id', bold)
+    ws5.write('C1', 'type', bold)
+    ws5.write('D1', 'start_time', bold)
+    ws5.write('E1', 'end_time', bold)
+    ws5.write('F1', 'reading', bold)
+    ws5.write('G1', 'units', bold)
+    ws5.write('H1', 'is_virtual', bold)
+
+    energy_types = dict(Meter.ENERGY_TYPES)
+
+    row = 0
+    row2 = 0
+    row3 = 0
+    row4 = 0
+    row5 = 0
+    add_m_headers = True
+    add_s_headers = True
+    for data in data_batches:
+        # find the measures and scenarios of the whole batch
+        state_ids = [datum['property_state_id'] for datum in data if datum.get('property_state_id')]
+        measures = defaultdict(list)
+        for m in PropertyMeasure.objects.filter(property_state_id__in=state_ids).select_related('measure'):
+            measures[m.property_state_id].append(m)
+        scenarios = defaultdict(list)
+        for s in Scenario.objects.filter(property_state_id__in=state_ids).prefetch_related('measures'):
+            scenarios[s.property_state_id].append(s)
+
+        # iterate over the results to preserve column order and write row.
+        for datum in data:
+            row += 1
+            for index, value in enumerate(_row_values(datum, column_name_mappings)):
+                ws1.write(row, index, value)
+
+            # measures
+            for m in measures.get(datum.get('property_state_id'), []):
+                if add_m_headers:
+                    # grab headers
+                    col2 = 0
+                    for key in PROPERTY_MEASURE_KEYS:
+                        ws2.write(row2, col2, key, bold)
+                        col2 += 1
+                    for key in MEASURE_KEYS:
+                        ws2.write(row2, col2, 'measure ' + key, bold)
+                        col2 += 1
+                    add_m_headers = False
+
+                row2 += 1
+                col2 = 0
+                for key in PROPERTY_MEASURE_KEYS:
+                    ws2.write(row2, col2, getattr(m, key))
+                    col2 += 1
+                for key in MEASURE_KEYS:
+                    ws2.write(row2, col2, getattr(m.measure, key))
+                    col2 += 1
+
+            # scenarios (and join table)
+            for s in scenarios.get(datum.get('property_state_id'), []):
+                if add_s_headers:
+                    # grab headers
+                    col3 = 0
+                    for key in SCENARIO_KEYS:
+                        # double check scenario_key_mappings in case a different header is desired
+                        ws3.write(row3, col3, SCENARIO_KEY_MAPPINGS.get(key, key), bold)
+                        col3 += 1
+                    add_s_headers = False
+                row3 += 1
+                col3 = 0
+                for key in SCENARIO_KEYS:
+                    ws3.write(row3, col3, getattr(s, key))
+                    col3 += 1
+
+                for sm in s.measures.all():
+                    row4 += 1
+                    ws4.write(row4, 0, datum.get('id'))
+                    ws4.write(row4, 1, s.id)
+                    ws4.write(row4, 2, sm.id)
+
+        # scenario meter readings of the whole batch, read from the database as they are written
+        scenario_ids = [s.id for state_scenarios in scenarios.values() for s in state_scenarios]
+        readings = MeterReading.objects.filter(meter__scenario_id__in=scenario_ids).select_related(
+            'meter').order_by('meter__scenario_id', 'meter_id', 'start_time')
+        for r in readings.iterator():
+            row5 += 1
+            ws5.write(row5, 0, r.meter.scenario_id)
+            ws5.write(row5, 1, r.meter_id)
+            # use energy type enum to determine reading type
+            ws5.write(row5, 2, energy_types.get(r.meter.type))
+            ws5.write_datetime(row5, 3, r.start_time, date_format)
+            ws5.write_datetime(row5, 4, r.end_time, date_format)
+            ws5.write(row5, 5, r.reading)  # this is now a float field
+            ws5.write(row5, 6, r.source_unit)
+            ws5.write(row5, 7, r.meter.is_virtual)
+
+    wb.close()
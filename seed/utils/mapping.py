@@ -0,0 +1,92 @@
+# !/usr/bin/env python
+# encoding: utf-8
+"""
+:copyright (c) 2014 - 2020, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+"""
+from seed.lib.mappings import mapper as simple_mapper
+from seed.lib.mcm import mapper
+from seed.lib.xml_mapping import mapper as xml_mapper
+from seed.models import Column, get_column_mapping
+
+
+def _suggest_mappings(import_file, organization):
+    match_index = Column.retrieve_match_index(organization.pk)
+
+    # If this is a portfolio manager file, then load in the PM mappings and if the column_mappings
+    # are not in the original mappings, default to PM
+    if import_file.from_portfolio_manager:
+        pm_mappings = simple_mapper.get_pm_mapping(import_file.first_row_columns,
+                                                   resolve_duplicates=True)
+        suggested_mappings = mapper.build_column_mapping(
+            import_file.first_row_columns,
+            match_index,
+            previous_mapping=get_column_mapping,
+            map_args=[organization],
+            default_mappings=pm_mappings,
+            thresh=80
+        )
+    elif import_file.from_buildingsync:
+        bsync_mappings = xml_mapper.build_column_mapping()
+        suggested_mappings = mapper.build_column_mapping(
+            import_file.first_row_columns,
+            match_index,
+            previous_mapping=get_column_mapping,
+            map_args=[organization],
+            default_mappings=bsync_mappings,
+            thresh=80
+        )
+    else:
+        # All other input types
+        suggested_mappings = mapper.build_column_mapping(
+            import_file.first_row_columns,
+            match_index,
+            previous_mapping=get_column_mapping,
+            map_args=[organization],
+            thresh=80  # percentage match that we require. 80% is random value for now.
+        )
+        # replace None with empty string for column names and PropertyState for tables
+        # TODO #239: Move this fix to build_column_mapping
+        for m in suggested_mappings:
+            table, destination_field, _confidence = suggested_mappings[m]
+            if destination_field is None:
+                suggested_mappings[m][1] = ''
+
+    # Fix the table name, eventually move this to the build_column_mapping
+    for m in suggested_mappings:
+        table, _destination_field, _confidence = suggested_mappings[m]
+        # Do not return the campus, created, updated fields... that is force them to be in the property state
+        if not table or table == 'Property':
+            suggested_mappings[m][0] = 'PropertyState'
+        elif table == 'TaxLot':
+            suggested_mappings[m][0] = 'TaxLotState'
+
+    return suggested_mappings
+
+
+def get_mapping_suggestions(import_file, organization):
+    """
+    Return the suggested mappings from the headers of an import file to the columns of the
+    organization. The suggestions are saved on the import file until its headers, or the columns
+    or the column mappings of the organization change.
+
+    :param import_file: ImportFile
+    :param organization: Organization
+    :return: dict, {'raw_column': ['table', 'column', confidence], ...}
+    """
+    version = Column.retrieve_columns_version(organization.pk)
+    cached = import_file.cached_mapping_suggestions
+    if (version is not None and cached and cached.get('version') == version and
+            cached.get('headers') == import_file.first_row_columns):
+        return cached['suggestions']
+
+    suggested_mappings = _suggest_mappings(import_file, organization)
+    if version is not None:
+        import_file.cached_mapping_suggestions = {
+            'version': version,
+            'headers': import_file.first_row_columns,
+            'suggestions': suggested_mappings,
+        }
+        import_file.save(update_fields=['cached_mapping_suggestions'])
+
+    return suggested_mappings
@@ -4,17 +4,22 @@
 :copyright (c) 2014 - 2020, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
 :author
 """
+from collections import Counter, defaultdict
 
+from celery import chain as celery_chain
 from celery import shared_task
 
 from django.contrib.postgres.aggregates.general import ArrayAgg
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models import Subquery
 from django.db.models.aggregates import Count
 
+from seed.lib.progress_data.progress_data import ProgressData
 from seed.models import (
+    AnalysisPropertyView,
     Column,
     Cycle,
+    Meter,
     Property,
     PropertyState,
     PropertyView,
@@ -22,10 +27,14 @@ from seed.models import (
     TaxLotState,
     TaxLotView,
 )
+from seed.utils.cache import delete_many_cache, get_cache_raw, get_many_cache_raw, set_cache_raw
 from seed.utils.merge import merge_states_with_views
 from seed.utils.properties import properties_across_cycles
 from seed.utils.taxlots import taxlots_across_cycles
 
+# Seconds the merged Cycles of an interrupted whole org match merge link job are remembered
+WHOLE_ORG_MERGE_CHECKPOINT_TIMEOUT = 60 * 60 * 24
+
 
 def empty_criteria_filter(StateClass, column_names):
     """
@@ -49,6 +58,102 @@ def matching_filter_criteria(state, column_names):
     }
 
 
+def states_with_existing_matches(state_ids, cycle_id, column_names, StateClass):
+    """
+    For the given -State IDs, find the -States attached to -Views of the given
+    Cycle that match them on all of the given matching criteria columns. This is
+    done in one query by joining the given -States to the Cycle's -States.
+
+    Like a QS filter built from matching_filter_criteria(), None values only
+    match None values. Comparing the text of the ROW of the criteria values
+    gives that behavior while still allowing a hash join.
+
+    A dict is returned where the keys are the IDs of the given -States having at
+    least one match and the values are lists of the matching -State IDs ordered
+    from least to most recently updated.
+    """
+    if not state_ids or not column_names:
+        return {}
+
+    ViewClass = PropertyView if StateClass == PropertyState else TaxLotView
+    qn = connection.ops.quote_name
+
+    db_columns = [qn(StateClass._meta.get_field(name).column) for name in sorted(column_names)]
+    incoming_row = ', '.join('incoming.{}'.format(col) for col in db_columns)
+    existing_row = ', '.join('existing.{}'.format(col) for col in db_columns)
+
+    sql = (
+        'SELECT incoming.id, array_agg(existing.id ORDER BY existing.updated, existing.id)'
+        ' FROM {state_table} incoming'
+        ' JOIN {state_table} existing ON ROW({incoming_row})::text = ROW({existing_row})::text'
+        ' JOIN {view_table} cycle_view ON cycle_view.state_id = existing.id'
+        ' WHERE incoming.id = ANY(%s) AND cycle_view.cycle_id = %s'
+        ' GROUP BY incoming.id'
+    ).format(
+        state_table=qn(StateClass._meta.db_table),
+        view_table=qn(ViewClass._meta.db_table),
+        incoming_row=incoming_row,
+        existing_row=existing_row,
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [list(state_ids), cycle_id])
+        return {state_id: existing_ids for state_id, existing_ids in cursor.fetchall()}
+
+
+def views_with_matches_across_cycles(state_ids, column_names, StateClass):
+    """
+    For the given -State IDs, find the -Views across all Cycles of their
+    Organization whose -States match them on all of the given matching criteria
+    columns. This is done in one query grouping the -Views by their -State's
+    matching criteria values. As in states_with_existing_matches(), None values
+    only match None values.
+
+    A list of groups is returned, one per distinct set of matching criteria
+    values. Each group is a list of [view_id, cycle_id, state_id, canonical_id]
+    ordered from the least to the most recently updated -State, and it includes
+    the -Views of the given -States.
+    """
+    if not state_ids or not column_names:
+        return []
+
+    if StateClass == PropertyState:
+        ViewClass = PropertyView
+        canonical_id_col = 'property_id'
+    else:
+        ViewClass = TaxLotView
+        canonical_id_col = 'taxlot_id'
+    qn = connection.ops.quote_name
+
+    db_columns = [qn(StateClass._meta.get_field(name).column) for name in sorted(column_names)]
+    incoming_row = ', '.join('incoming.{}'.format(col) for col in db_columns)
+    existing_row = ', '.join('existing.{}'.format(col) for col in db_columns)
+
+    sql = (
+        'SELECT array_agg('
+        '  ARRAY[cycle_view.id, cycle_view.cycle_id, existing.id, cycle_view.{canonical_id_col}]'
+        '  ORDER BY existing.updated, existing.id'
+        ')'
+        ' FROM {state_table} existing'
+        ' JOIN {view_table} cycle_view ON cycle_view.state_id = existing.id'
+        ' WHERE (existing.organization_id, ROW({existing_row})::text) IN ('
+        '  SELECT incoming.organization_id, ROW({incoming_row})::text'
+        '  FROM {state_table} incoming WHERE incoming.id = ANY(%s)'
+        ' )'
+        ' GROUP BY existing.organization_id, ROW({existing_row})::text'
+    ).format(
+        canonical_id_col=qn(canonical_id_col),
+        state_table=qn(StateClass._meta.db_table),
+        view_table=qn(ViewClass._meta.db_table),
+        incoming_row=incoming_row,
+        existing_row=existing_row,
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [list(state_ids)])
+        return [group for group, in cursor.fetchall()]
+
+
 def matching_criteria_column_names(organization_id, table_name):
     """
     Collect matching criteria columns while replacing address_line_1 with
@@ -243,6 +348,265 @@ def match_merge_link(view_id, StateClassName):
         return 0, link_count, None
 
 
+def match_merge_link_many(view_ids, StateClassName):
+    """
+    This is the batched version of match_merge_link(). Rather than searching
+    for the matches of each -View one at a time, the matches of all the given
+    -Views are found at once using views_with_matches_across_cycles(). Each
+    group of matching -Views is then merged and linked only once.
+
+    As in match_merge_link(), -States with empty matching criteria are left
+    alone, -States matching within a Cycle are merged with precedence given to
+    the given -States, and the resulting -Views are linked across Cycles.
+
+    This method returns the total count of merged -States, the number of links
+    and a dict of the given -View IDs to their target -View IDs for the -Views
+    that were replaced by merges.
+    """
+    if StateClassName == 'PropertyState':
+        StateClass = PropertyState
+        ViewClass = PropertyView
+        canonical_id_col = 'property_id'
+    elif StateClassName == 'TaxLotState':
+        StateClass = TaxLotState
+        ViewClass = TaxLotView
+        canonical_id_col = 'taxlot_id'
+
+    # Given -View IDs by -State ID, per Organization
+    given_views = defaultdict(dict)
+    for view_id, state_id, org_id in ViewClass.objects.filter(pk__in=view_ids).values_list(
+            'id', 'state_id', 'state__organization_id'):
+        given_views[org_id][state_id] = view_id
+
+    merge_count = 0
+    link_count = 0
+    target_view_ids = {}
+    for org_id, org_given_views in given_views.items():
+        column_names = matching_criteria_column_names(org_id, StateClassName)
+
+        # If associated -State has empty matching criteria, do nothing
+        empty_matching_criteria = empty_criteria_filter(StateClass, column_names)
+        state_ids = StateClass.objects.filter(pk__in=list(org_given_views.keys())).\
+            exclude(**empty_matching_criteria).\
+            values_list('id', flat=True)
+
+        unlinked_views = []
+        for group in views_with_matches_across_cycles(list(state_ids), column_names, StateClass):
+            views_by_cycle = defaultdict(list)
+            for view_id, cycle_id, state_id, _canonical_id in group:
+                views_by_cycle[cycle_id].append((view_id, state_id))
+
+            # Merge matches within each Cycle, the given -States are merged last to take precedence
+            group_view_ids = []
+            target_view_id = None
+            merged = False
+            for cycle_views in views_by_cycle.values():
+                given_state_ids = [state_id for _, state_id in cycle_views if state_id in org_given_views]
+
+                if len(cycle_views) == 1:
+                    cycle_view_id = cycle_views[0][0]
+                else:
+                    ordered_ids = [state_id for _, state_id in cycle_views if state_id not in org_given_views]
+                    ordered_ids += given_state_ids
+                    merged_state = merge_states_with_views(ordered_ids, org_id, 'System Match', StateClass)
+                    cycle_view_id = ViewClass.objects.values_list('id', flat=True).get(state_id=merged_state.id)
+
+                    for state_id in given_state_ids:
+                        target_view_ids[org_given_views[state_id]] = cycle_view_id
+                    merge_count += len(ordered_ids)
+                    merged = True
+
+                group_view_ids.append(cycle_view_id)
+                if given_state_ids and target_view_id is None:
+                    target_view_id = cycle_view_id
+
+            if merged is False:
+                if len(group) == 1:
+                    # Only the -View itself, check for past links after the groups are linked
+                    unlinked_views.append((group[0][0], group[0][3]))
+                    continue
+                elif len(set(canonical_id for _, _, _, canonical_id in group)) == 1:
+                    # All matches are linked already
+                    link_count += len(group) - 1
+                    continue
+
+            link_count += _link_matches(
+                ViewClass.objects.filter(pk__in=group_view_ids),
+                org_id,
+                ViewClass.objects.get(pk=target_view_id),
+                ViewClass
+            )
+
+        # Disassociate the -Views without matches from their past links, if necessary
+        if unlinked_views:
+            canonical_id_filter = {
+                canonical_id_col + '__in': [canonical_id for _, canonical_id in unlinked_views]
+            }
+            linked_views_count = Counter(
+                ViewClass.objects.filter(**canonical_id_filter).values_list(canonical_id_col, flat=True)
+            )
+            for view_id, canonical_id in unlinked_views:
+                if linked_views_count[canonical_id] > 1:
+                    _link_matches(
+                        ViewClass.objects.filter(pk=view_id),
+                        org_id,
+                        ViewClass.objects.get(pk=view_id),
+                        ViewClass
+                    )
+                    linked_views_count[canonical_id] -= 1
+
+    return merge_count, link_count, target_view_ids
+
+
+def _whole_org_classes(state_class_name):
+    if state_class_name == 'PropertyState':
+        return PropertyState, PropertyView, Property
+    elif state_class_name == 'TaxLotState':
+        return TaxLotState, TaxLotView, TaxLot
+
+
+def _whole_org_match_merge_cycle(org_id, cycle_id, column_names, StateClass, ViewClass):
+    """
+    Match merge the -States of the -Views of a Cycle, see whole_org_match_merge_link.
+
+    :return: int, number of merged -States
+    """
+    merged_count = 0
+    empty_matching_criteria = empty_criteria_filter(StateClass, column_names)
+    view_in_cycle = ViewClass.objects.filter(cycle_id=cycle_id)
+
+    matched_id_groups = StateClass.objects.\
+        filter(id__in=Subquery(view_in_cycle.values('state_id'))).\
+        exclude(**empty_matching_criteria).\
+        values(*column_names).\
+        annotate(matched_ids=ArrayAgg('id'), matched_count=Count('id')).\
+        values_list('matched_ids', flat=True).\
+        filter(matched_count__gt=1)
+
+    for state_ids in matched_id_groups:
+        ordered_ids = list(
+            StateClass.objects.
+            filter(id__in=state_ids).
+            order_by('updated').
+            values_list('id', flat=True)
+        )
+
+        merge_states_with_views(ordered_ids, org_id, 'System Match', StateClass)
+
+        merged_count += len(state_ids)
+
+    return merged_count
+
+
+def _whole_org_match_link(org_id, cycle_ids, column_names, StateClass, ViewClass, CanonicalClass):
+    """
+    Match link the -Views of the Cycles, see whole_org_match_merge_link. The new canonical
+    records are created and applied to the -Views in bulk.
+
+    :return: int, number of linked sets
+    """
+    linked_sets_count = 0
+    empty_matching_criteria = empty_criteria_filter(StateClass, column_names)
+
+    # Append 'state__' to dict keys used for filtering so that filtering can be done across associations
+    state_appended_col_names = {'state__' + col_name for col_name in column_names}
+    state_appended_empty_matching_criteria = {
+        'state__' + col_name: v
+        for col_name, v
+        in empty_matching_criteria.items()
+    }
+
+    canonical_id_col = 'property_id' if StateClass == PropertyState else 'taxlot_id'
+
+    # Looking at all -Views in Org across Cycles
+    org_views = ViewClass.objects.\
+        filter(cycle_id__in=cycle_ids).\
+        select_related('state')
+
+    # Identify all canonical_ids that are currently used once and are potentially reusable
+    reusable_canonical_ids = set(
+        org_views.
+        values(canonical_id_col).
+        annotate(use_count=Count(canonical_id_col)).
+        values_list(canonical_id_col, flat=True).
+        filter(use_count=1)
+    )
+
+    # Ignoring -Views associated to -States with empty matching critieria, group by columns
+    link_groups = org_views.\
+        exclude(**state_appended_empty_matching_criteria).\
+        values(*state_appended_col_names).\
+        annotate(
+            canonical_ids=ArrayAgg(canonical_id_col),
+            view_ids=ArrayAgg('id'),
+            link_count=Count('id')
+        ).\
+        values_list('canonical_ids', 'view_ids', 'link_count')
+
+    # [(canonical IDs to copy the meters of, source persists, -View IDs)], one per new canonical record
+    relinks = []
+    for canonical_ids, view_ids, link_count in link_groups:
+        # If the canonical record was unlinked and is still unlinked, do nothing
+        if link_count == 1 and canonical_ids[0] in reusable_canonical_ids:
+            continue
+
+        canonical_ids.sort(reverse=True)  # Ensures priority given by most recently created canonical record
+        relinks.append((canonical_ids, True, view_ids))
+        linked_sets_count += 1
+
+    # For records with empty criteria and without reusable canonical IDs, apply a new ID.
+    empty_criteria_views = ViewClass.objects.\
+        filter(cycle_id__in=cycle_ids, **state_appended_empty_matching_criteria).\
+        exclude(**{canonical_id_col + "__in": reusable_canonical_ids}).\
+        values_list('id', canonical_id_col)
+    for view_id, canonical_id in empty_criteria_views:
+        relinks.append(([canonical_id], False, [view_id]))
+
+    if not relinks:
+        return linked_sets_count
+
+    # Create a new canonical record for each, copy meters if applicable, and apply the new records to old -Views
+    new_records = CanonicalClass.objects.bulk_create([
+        CanonicalClass(organization_id=org_id) for _relink in relinks
+    ])
+
+    unused_canonical_ids = set()
+    for _canonical_ids, _source_persists, view_ids in relinks:
+        unused_canonical_ids.update(_canonical_ids)
+
+    if CanonicalClass == Property:
+        canonical_ids_with_meters = set(
+            Meter.objects.filter(property_id__in=unused_canonical_ids).values_list('property_id', flat=True)
+        )
+        for new_record, (canonical_ids, source_persists, _view_ids) in zip(new_records, relinks):
+            for canonical_id in canonical_ids:
+                if canonical_id in canonical_ids_with_meters:
+                    new_record.copy_meters(canonical_id, source_persists=source_persists)
+
+    # bulk_update does not send post_save, the new canonical records were just created so their
+    # updated datetime is already current.
+    ViewClass.objects.bulk_update(
+        [
+            ViewClass(id=view_id, **{canonical_id_col: new_record.id})
+            for new_record, (_canonical_ids, _source_persists, view_ids) in zip(new_records, relinks)
+            for view_id in view_ids
+        ],
+        [canonical_id_col],
+        batch_size=1000
+    )
+
+    # Delete canonical records that are no longer used.
+    still_used_canonical_ids = ViewClass.objects.\
+        filter(**{canonical_id_col + '__in': unused_canonical_ids}).\
+        values(canonical_id_col)
+    CanonicalClass.objects.\
+        filter(id__in=unused_canonical_ids).\
+        exclude(id__in=Subquery(still_used_canonical_ids)).\
+        delete()
+
+    return linked_sets_count
+
+
 @shared_task(serializer='pickle', ignore_result=True)
 def whole_org_match_merge_link(org_id, state_class_name, proposed_columns=[]):
     """
@@ -295,14 +659,7 @@ def whole_org_match_merge_link(org_id, state_class_name, proposed_columns=[]):
 
     cycle_ids = Cycle.objects.filter(organization_id=org_id).values_list('id', flat=True)
 
-    if state_class_name == 'PropertyState':
-        StateClass = PropertyState
-        ViewClass = PropertyView
-        CanonicalClass = Property
-    elif state_class_name == 'TaxLotState':
-        StateClass = TaxLotState
-        ViewClass = TaxLotView
-        CanonicalClass = TaxLot
+    StateClass, ViewClass, CanonicalClass = _whole_org_classes(state_class_name)
 
     if proposed_columns:
         # Use column names as given (replacing address_line_1 with normalized_address)
@@ -316,108 +673,17 @@ def whole_org_match_merge_link(org_id, state_class_name, proposed_columns=[]):
         column_names = matching_criteria_column_names(org_id, state_class_name)
         preview_run = False
 
-    empty_matching_criteria = empty_criteria_filter(StateClass, column_names)
-
     with transaction.atomic():
         # Match merge within each Cycle
         for cycle_id in cycle_ids:
-            view_in_cycle = ViewClass.objects.filter(cycle_id=cycle_id)
-
-            matched_id_groups = StateClass.objects.\
-                filter(id__in=Subquery(view_in_cycle.values('state_id'))).\
-                exclude(**empty_matching_criteria).\
-                values(*column_names).\
-                annotate(matched_ids=ArrayAgg('id'), matched_count=Count('id')).\
-                values_list('matched_ids', flat=True).\
-                filter(matched_count__gt=1)
-
-            for state_ids in matched_id_groups:
-                ordered_ids = list(
-                    StateClass.objects.
-                    filter(id__in=state_ids).
-                    order_by('updated').
-                    values_list('id', flat=True)
-                )
-
-                merge_states_with_views(ordered_ids, org_id, 'System Match', StateClass)
-
-                summary[StateClass.__name__]['merged_count'] += len(state_ids)
+            summary[StateClass.__name__]['merged_count'] += _whole_org_match_merge_cycle(
+                org_id, cycle_id, column_names, StateClass, ViewClass
+            )
 
         # Match link across the whole Organization
-        # Append 'state__' to dict keys used for filtering so that filtering can be done across associations
-        state_appended_col_names = {'state__' + col_name for col_name in column_names}
-        state_appended_empty_matching_criteria = {
-            'state__' + col_name: v
-            for col_name, v
-            in empty_matching_criteria.items()
-        }
-
-        canonical_id_col = 'property_id' if StateClass == PropertyState else 'taxlot_id'
-
-        # Looking at all -Views in Org across Cycles
-        org_views = ViewClass.objects.\
-            filter(cycle_id__in=cycle_ids).\
-            select_related('state')
-
-        # Identify all canonical_ids that are currently used once and are potentially reusable
-        reusable_canonical_ids = org_views.\
-            values(canonical_id_col).\
-            annotate(use_count=Count(canonical_id_col)).\
-            values_list(canonical_id_col, flat=True).\
-            filter(use_count=1)
-
-        # Ignoring -Views associated to -States with empty matching critieria, group by columns
-        link_groups = org_views.\
-            exclude(**state_appended_empty_matching_criteria).\
-            values(*state_appended_col_names).\
-            annotate(
-                canonical_ids=ArrayAgg(canonical_id_col),
-                view_ids=ArrayAgg('id'),
-                link_count=Count('id')
-            ).\
-            values_list('canonical_ids', 'view_ids', 'link_count')
-
-        unused_canonical_ids = []
-        for canonical_ids, view_ids, link_count in link_groups:
-            # If the canonical record was unlinked and is still unlinked, do nothing
-            if link_count == 1 and canonical_ids[0] in reusable_canonical_ids:
-                continue
-
-            # Otherwise, create a new canonical record, copy meters if applicable, and apply the new record to old -Views
-            new_record = CanonicalClass.objects.create(organization_id=org_id)
-
-            if CanonicalClass == Property:
-                canonical_ids.sort(reverse=True)  # Ensures priority given by most recently created canonical record
-                for canonical_id in canonical_ids:
-                    new_record.copy_meters(canonical_id, source_persists=True)
-
-            ViewClass.objects.filter(id__in=view_ids).update(**{canonical_id_col: new_record.id})
-
-            summary[StateClass.__name__]['linked_sets_count'] += 1
-
-            unused_canonical_ids += canonical_ids
-
-        # For records with empty criteria and without reusable canonical IDs, apply a new ID.
-        empty_criteria_views = ViewClass.objects.\
-            select_related('state').\
-            filter(cycle_id__in=cycle_ids, **state_appended_empty_matching_criteria).\
-            exclude(**{canonical_id_col + "__in": reusable_canonical_ids})
-
-        for view in empty_criteria_views:
-            # Create a new canonical record, copy meters if applicable, and apply the new record to old -Views
-            new_record = CanonicalClass.objects.create(organization_id=org_id)
-
-            if CanonicalClass == Property:
-                new_record.copy_meters(getattr(view, canonical_id_col), source_persists=False)
-
-            setattr(view, canonical_id_col, new_record.id)
-            view.save()
-
-        # Also delete these unusable canonical records
-        unused_canonical_ids += empty_criteria_views.values_list(canonical_id_col, flat=True)
-
-        # Delete canonical records that are no longer used.
-        CanonicalClass.objects.filter(id__in=unused_canonical_ids).delete()
+        summary[StateClass.__name__]['linked_sets_count'] = _whole_org_match_link(
+            org_id, cycle_ids, column_names, StateClass, ViewClass, CanonicalClass
+        )
 
         # If this was a preview run, capture results here and rollback.
         if preview_run:
@@ -429,3 +695,123 @@ def whole_org_match_merge_link(org_id, state_class_name, proposed_columns=[]):
             transaction.set_rollback(True)
 
     return summary
+
+
+def _whole_org_merge_checkpoint_key(org_id, state_class_name, cycle_id):
+    return 'org_match_merge_link_checkpoint__{}__{}__{}'.format(org_id, state_class_name, cycle_id)
+
+
+def start_whole_org_match_merge_link(org_id, state_class_name, progress_key, callback):
+    """
+    Run whole_org_match_merge_link as a background job. The match merges of the Cycles run one
+    after the other, each in its own transaction, followed by the match link across the Cycles in
+    a transaction of its own. The Cycles are not merged in parallel since the merges of different
+    Cycles share canonical records and their meters. Each Cycle is checkpointed once merged, so
+    that running the job again with the same matching criteria after it was interrupted skips the
+    Cycles already merged. If any of the tasks fails, the progress is finished with the error.
+
+    :param org_id: int
+    :param state_class_name: str, PropertyState or TaxLotState
+    :param progress_key: str, key of the ProgressData stepped once per Cycle and once for the links
+    :param callback: celery signature called with the summary of whole_org_match_merge_link
+    :return: None
+    """
+    cycle_ids = list(Cycle.objects.filter(organization_id=org_id).values_list('id', flat=True))
+    column_names = matching_criteria_column_names(org_id, state_class_name)
+
+    progress_data = ProgressData.from_key(progress_key)
+    progress_data.total = len(cycle_ids) + 1
+    progress_data.save()
+
+    celery_chain(
+        *[
+            _whole_org_match_merge_cycle_task.si(org_id, state_class_name, cycle_id, column_names, progress_key)
+            for cycle_id in cycle_ids
+        ],
+        _whole_org_match_link_task.si(org_id, state_class_name, cycle_ids, column_names, progress_key),
+        callback
+    ).apply_async(
+        link_error=_whole_org_match_merge_link_failed.s(org_id, state_class_name, cycle_ids, progress_key)
+    )
+
+
+def _delete_checkpoints(org_id, state_class_name, cycle_ids):
+    delete_many_cache([
+        _whole_org_merge_checkpoint_key(org_id, state_class_name, cycle_id) for cycle_id in cycle_ids
+    ])
+
+
+@shared_task(acks_late=True)
+def _whole_org_match_merge_cycle_task(org_id, state_class_name, cycle_id, column_names, progress_key):
+    checkpoint_key = _whole_org_merge_checkpoint_key(org_id, state_class_name, cycle_id)
+    checkpoint = get_cache_raw(checkpoint_key)
+    if checkpoint is None or checkpoint['column_names'] != column_names:
+        StateClass, ViewClass, _CanonicalClass = _whole_org_classes(state_class_name)
+        with transaction.atomic():
+            merged_count = _whole_org_match_merge_cycle(org_id, cycle_id, column_names, StateClass, ViewClass)
+
+        set_cache_raw(checkpoint_key, {
+            'column_names': column_names,
+            'merged_count': merged_count,
+        }, WHOLE_ORG_MERGE_CHECKPOINT_TIMEOUT)
+
+    ProgressData.from_key(progress_key).step('Merging matches within each cycle')
+
+
+@shared_task(acks_late=True)
+def _whole_org_match_link_task(org_id, state_class_name, cycle_ids, column_names, progress_key):
+    StateClass, ViewClass, CanonicalClass = _whole_org_classes(state_class_name)
+    canonical_name = 'property' if StateClass == PropertyState else 'taxlot'
+    with transaction.atomic():
+        linked_sets_count = _whole_org_match_link(
+            org_id, cycle_ids, column_names, StateClass, ViewClass, CanonicalClass
+        )
+
+        # Delete the canonical records of the organization left without any -View by the merges
+        used_canonical_ids = ViewClass.objects.\
+            filter(**{canonical_name + '__organization_id': org_id}).\
+            values(canonical_name + '_id')
+        unused_canonical_records = CanonicalClass.objects.\
+            filter(organization_id=org_id).\
+            exclude(id__in=Subquery(used_canonical_ids))
+        if CanonicalClass == Property:
+            # deleting campuses and analyzed properties would cascade to their children and analyses
+            unused_canonical_records = unused_canonical_records.\
+                exclude(id__in=Subquery(
+                    Property.objects.filter(parent_property__isnull=False).values('parent_property_id')
+                )).\
+                exclude(id__in=Subquery(AnalysisPropertyView.objects.values('property_id')))
+        unused_canonical_records.delete()
+
+    # the merged counts of the Cycles were recorded with their checkpoints
+    checkpoints = get_many_cache_raw([
+        _whole_org_merge_checkpoint_key(org_id, state_class_name, cycle_id) for cycle_id in cycle_ids
+    ])
+    merged_count = sum(checkpoint['merged_count'] for checkpoint in checkpoints.values())
+
+    # the job is complete, running it again starts over
+    _delete_checkpoints(org_id, state_class_name, cycle_ids)
+    ProgressData.from_key(progress_key).step('Linking matches across cycles')
+
+    summary = {
+        'PropertyState': {
+            'merged_count': 0,
+            'linked_sets_count': 0,
+        },
+        'TaxLotState': {
+            'merged_count': 0,
+            'linked_sets_count': 0,
+        },
+    }
+    summary[state_class_name]['merged_count'] = merged_count
+    summary[state_class_name]['linked_sets_count'] = linked_sets_count
+    return summary
+
+
+@shared_task
+def _whole_org_match_merge_link_failed(request, exc, traceback, org_id, state_class_name, cycle_ids, progress_key):
+    """Error callback of the tasks of start_whole_org_match_merge_link"""
+    _delete_checkpoints(org_id, state_class_name, cycle_ids)
+    ProgressData.from_key(progress_key).finish_with_error(
+        'Failed to match, merge and link: {}'.format(exc), traceback
+    )
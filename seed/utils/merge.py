@@ -9,6 +9,7 @@ All rights reserved.  # NOQA
 """
 
 from django.apps import apps
+from django.db import transaction
 from django.db.models import Subquery
 
 from seed.lib.merging import merging
@@ -44,20 +45,23 @@ def merge_states_with_views(state_ids, org_id, log_name, StateClass):
 
 
 def merge_properties(state_ids, org_id, log_name, ignore_merge_protection=False):
-    index = 1
-    merged_state = None
-    while index < len(state_ids):
-        # state 1 is the base, state 2 is merged on top of state 1
-        # Use index 0 the first time through, merged_state from then on
-        if index == 1:
-            state_1 = PropertyState.objects.get(id=state_ids[index - 1])
-        else:
-            state_1 = merged_state
-        state_2 = PropertyState.objects.get(id=state_ids[index])
-
-        merged_state = PropertyState.objects.create(organization_id=org_id)
-
-        views = PropertyView.objects.filter(state_id__in=[state_1.id, state_2.id])
+    """
+    Merges the PropertyStates, ordered from least to most priority, into one
+    merged PropertyState with a new Property and PropertyView. The meters,
+    notes, labels and pairings of all the merged -Views are moved to the new
+    ones at once, and the merged -Views (and canonical records not associated
+    to other -Views) are deleted.
+
+    :param state_ids: list, PropertyState IDs ordered from least to most priority
+    :return: PropertyState, the merged state (None if less than 2 states are given)
+    """
+    if len(state_ids) < 2:
+        return None
+
+    with transaction.atomic():
+        merged_state = _merge_log_states(PropertyState, state_ids, org_id, log_name, ignore_merge_protection)
+
+        views = PropertyView.objects.filter(state_id__in=state_ids)
         view_ids = list(views.values_list('id', flat=True))
         canonical_ids = list(views.values_list('property_id', flat=True))
 
@@ -73,9 +77,7 @@ def merge_properties(state_ids, org_id, log_name, ignore_merge_protection=False)
         )
         new_view.save()
 
-        _merge_log_states(merged_state, org_id, state_1, state_2, log_name, ignore_merge_protection)
-
-        _copy_meters_in_order(state_1.id, state_2.id, new_property)
+        _copy_meters_in_order(state_ids, new_property)
         _copy_propertyview_relationships(view_ids, new_view)
 
         # Delete canonical records that are NOT associated to other -Views.
@@ -88,26 +90,27 @@ def merge_properties(state_ids, org_id, log_name, ignore_merge_protection=False)
         # Delete all -Views
         PropertyView.objects.filter(pk__in=view_ids).delete()
 
-        index += 1
-
     return merged_state
 
 
 def merge_taxlots(state_ids, org_id, log_name, ignore_merge_protection=False):
-    index = 1
-    merged_state = None
-    while index < len(state_ids):
-        # state 1 is the base, state 2 is merged on top of state 1
-        # Use index 0 the first time through, merged_state from then on
-        if index == 1:
-            state_1 = TaxLotState.objects.get(id=state_ids[index - 1])
-        else:
-            state_1 = merged_state
-        state_2 = TaxLotState.objects.get(id=state_ids[index])
-
-        merged_state = TaxLotState.objects.create(organization_id=org_id)
-
-        views = TaxLotView.objects.filter(state_id__in=[state_1.id, state_2.id])
+    """
+    Merges the TaxLotStates, ordered from least to most priority, into one
+    merged TaxLotState with a new TaxLot and TaxLotView. The notes, labels and
+    pairings of all the merged -Views are moved to the new ones at once, and
+    the merged -Views (and canonical records not associated to other -Views)
+    are deleted.
+
+    :param state_ids: list, TaxLotState IDs ordered from least to most priority
+    :return: TaxLotState, the merged state (None if less than 2 states are given)
+    """
+    if len(state_ids) < 2:
+        return None
+
+    with transaction.atomic():
+        merged_state = _merge_log_states(TaxLotState, state_ids, org_id, log_name, ignore_merge_protection)
+
+        views = TaxLotView.objects.filter(state_id__in=state_ids)
         view_ids = list(views.values_list('id', flat=True))
         canonical_ids = list(views.values_list('taxlot_id', flat=True))
 
@@ -123,8 +126,6 @@ def merge_taxlots(state_ids, org_id, log_name, ignore_merge_protection=False):
         )
         new_view.save()
 
-        _merge_log_states(merged_state, org_id, state_1, state_2, log_name, ignore_merge_protection)
-
         _copy_taxlotview_relationships(view_ids, new_view)
 
         # Delete canonical records that are NOT associated to other -Views.
@@ -137,60 +138,75 @@ def merge_taxlots(state_ids, org_id, log_name, ignore_merge_protection=False):
         # Delete all -Views
         TaxLotView.objects.filter(pk__in=view_ids).delete()
 
-        index += 1
-
     return merged_state
 
 
-def _merge_log_states(merged_state, org_id, state_1, state_2, log_name, ignore_merge_protection):
-    if isinstance(state_1, PropertyState):
-        StateClass = PropertyState
+def _merge_log_states(StateClass, state_ids, org_id, log_name, ignore_merge_protection):
+    """
+    Folds the states, ordered from least to most priority, into a merged state.
+    Each state is merged on top of the states merged so far, and each of these
+    merges is saved and logged as it would have been if the states were merged
+    two at a time, since the audit logs (used by the history and by unmerging)
+    reference both parent states.
+    """
+    if StateClass == PropertyState:
         AuditLogClass = PropertyAuditLog
     else:
-        StateClass = TaxLotState
         AuditLogClass = TaxLotAuditLog
-    priorities = Column.retrieve_priorities(org_id)
+    priorities = Column.retrieve_priorities(org_id)[StateClass.__name__]
+
+    states = StateClass.objects.in_bulk(state_ids)
+    audit_logs = {}
+    for audit_log in AuditLogClass.objects.filter(state_id__in=state_ids).order_by('id'):
+        audit_logs.setdefault(audit_log.state_id, audit_log)
+
+    # state 1 is the base, state 2 is merged on top of state 1
+    state_1 = states[state_ids[0]]
+    state_1_audit_log = audit_logs.get(state_1.id)
+    for state_id in state_ids[1:]:
+        state_2 = states[state_id]
+        state_2_audit_log = audit_logs.get(state_id)
+
+        merged_state = StateClass.objects.create(organization_id=org_id)
+        merged_state = merging.merge_state(
+            merged_state, state_1, state_2, priorities, ignore_merge_protection
+        )
 
-    merged_state = merging.merge_state(
-        merged_state, state_1, state_2, priorities[StateClass.__name__], ignore_merge_protection
-    )
+        merged_state_audit_log = AuditLogClass.objects.create(
+            organization_id=org_id,
+            parent1=state_1_audit_log,
+            parent2=state_2_audit_log,
+            parent_state1=state_1,
+            parent_state2=state_2,
+            state=merged_state,
+            name=log_name,
+            description='Automatic Merge',
+            import_filename=None,
+            record_type=AUDIT_IMPORT
+        )
 
-    state_1_audit_log = AuditLogClass.objects.filter(state=state_1).first()
-    state_2_audit_log = AuditLogClass.objects.filter(state=state_2).first()
-
-    AuditLogClass.objects.create(
-        organization_id=org_id,
-        parent1=state_1_audit_log,
-        parent2=state_2_audit_log,
-        parent_state1=state_1,
-        parent_state2=state_2,
-        state=merged_state,
-        name=log_name,
-        description='Automatic Merge',
-        import_filename=None,
-        record_type=AUDIT_IMPORT
-    )
+        # Set the merged_state to merged
+        merged_state.data_state = DATA_STATE_MATCHING
+        merged_state.merge_state = MERGE_STATE_MERGED
+        merged_state.save()
+        state_1.merge_state = MERGE_STATE_UNKNOWN
+        state_1.save()
+        state_2.merge_state = MERGE_STATE_UNKNOWN
+        state_2.save()
 
-    # Set the merged_state to merged
-    merged_state.data_state = DATA_STATE_MATCHING
-    merged_state.merge_state = MERGE_STATE_MERGED
-    merged_state.save()
-    state_1.merge_state = MERGE_STATE_UNKNOWN
-    state_1.save()
-    state_2.merge_state = MERGE_STATE_UNKNOWN
-    state_2.save()
-
-
-def _copy_meters_in_order(state_1_id, state_2_id, new_property):
-    # Add meters in the following order without regard for the source persisting.
-    new_property.copy_meters(
-        PropertyView.objects.get(state_id=state_1_id).property_id,
-        source_persists=False
-    )
-    new_property.copy_meters(
-        PropertyView.objects.get(state_id=state_2_id).property_id,
-        source_persists=False
+        state_1 = merged_state
+        state_1_audit_log = merged_state_audit_log
+
+    return state_1
+
+
+def _copy_meters_in_order(state_ids, new_property):
+    # Add meters in the order of the states without regard for the source persisting.
+    property_ids = dict(
+        PropertyView.objects.filter(state_id__in=state_ids).values_list('state_id', 'property_id')
     )
+    for state_id in state_ids:
+        new_property.copy_meters(property_ids[state_id], source_persists=False)
 
 
 def _copy_propertyview_relationships(view_ids, new_view):
@@ -223,11 +239,13 @@ def _copy_propertyview_relationships(view_ids, new_view):
                            .values_list('taxlot_view_id', flat=True))
 
     TaxLotProperty.objects.filter(property_view_id__in=view_ids).delete()
-    for paired_view_id in paired_view_ids:
+    TaxLotProperty.objects.bulk_create([
         TaxLotProperty(primary=True,
                        cycle_id=new_view.cycle_id,
                        property_view_id=new_view.id,
-                       taxlot_view_id=paired_view_id).save()
+                       taxlot_view_id=paired_view_id)
+        for paired_view_id in paired_view_ids
+    ])
 
 
 def _copy_taxlotview_relationships(view_ids, new_view):
@@ -260,8 +278,10 @@ def _copy_taxlotview_relationships(view_ids, new_view):
                            .values_list('property_view_id', flat=True))
 
     TaxLotProperty.objects.filter(taxlot_view_id__in=view_ids).delete()
-    for paired_view_id in paired_view_ids:
+    TaxLotProperty.objects.bulk_create([
         TaxLotProperty(primary=True,
                        cycle_id=new_view.cycle_id,
                        property_view_id=paired_view_id,
-                       taxlot_view_id=new_view.id).save()
+                       taxlot_view_id=new_view.id)
+        for paired_view_id in paired_view_ids
+    ])
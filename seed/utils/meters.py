@@ -6,7 +6,7 @@ from calendar import (
     month_name,
 )
 
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
 from config.settings.common import TIME_ZONE
 
@@ -20,13 +20,16 @@ from django.utils.timezone import make_aware
 
 from pytz import timezone
 
-from seed.models import Meter
+from seed.models import Meter, MeterReading
 from seed.data_importer.utils import (
     kbtu_thermal_conversion_factors,
     usage_point_id,
 )
 from seed.lib.superperms.orgs.models import Organization
 
+# the fields of a MeterReading that are needed for the aggregations
+Reading = namedtuple('Reading', ['start_time', 'end_time', 'reading'])
+
 
 class PropertyMeterReadingsExporter():
     """
@@ -118,8 +121,8 @@ class PropertyMeterReadingsExporter():
         records in monthly intervals.
 
         At a high-level, following algorithm is used to acccomplish this:
-            - Identify the first start time and last end time
-            - For each month between, aggregate the readings found in that month
+            - Read all the readings of the meters at once, sorted by end time
+            - Group the readings of each meter by the month they are fully contained in
                 - The highest possible reading total without overlapping times is found
                 - For more details how that monthly aggregation occurs, see _max_reading_total()
         """
@@ -134,32 +137,16 @@ class PropertyMeterReadingsExporter():
             },
         }
 
+        readings_by_meter = self._readings_by_meter()
         for meter in self.meters:
             field_name, conversion_factor = self._build_column_def(meter, column_defs)
 
-            min_time = meter.meter_readings.earliest('start_time').start_time.astimezone(tz=self.tz)
-            max_time = meter.meter_readings.latest('end_time').end_time.astimezone(tz=self.tz)
-
-            # Iterate through months
-            current_month_time = min_time
-            while current_month_time < max_time:
-                _weekday, days_in_month = monthrange(current_month_time.year, current_month_time.month)
-
-                unaware_end = datetime(current_month_time.year, current_month_time.month, days_in_month, 23, 59, 59) + timedelta(seconds=1)
-                end_of_month = make_aware(unaware_end, timezone=self.tz)
-
-                # Find all meters fully contained within this month (second-level granularity)
-                interval_readings = meter.meter_readings.filter(start_time__range=(current_month_time, end_of_month), end_time__range=(current_month_time, end_of_month))
-                if interval_readings.exists():
-                    readings_list = list(interval_readings.order_by('end_time'))
-                    reading_month_total = self._max_reading_total(readings_list)
-
-                    if reading_month_total > 0:
-                        month_year = '{} {}'.format(month_name[current_month_time.month], current_month_time.year)
-                        monthly_readings[month_year]['month'] = month_year
-                        monthly_readings[month_year][field_name] = reading_month_total / conversion_factor
-
-                current_month_time = end_of_month
+            totals = self._max_reading_totals(readings_by_meter[meter.id], self._month_interval)
+            for (year, month), reading_month_total in totals:
+                if reading_month_total > 0:
+                    month_year = '{} {}'.format(month_name[month], year)
+                    monthly_readings[month_year]['month'] = month_year
+                    monthly_readings[month_year][field_name] = reading_month_total / conversion_factor
 
         return {
             'readings': list(monthly_readings.values()),
@@ -182,36 +169,74 @@ class PropertyMeterReadingsExporter():
             },
         }
 
+        readings_by_meter = self._readings_by_meter()
         for meter in self.meters:
             field_name, conversion_factor = self._build_column_def(meter, column_defs)
 
-            min_time = meter.meter_readings.earliest('start_time').start_time.astimezone(tz=self.tz)
-            max_time = meter.meter_readings.latest('end_time').end_time.astimezone(tz=self.tz)
-
-            # Iterate through years
-            current_year_time = min_time
-            while current_year_time < max_time:
-                unaware_end = datetime((current_year_time.year + 1), 1, 1, 0, 0, 0)
-                end_of_year = make_aware(unaware_end, timezone=self.tz)
-
-                # Find all meters fully contained within this month (second-level granularity)
-                interval_readings = meter.meter_readings.filter(start_time__range=(current_year_time, end_of_year), end_time__range=(current_year_time, end_of_year))
-                if interval_readings.exists():
-                    readings_list = list(interval_readings.order_by('end_time'))
-                    reading_year_total = self._max_reading_total(readings_list)
-
-                    if reading_year_total > 0:
-                        year = current_year_time.year
-                        yearly_readings[year]['year'] = year
-                        yearly_readings[year][field_name] = reading_year_total / conversion_factor
-
-                current_year_time = end_of_year
+            totals = self._max_reading_totals(readings_by_meter[meter.id], self._year_interval)
+            for year, reading_year_total in totals:
+                if reading_year_total > 0:
+                    yearly_readings[year]['year'] = year
+                    yearly_readings[year][field_name] = reading_year_total / conversion_factor
 
         return {
             'readings': list(yearly_readings.values()),
             'column_defs': list(column_defs.values())
         }
 
+    def _readings_by_meter(self):
+        """
+        Reads the readings of all the meters in a single query.
+
+        :return: dict, {meter_id: list of Readings sorted by ascending end_times}
+        """
+        readings_by_meter = defaultdict(list)
+        readings = MeterReading.objects.filter(meter__in=self.meters).order_by('meter_id', 'end_time').values_list(
+            'meter_id', 'start_time', 'end_time', 'reading')
+        for meter_id, start_time, end_time, reading in readings.iterator():
+            readings_by_meter[meter_id].append(Reading(start_time, end_time, reading))
+
+        return readings_by_meter
+
+    def _month_interval(self, time):
+        """Returns the (year, month) of the time and the start of the following month"""
+        time = time.astimezone(tz=self.tz)
+        _weekday, days_in_month = monthrange(time.year, time.month)
+
+        unaware_end = datetime(time.year, time.month, days_in_month, 23, 59, 59) + timedelta(seconds=1)
+        return (time.year, time.month), make_aware(unaware_end, timezone=self.tz)
+
+    def _year_interval(self, time):
+        """Returns the year of the time and the start of the following year"""
+        time = time.astimezone(tz=self.tz)
+
+        unaware_end = datetime((time.year + 1), 1, 1, 0, 0, 0)
+        return time.year, make_aware(unaware_end, timezone=self.tz)
+
+    def _max_reading_totals(self, sorted_readings, interval):
+        """
+        Groups the readings by the interval (month or year) they are fully contained in
+        (second-level granularity) and finds the highest possible reading total without
+        overlapping times of each interval, see _max_reading_total().
+
+        Note that the readings are expected to be sorted by ascending end_times.
+
+        :param sorted_readings: list of Readings
+        :param interval: function returning the key of the interval a time falls in and the end of that interval
+        :return: list of (interval key, total) tuples, sorted by the interval key
+        """
+        interval_readings = defaultdict(list)
+        for reading in sorted_readings:
+            key, end_of_interval = interval(reading.start_time)
+            if reading.end_time <= end_of_interval:
+                # still sorted by ascending end_times within each interval
+                interval_readings[key].append(reading)
+
+        return [
+            (key, self._max_reading_total(readings))
+            for key, readings in sorted(interval_readings.items())
+        ]
+
     def _build_column_def(self, meter, column_defs):
         type_text = meter.get_type_display()
         if meter.source == meter.GREENBUTTON:
@@ -10,6 +10,8 @@ All rights reserved.  # NOQA
 :author
 """
 from collections import OrderedDict
+
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
@@ -30,3 +32,32 @@ class ResultsListPagination(PageNumberPagination):
             ('total', self.page.paginator.count),
             ('results', data)
         ]))
+
+
+def paginate_list(items, page, per_page):
+    """
+    Return one page of a list along with the same pagination information as the inventory
+    lists. Invalid pages return the first page and pages past the end return the last page.
+
+    :param items: list
+    :param page: int or str, page number, starting at 1
+    :param per_page: int or str, number of items per page
+    :return: tuple, (list of the items on the page, dict of the pagination)
+    """
+    paginator = Paginator(items, per_page)
+    try:
+        items_page = paginator.page(page)
+    except PageNotAnInteger:
+        items_page = paginator.page(1)
+    except EmptyPage:
+        items_page = paginator.page(paginator.num_pages)
+
+    return items_page.object_list, {
+        'page': items_page.number,
+        'start': items_page.start_index(),
+        'end': items_page.end_index(),
+        'num_pages': paginator.num_pages,
+        'has_next': items_page.has_next(),
+        'has_previous': items_page.has_previous(),
+        'total': paginator.count
+    }
@@ -0,0 +1,218 @@
+# !/usr/bin/env python
+# encoding: utf-8
+"""
+:copyright (c) 2014 - 2020, The Regents of the University of California, through Lawrence Berkeley National Laboratory (subject to receipt of any required approvals from the U.S. Department of Energy) and contributors. All rights reserved.  # NOQA
+:author
+
+Queries of the property report charts. The counts, the x/y values and their
+aggregations are computed by the database, only the chart data is returned.
+"""
+from django.contrib.postgres.fields import JSONField
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Aggregate, Count, ExpressionWrapper, F, Func, Min, Q, Value
+from django.db.models.functions import Floor, Least, Lower
+from quantityfield import ureg
+from quantityfield.fields import QuantityField
+
+from seed.models import PropertyState, PropertyView
+from seed.serializers.pint import get_dimensionality, get_display_units
+
+AGGREGATED_Y_VARS = ['gross_floor_area', 'use_description', 'year_built']
+
+GROSS_FLOOR_AREA_BINS = {
+    0: '0-99k',
+    100000: '100-199k',
+    200000: '200k-299k',
+    300000: '300k-399k',
+    400000: '400-499k',
+    500000: '500-599k',
+    600000: '600-699k',
+    700000: '700-799k',
+    800000: '800-899k',
+    900000: '900-999k',
+    1000000: 'over 1,000k',
+}
+
+
+class RoundTo(Func):
+    """Round a double precision value to the given number of decimal places"""
+    template = 'CAST(ROUND(CAST(%(expressions)s AS numeric), %(places)d) AS double precision)'
+    output_field = models.FloatField()
+
+
+class Median(Aggregate):
+    """Median of the values, i.e. the average of the two middle values for an even count"""
+    function = 'PERCENTILE_CONT'
+    name = 'Median'
+    template = '%(function)s(0.5) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = models.FloatField()
+
+
+def _annotate_display_value(views, organization, var, name):
+    """
+    Annotate the PropertyViews with the value of the `var` field of their
+    PropertyState as displayed to the organization, i.e. quantities are
+    converted to the display units of the organization and rounded to its
+    significant figures.
+
+    :return: tuple, (views, Q of the views with a value, i.e. the value is not
+        null, empty, zero or false). If `var` is not a field of the
+        PropertyState, none of the views have a value.
+    """
+    try:
+        field = PropertyState._meta.get_field(var)
+    except FieldDoesNotExist:
+        field = None
+    if field is None or not field.concrete or field.is_relation or isinstance(field, JSONField):
+        return views.annotate(**{name: Value(None, output_field=models.FloatField())}), Q(pk__isnull=True)
+
+    path = 'state__{}'.format(var)
+    if isinstance(field, QuantityField):
+        try:
+            display_units = get_display_units(organization, get_dimensionality(ureg(field.base_units)))
+            factor = ureg.Quantity(1, field.base_units).to(display_units).magnitude
+        except KeyError:
+            factor = 1
+
+        raw_name = '{}_raw'.format(name)
+        views = views.annotate(**{
+            raw_name: ExpressionWrapper(F(path) * factor, output_field=models.FloatField())
+        }).annotate(**{
+            name: RoundTo(F(raw_name), places=organization.display_significant_figures)
+        })
+        return views, Q(**{'{}__isnull'.format(raw_name): False}) & ~Q(**{raw_name: 0})
+
+    views = views.annotate(**{name: F(path)})
+    has_value = Q(**{'{}__isnull'.format(name): False})
+    if isinstance(field, (models.CharField, models.TextField)):
+        has_value &= ~Q(**{name: ''})
+    elif isinstance(field, models.BooleanField):
+        has_value &= Q(**{name: True})
+    elif isinstance(field, (models.IntegerField, models.FloatField, models.DecimalField)):
+        has_value &= ~Q(**{name: 0})
+
+    return views, has_value
+
+
+def _report_views(organization, cycles, x_var, y_var, campus_only):
+    """
+    Return the PropertyViews of the cycles annotated with their report_x and
+    report_y values, and a Q of the views with both values.
+    """
+    views = PropertyView.objects.filter(
+        property__organization_id=organization.id,
+        cycle_id__in=[cycle.id for cycle in cycles]
+    )
+    if not campus_only:
+        views = views.filter(property__campus=False)
+
+    views, has_x = _annotate_display_value(views, organization, x_var, 'report_x')
+    views, has_y = _annotate_display_value(views, organization, y_var, 'report_y')
+    return views, has_x & has_y
+
+
+def _cycle_results(cycles, views, has_data, chart_data):
+    counts = {
+        row['cycle_id']: row
+        for row
+        in views.order_by().values('cycle_id').annotate(
+            num_properties=Count('id'),
+            num_with_data=Count('id', filter=has_data),
+        )
+    }
+
+    results = []
+    for cycle in cycles:
+        cycle_counts = counts.get(cycle.id, {})
+        results.append({
+            "cycle_id": cycle.pk,
+            "chart_data": chart_data.get(cycle.id, []),
+            "property_counts": {
+                "yr_e": cycle.end.strftime('%Y'),
+                "num_properties": cycle_counts.get('num_properties', 0),
+                "num_properties_w-data": cycle_counts.get('num_with_data', 0),
+            },
+        })
+    return results
+
+
+def get_report_data(organization, cycles, x_var, y_var, campus_only):
+    """
+    Return the number of properties, the number of properties with both an x
+    and a y value, and these x/y values for each of the cycles. Campuses are
+    only included when campus_only is true.
+
+    :param organization: Organization
+    :param cycles: list of Cycles
+    :param x_var: str, PropertyState field of the x axis
+    :param y_var: str, PropertyState field of the y axis
+    :param campus_only: bool
+    :return: list of dict, one per cycle, in the order of the cycles
+    """
+    views, has_data = _report_views(organization, cycles, x_var, y_var, campus_only)
+    yr_e = {cycle.id: cycle.end.strftime('%Y') for cycle in cycles}
+
+    chart_data = {}
+    for cycle_id, property_id, x, y in views.filter(has_data).order_by('id').values_list(
+            'cycle_id', 'property_id', 'report_x', 'report_y'):
+        chart_data.setdefault(cycle_id, []).append({
+            "id": property_id,
+            "x": x,
+            "y": y,
+            "yr_e": yr_e[cycle_id],
+        })
+
+    return _cycle_results(cycles, views, has_data, chart_data)
+
+
+def get_aggregated_report_data(organization, cycles, x_var, y_var, campus_only):
+    """
+    Same as get_report_data, except the chart data is the median x value of
+    the properties grouped by their y value: by use description, by decade of
+    the year built or by ranges of 100k of gross floor area.
+
+    :param y_var: str, one of AGGREGATED_Y_VARS
+    :return: list of dict, one per cycle, in the order of the cycles
+    """
+    views, has_data = _report_views(organization, cycles, x_var, y_var, campus_only)
+    yr_e = {cycle.id: cycle.end.strftime('%Y') for cycle in cycles}
+
+    if y_var == 'use_description':
+        bucket = Lower('report_y')
+
+        def label(use):
+            return use.capitalize()
+    elif y_var == 'year_built':
+        # integer division, e.g. 1995 -> 1990
+        bucket = ExpressionWrapper(F('report_y') / 10 * 10, output_field=models.IntegerField())
+
+        def label(decade):
+            return '%s-%s9' % (decade, str(decade)[:-1])  # 1990-1999
+    else:
+        # make sure anything greater than the biggest bin gets put in the biggest bin
+        bucket = Least(
+            Floor(F('report_y') / 100000) * 100000,
+            max(GROSS_FLOOR_AREA_BINS),
+            output_field=models.FloatField()
+        )
+
+        def label(range_floor):
+            return GROSS_FLOOR_AREA_BINS[int(range_floor)]
+
+    groups = views.filter(has_data).annotate(report_bucket=bucket).values(
+        'cycle_id', 'report_bucket'
+    ).annotate(
+        x=Median('report_x'),
+        first_id=Min('id'),
+    ).order_by('cycle_id', 'first_id')
+
+    chart_data = {}
+    for group in groups:
+        chart_data.setdefault(group['cycle_id'], []).append({
+            'x': group['x'],
+            'y': label(group['report_bucket']),
+            'yr_e': yr_e[group['cycle_id']],
+        })
+
+    return _cycle_results(cycles, views, has_data, chart_data)
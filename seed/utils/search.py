@@ -8,11 +8,18 @@ import operator
 import re
 from functools import reduce
 
-from django.db.models import Q
+from django.contrib.postgres.fields.jsonb import KeyTextTransform
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Case, F, FloatField, Q, When
+from django.db.models.functions import Cast
 from past.builtins import basestring
 
 SUFFIXES = ['__lt', '__gt', '__lte', '__gte', '__isnull']
 DATE_FIELDS = ['year_ending']
+NUMERIC_DATA_TYPES = ['number', 'float', 'double', 'integer', 'area', 'eui']
+STRING_DATA_TYPES = ['string', 'None']
+# extra_data values are text, only the ones that look like numbers are cast for numeric columns
+NUMERIC_TEXT_REGEX = r'^\s*-?[0-9]+(\.[0-9]+)?\s*$'
 
 
 def strip_suffix(k, suffix):
@@ -184,3 +191,115 @@ def parse_expression(k, parts):
         else:
             query_filters.append(q_object)
     return reduce(operator.and_, query_filters, Q())
+
+
+def parse_string_filter(k, q):
+    """
+    Parse a filter on a text field into a Q object, using the same grammar as the
+    inventory list filters (exact, empty, case insensitive, exclude and
+    expressions), defaulting to a case insensitive contains.
+    """
+    if is_empty_match(q):
+        return Q(**{k + '__isnull': True}) | Q(**{k: ''})
+    elif is_not_empty_match(q):
+        return ~(Q(**{k + '__isnull': True}) | Q(**{k: ''}))
+    elif is_exact_exclude_filter(q):
+        return ~Q(**{k: is_exact_exclude_filter(q).group(2)})
+    elif is_exact_match(q):
+        return Q(**{k: is_exact_match(q).group(2)})
+    elif is_case_insensitive_match(q):
+        return Q(**{k + '__iexact': is_case_insensitive_match(q).group(2)})
+    elif is_exclude_filter(q):
+        return ~Q(**{k + '__icontains': is_exclude_filter(q).group(1)})
+    elif is_string_expression(q):
+        return parse_expression(k, is_string_expression(q))
+    return Q(**{k + '__icontains': q})
+
+
+def parse_numeric_filter(k, q):
+    """
+    Parse a filter on a numeric field into a Q object. Either a number or
+    numeric expressions (e.g. '>10, <=20'), anything else is ignored.
+    """
+    parts = is_numeric_expression(q)
+    if parts:
+        parts = [(src, op, val if val == 'null' else float(val)) for src, op, val in parts]
+        return parse_expression(k, parts)
+
+    try:
+        return Q(**{k: float(q)})
+    except ValueError:
+        return Q()
+
+
+def filter_and_sort_inventory(views, params, columns):
+    """
+    Filter and sort a QuerySet of PropertyViews or TaxLotViews on the columns of their
+    -State, both the database fields and the extra_data keys, so that the database does
+    the work instead of the inventory list front end.
+
+    The filters are the params keyed by the name of a column (see Column.retrieve_all,
+    e.g. 'site_eui_12') with a value in the grammar of the inventory list filters. The
+    sorts are given in the 'order_by' param as a comma separated list of column names,
+    each optionally prefixed by '-' for a descending order. Unknown names and the
+    related columns are ignored. Quantities are compared in the units of the database.
+
+    :param views: QuerySet of PropertyViews or TaxLotViews
+    :param params: dict, e.g. request.query_params
+    :param columns: list of dict, columns from Column.retrieve_all for the inventory type
+    :return: QuerySet, always ordered, with the id as the last sort
+    """
+    StateClass = views.model._meta.get_field('state').related_model
+    columns = {c['name']: c for c in columns if not c['related']}
+
+    def field_for(column):
+        """returns the name to query, annotating the extra_data values as needed"""
+        nonlocal views
+        if not column['is_extra_data']:
+            try:
+                StateClass._meta.get_field(column['column_name'])
+            except FieldDoesNotExist:
+                return None
+            return 'state__' + column['column_name']
+
+        name = '_extra_data_{}'.format(column['id'])
+        if name not in views.query.annotations:
+            views = views.annotate(**{name: KeyTextTransform(column['column_name'], 'state__extra_data')})
+        if column['data_type'] not in NUMERIC_DATA_TYPES:
+            return name
+
+        number_name = name + '_number'
+        if number_name not in views.query.annotations:
+            views = views.annotate(**{number_name: Case(
+                When(**{name + '__regex': NUMERIC_TEXT_REGEX}, then=Cast(name, FloatField())),
+                default=None,
+                output_field=FloatField(),
+            )})
+        return number_name
+
+    for name, q in params.items():
+        if name not in columns or not is_string_query(q) or q == '':
+            continue
+        column = columns[name]
+        if column['data_type'] in NUMERIC_DATA_TYPES:
+            parse = parse_numeric_filter
+        elif column['is_extra_data'] or column['data_type'] in STRING_DATA_TYPES:
+            parse = parse_string_filter
+        else:
+            # dates, geometries, etc. can only be sorted
+            continue
+        field = field_for(column)
+        if field:
+            views = views.filter(parse(field, q))
+
+    order_by = []
+    for name in params.get('order_by', '').split(','):
+        descending = name.startswith('-')
+        column = columns.get(name.lstrip('-').strip())
+        if not column or column['data_type'] == 'geometry':
+            continue
+        field = field_for(column)
+        if field:
+            order_by.append(F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True))
+
+    return views.order_by(*order_by, 'id')
@@ -15,6 +15,7 @@ from rest_framework.filters import BaseFilterBackend
 from rest_framework.parsers import JSONParser, FormParser
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from seed import tasks
 from seed.decorators import ajax_request_class
 from seed.lib.superperms.orgs.decorators import has_perm_class
 from seed.lib.superperms.orgs.models import Organization
@@ -281,14 +282,16 @@ class ColumnViewSet(OrgValidateMixin, SEEDOrgCreateUpdateModelViewSet):
                 'message': 'You must specify the name of the new column as "new_column_name"'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        result = column.rename_column(new_column_name, overwrite)
+        result = column.check_rename_column(new_column_name, overwrite)
         if not result[0]:
             return JsonResponse({
                 'success': False,
                 'message': 'Unable to rename column with message: "%s"' % result[1]
             }, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return JsonResponse({
-                'success': True,
-                'message': result[1]
-            })
+
+        # the data are moved in the background, the result is in the progress data
+        progress_data = tasks.rename_column(column.pk, new_column_name, overwrite)
+        return JsonResponse({
+            'success': True,
+            'progress_key': progress_data['progress_key'],
+        })
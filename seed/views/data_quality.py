@@ -25,7 +25,7 @@ from seed.models.data_quality import (
     DataQualityCheck,
 )
 from seed.utils.api import api_endpoint_class
-from seed.utils.cache import get_cache_raw
+from seed.utils.pagination import paginate_list
 
 logger = get_task_logger(__name__)
 
@@ -159,7 +159,7 @@ class DataQualityViews(viewsets.ViewSet):
               required: true
               paramType: path
         """
-        data_quality_results = get_cache_raw(DataQualityCheck.cache_key(pk))
+        data_quality_results = DataQualityCheck.get_results(pk)
         response = HttpResponse(content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename="Data Quality Check Results.csv"'
 
@@ -463,7 +463,18 @@ class DataQualityViews(viewsets.ViewSet):
         Organization.objects.get(pk=request.query_params['organization_id'])
 
         data_quality_id = request.query_params['data_quality_id']
-        data_quality_results = get_cache_raw(DataQualityCheck.cache_key(data_quality_id))
+        data_quality_results = DataQualityCheck.get_results(data_quality_id)
+
+        # the results are only paginated when a page is requested
+        page = request.query_params.get('page')
+        if page is None or data_quality_results is None:
+            return JsonResponse({
+                'data': data_quality_results
+            })
+
+        data_quality_results, pagination = paginate_list(
+            data_quality_results, page, request.query_params.get('per_page', 100))
         return JsonResponse({
-            'data': data_quality_results
+            'data': data_quality_results,
+            'pagination': pagination
         })
@@ -38,6 +38,7 @@ from seed.utils.api import api_endpoint_class
 from seed.utils.match import (
     whole_org_match_merge_link,
     matching_criteria_column_names,
+    start_whole_org_match_merge_link,
 )
 from seed.utils.organizations import create_organization, create_suborganization
 from seed.utils.cache import get_cache_raw, set_cache_raw
@@ -241,10 +242,19 @@ class OrganizationViewSet(viewsets.ViewSet):
         progress_data = ProgressData(func_name='org_match_merge_link', unique_id=identifier)
         progress_data.delete()
 
-        whole_org_match_merge_link.apply_async(
-            args=(org_id, state_class_name, proposed_columns),
-            link=cache_match_merge_link_result.s(identifier, progress_data.key)
-        )
+        if proposed_columns:
+            # a preview is rolled back, so it runs as a whole in one transaction
+            whole_org_match_merge_link.apply_async(
+                args=(org_id, state_class_name, proposed_columns),
+                link=cache_match_merge_link_result.s(identifier, progress_data.key)
+            )
+        else:
+            start_whole_org_match_merge_link(
+                org_id,
+                state_class_name,
+                progress_data.key,
+                cache_match_merge_link_result.s(identifier, progress_data.key)
+            )
 
         return progress_data.key
 
@@ -72,6 +72,7 @@ from seed.utils.properties import (
     properties_across_cycles,
 )
 from seed.utils.merge import merge_properties
+from seed.utils.search import filter_and_sort_inventory
 from seed.utils.viewsets import (
     SEEDOrgCreateUpdateModelViewSet,
     SEEDOrgModelViewSet
@@ -249,6 +250,12 @@ class PropertyViewSet(ViewSet, ProfileIdMixin):
                 .filter(property__organization_id=org_id, cycle=cycle) \
                 .order_by('id')  # TODO: test adding .only(*fields['PropertyState'])
 
+        # Retrieve all the columns that are in the db for this organization
+        columns_from_database = Column.retrieve_all(org_id, 'property', False)
+
+        # Filter and sort on the columns given in the query parameters
+        property_views_list = filter_and_sort_inventory(property_views_list, request.query_params, columns_from_database)
+
         paginator = Paginator(property_views_list, per_page)
 
         try:
@@ -263,9 +270,6 @@ class PropertyViewSet(ViewSet, ProfileIdMixin):
 
         org = Organization.objects.get(pk=org_id)
 
-        # Retrieve all the columns that are in the db for this organization
-        columns_from_database = Column.retrieve_all(org_id, 'property', False)
-
         # This uses an old method of returning the show_columns. There is a new method that
         # is preferred in v2.1 API with the ProfileIdMixin.
         if profile_id is None:
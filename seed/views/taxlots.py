@@ -62,6 +62,7 @@ from seed.utils.properties import (
     pair_unpair_property_taxlot,
     update_result_with_master
 )
+from seed.utils.search import filter_and_sort_inventory
 from seed.utils.taxlots import taxlots_across_cycles
 
 # Global toggle that controls whether or not to display the raw extra
@@ -114,6 +115,12 @@ class TaxLotViewSet(ViewSet, ProfileIdMixin):
                 .filter(taxlot__organization_id=org_id, cycle=cycle) \
                 .order_by('id')
 
+        # Retrieve all the columns that are in the db for this organization
+        columns_from_database = Column.retrieve_all(org_id, 'taxlot', False)
+
+        # Filter and sort on the columns given in the query parameters
+        taxlot_views_list = filter_and_sort_inventory(taxlot_views_list, request.query_params, columns_from_database)
+
         paginator = Paginator(taxlot_views_list, per_page)
 
         try:
@@ -128,9 +135,6 @@ class TaxLotViewSet(ViewSet, ProfileIdMixin):
 
         org = Organization.objects.get(pk=org_id)
 
-        # Retrieve all the columns that are in the db for this organization
-        columns_from_database = Column.retrieve_all(org_id, 'taxlot', False)
-
         # This uses an old method of returning the show_columns. There is a new method that
         # is preferred in v2.1 API with the ProfileIdMixin.
         if profile_id is None:
@@ -24,6 +24,7 @@ from seed.lib.superperms.orgs.models import (
     ROLE_VIEWER,
     Organization,
     OrganizationUser,
+    invalidate_org_context,
 )
 from seed.models.data_quality import Rule
 from seed.tasks import (
@@ -222,6 +223,8 @@ class UserViewSet(viewsets.ViewSet):
                 organization_id=org.pk,
                 user_id=user.pk
             ).update(role_level=_get_role_from_js(role))
+            # the update does not send the signals that invalidate the cached permissions
+            invalidate_org_context(org.pk)
 
         if created:
             user.set_unusable_password()
@@ -342,6 +345,8 @@ class UserViewSet(viewsets.ViewSet):
             user_id=user_id,
             organization_id=body['organization_id']
         ).update(role_level=role)
+        # the update does not send the signals that invalidate the cached permissions
+        invalidate_org_context(body['organization_id'])
 
         return JsonResponse({'status': 'success'})
 
@@ -249,7 +249,7 @@ class ColumnMappingProfileViewSet(OrgMixin, ViewSet):
 
             suggested_mappings = mapper.build_column_mapping(
                 raw_headers,
-                Column.retrieve_all_by_tuple(org_id),
+                Column.retrieve_match_index(org_id),
                 previous_mapping=None,
                 map_args=None,
                 thresh=80  # percentage match that we require. 80% is random value for now.
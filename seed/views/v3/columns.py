@@ -13,14 +13,14 @@ from rest_framework import status
 from rest_framework.parsers import JSONParser, FormParser
 from rest_framework.renderers import JSONRenderer
 
+from seed import tasks
 from seed.decorators import ajax_request_class
-from seed.lib.superperms.orgs.decorators import has_perm_class
+from seed.lib.superperms.orgs.decorators import get_request_org, has_perm_class
 from rest_framework.decorators import action
 from seed.models import (
     Column,
     ColumnMapping,
     DATA_STATE_MATCHING,
-    Organization,
     PropertyState,
     TaxLotState,
 )
@@ -102,7 +102,7 @@ class ColumnViewSet(OrgValidateMixin, SEEDOrgNoPatchOrOrgCreateModelViewSet, Org
         inventory_type = request.query_params.get('inventory_type', 'property')
         only_used = json.loads(request.query_params.get('only_used', 'false'))
         columns = Column.retrieve_all(organization_id, inventory_type, only_used)
-        organization = Organization.objects.get(pk=organization_id)
+        organization = get_request_org(request, organization_id)
         if json.loads(request.query_params.get('display_units', 'true')):
             columns = [add_pint_unit_suffix(organization, x) for x in columns]
         return JsonResponse({
@@ -243,17 +243,19 @@ class ColumnViewSet(OrgValidateMixin, SEEDOrgNoPatchOrOrgCreateModelViewSet, Org
                 'message': 'You must specify the name of the new column as "new_column_name"'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        result = column.rename_column(new_column_name, overwrite)
+        result = column.check_rename_column(new_column_name, overwrite)
         if not result[0]:
             return JsonResponse({
                 'success': False,
                 'message': 'Unable to rename column with message: "%s"' % result[1]
             }, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return JsonResponse({
-                'success': True,
-                'message': result[1]
-            })
+
+        # the data are moved in the background, the result is in the progress data
+        progress_data = tasks.rename_column(column.pk, new_column_name, overwrite)
+        return JsonResponse({
+            'success': True,
+            'progress_key': progress_data['progress_key'],
+        })
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -21,7 +21,7 @@ from seed.models.data_quality import DataQualityCheck
 from seed.models import PropertyView, TaxLotView
 from seed.utils.api import api_endpoint_class
 from seed.utils.api_schema import AutoSchemaHelper
-from seed.utils.cache import get_cache_raw
+from seed.utils.pagination import paginate_list
 
 logger = get_task_logger(__name__)
 
@@ -121,7 +121,7 @@ class DataQualityCheckViewSet(viewsets.ViewSet):
                 'message': 'must include Import file ID or cache key as run_id'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        data_quality_results = get_cache_raw(DataQualityCheck.cache_key(run_id))
+        data_quality_results = DataQualityCheck.get_results(run_id)
         response = HttpResponse(content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename="Data Quality Check Results.csv"'
 
@@ -157,6 +157,8 @@ class DataQualityCheckViewSet(viewsets.ViewSet):
         manual_parameters=[
             AutoSchemaHelper.query_org_id_field(),
             AutoSchemaHelper.query_integer_field("run_id", True, "Import file ID or cache key"),
+            AutoSchemaHelper.query_integer_field("page", False, "Page of results, all the results if not given"),
+            AutoSchemaHelper.query_integer_field("per_page", False, "Number of results per page, defaults to 100"),
         ]
     )
     @api_endpoint_class
@@ -172,7 +174,18 @@ class DataQualityCheckViewSet(viewsets.ViewSet):
         are stored in redis!
         """
         data_quality_id = request.query_params['run_id']
-        data_quality_results = get_cache_raw(DataQualityCheck.cache_key(data_quality_id))
+        data_quality_results = DataQualityCheck.get_results(data_quality_id)
+
+        # the results are only paginated when a page is requested
+        page = request.query_params.get('page')
+        if page is None or data_quality_results is None:
+            return JsonResponse({
+                'data': data_quality_results
+            })
+
+        data_quality_results, pagination = paginate_list(
+            data_quality_results, page, request.query_params.get('per_page', 100))
         return JsonResponse({
-            'data': data_quality_results
+            'data': data_quality_results,
+            'pagination': pagination
         })
@@ -15,7 +15,7 @@ from rest_framework.decorators import action
 
 from seed.data_importer.models import ImportRecord
 from seed.decorators import ajax_request_class, require_organization_id_class
-from seed.lib.superperms.orgs.decorators import has_perm_class
+from seed.lib.superperms.orgs.decorators import get_request_org, has_perm_class
 from seed.lib.superperms.orgs.models import Organization, OrganizationUser
 from seed.models import obj_to_dict
 from seed.utils.api import api_endpoint_class
@@ -40,7 +40,7 @@ class DatasetViewSet(viewsets.ViewSet):
         """
 
         org_id = request.query_params.get('organization_id', None)
-        org = Organization.objects.get(pk=org_id)
+        org = get_request_org(request, org_id)
         datasets = []
         for d in ImportRecord.objects.filter(super_organization=org):
             importfiles = [obj_to_dict(f) for f in d.files]
@@ -212,7 +212,7 @@ class DatasetViewSet(viewsets.ViewSet):
         org_id = int(request.query_params.get('organization_id', None))
 
         try:
-            org = Organization.objects.get(pk=org_id)
+            org = get_request_org(request, org_id)
         except Organization.DoesNotExist:
             return JsonResponse({'status': 'error', 'message': 'organization_id not provided'},
                                 status=status.HTTP_400_BAD_REQUEST)
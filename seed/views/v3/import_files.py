@@ -11,6 +11,7 @@ from django.http import JsonResponse
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import serializers, status, viewsets
 from rest_framework.decorators import action
+from seed.data_importer.match import geocoding_results
 from seed.data_importer.meters_parser import MetersParser
 from seed.data_importer.models import ROW_DELIMITER, ImportRecord
 from seed.data_importer.tasks import do_checks
@@ -20,22 +21,19 @@ from seed.data_importer.tasks import save_raw_data as task_save_raw
 from seed.data_importer.tasks import \
     validate_use_cases as task_validate_use_cases
 from seed.decorators import ajax_request_class
-from seed.lib.mappings import mapper as simple_mapper
-from seed.lib.mcm import mapper, reader
-from seed.lib.superperms.orgs.decorators import has_perm_class
+from seed.lib.mcm import reader
+from seed.lib.superperms.orgs.decorators import get_request_org, has_perm_class
 from seed.lib.superperms.orgs.models import OrganizationUser
-from seed.lib.xml_mapping import mapper as xml_mapper
-from seed.models import (AUDIT_USER_EDIT, DATA_STATE_MAPPING,
-                         DATA_STATE_MATCHING, MERGE_STATE_MERGED,
+from seed.models import (DATA_STATE_MAPPING, DATA_STATE_MATCHING,
                          MERGE_STATE_NEW, MERGE_STATE_UNKNOWN, Column, Cycle,
-                         ImportFile, Meter, Organization, PropertyAuditLog,
-                         PropertyState, PropertyView, TaxLotAuditLog,
-                         TaxLotProperty, TaxLotState, get_column_mapping,
+                         ImportFile, Meter, PropertyState,
+                         PropertyView, TaxLotProperty, TaxLotState,
                          obj_to_dict)
 from seed.serializers.pint import apply_display_unit_preferences
 from seed.utils.api import api_endpoint_class
 from seed.utils.api_schema import (AutoSchemaHelper,
                                    swagger_auto_schema_org_query_param)
+from seed.utils.mapping import get_mapping_suggestions
 
 _log = logging.getLogger(__name__)
 
@@ -237,7 +235,7 @@ class ImportFileViewSet(viewsets.ViewSet):
         """
         import_file_id = pk
         org_id = request.query_params.get('organization_id', None)
-        org = Organization.objects.get(pk=org_id)
+        org = get_request_org(request, org_id)
 
         try:
             # get the field names that were in the mapping
@@ -615,136 +613,43 @@ class ImportFileViewSet(viewsets.ViewSet):
                 {'status': 'error', 'message': 'Could not find import file with pk=' + str(
                     pk)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # property views associated with this imported file (including merges)
-        properties_new = []
-        properties_matched = list(PropertyState.objects.filter(
-            import_file__pk=import_file.pk,
-            data_state=DATA_STATE_MATCHING,
-            merge_state=MERGE_STATE_MERGED,
-        ).values_list('id', flat=True))
-
-        # Check audit log in case PropertyStates are listed as "new" but were merged into a different property
-        properties = list(PropertyState.objects.filter(
-            import_file__pk=import_file.pk,
-            data_state=DATA_STATE_MATCHING,
-            merge_state=MERGE_STATE_NEW,
-        ))
-
-        for state in properties:
-            audit_creation_id = PropertyAuditLog.objects.only('id').exclude(
-                import_filename=None).get(
-                state_id=state.id,
-                name='Import Creation'
-            )
-            if PropertyAuditLog.objects.exclude(record_type=AUDIT_USER_EDIT).filter(
-                parent1_id=audit_creation_id
-            ).exists():
-                properties_matched.append(state.id)
-            else:
-                properties_new.append(state.id)
-
-        tax_lots_new = []
-        tax_lots_matched = list(TaxLotState.objects.only('id').filter(
-            import_file__pk=import_file.pk,
-            data_state=DATA_STATE_MATCHING,
-            merge_state=MERGE_STATE_MERGED,
-        ).values_list('id', flat=True))
-
-        # Check audit log in case TaxLotStates are listed as "new" but were merged into a different tax lot
-        taxlots = list(TaxLotState.objects.filter(
-            import_file__pk=import_file.pk,
-            data_state=DATA_STATE_MATCHING,
-            merge_state=MERGE_STATE_NEW,
-        ))
-
-        for state in taxlots:
-            audit_creation_id = TaxLotAuditLog.objects.only('id').exclude(import_filename=None).get(
-                state_id=state.id,
-                name='Import Creation'
-            )
-            if TaxLotAuditLog.objects.exclude(record_type=AUDIT_USER_EDIT).filter(
-                parent1_id=audit_creation_id
-            ).exists():
-                tax_lots_matched.append(state.id)
-            else:
-                tax_lots_new.append(state.id)
-
-        # Construct Geocode Results
-        property_geocode_results = {
-            'high_confidence': len(PropertyState.objects.filter(
-                import_file__pk=import_file.pk,
-                data_state=DATA_STATE_MATCHING,
-                geocoding_confidence__startswith='High'
-            )),
-            'low_confidence': len(PropertyState.objects.filter(
-                import_file__pk=import_file.pk,
-                data_state=DATA_STATE_MATCHING,
-                geocoding_confidence__startswith='Low'
-            )),
-            'manual': len(PropertyState.objects.filter(
-                import_file__pk=import_file.pk,
-                data_state=DATA_STATE_MATCHING,
-                geocoding_confidence='Manually geocoded (N/A)'
-            )),
-            'missing_address_components': len(PropertyState.objects.filter(
-                import_file__pk=import_file.pk,
-                data_state=DATA_STATE_MATCHING,
-                geocoding_confidence='Missing address components (N/A)'
-            )),
-        }
-
-        tax_lot_geocode_results = {
-            'high_confidence': len(TaxLotState.objects.filter(
-                import_file__pk=import_file.pk,
-                data_state=DATA_STATE_MATCHING,
-                geocoding_confidence__startswith='High'
-            )),
-            'low_confidence': len(TaxLotState.objects.filter(
-                import_file__pk=import_file.pk,
-                data_state=DATA_STATE_MATCHING,
-                geocoding_confidence__startswith='Low'
-            )),
-            'manual': len(TaxLotState.objects.filter(
-                import_file__pk=import_file.pk,
-                data_state=DATA_STATE_MATCHING,
-                geocoding_confidence='Manually geocoded (N/A)'
-            )),
-            'missing_address_components': len(TaxLotState.objects.filter(
-                import_file__pk=import_file.pk,
-                data_state=DATA_STATE_MATCHING,
-                geocoding_confidence='Missing address components (N/A)'
-            )),
-        }
+        results = import_file.matching_results_data
+        if 'property_geocoded_high_confidence' not in results:
+            # the import file was matched before match_and_link_incoming_properties_and_taxlots
+            # counted its geocoding results, or it is an import of additional models
+            results = dict(results)
+            results.update(geocoding_results(import_file.pk, PropertyState))
+            results.update(geocoding_results(import_file.pk, TaxLotState))
 
         # merge in any of the matching results from the JSON field
         return {
             'status': 'success',
-            'import_file_records': import_file.matching_results_data.get('import_file_records', None),
+            'import_file_records': results.get('import_file_records', None),
             'properties': {
-                'initial_incoming': import_file.matching_results_data.get('property_initial_incoming', None),
-                'duplicates_against_existing': import_file.matching_results_data.get('property_duplicates_against_existing', None),
-                'duplicates_within_file': import_file.matching_results_data.get('property_duplicates_within_file', None),
-                'merges_against_existing': import_file.matching_results_data.get('property_merges_against_existing', None),
-                'merges_between_existing': import_file.matching_results_data.get('property_merges_between_existing', None),
-                'merges_within_file': import_file.matching_results_data.get('property_merges_within_file', None),
-                'new': import_file.matching_results_data.get('property_new', None),
-                'geocoded_high_confidence': property_geocode_results.get('high_confidence'),
-                'geocoded_low_confidence': property_geocode_results.get('low_confidence'),
-                'geocoded_manually': property_geocode_results.get('manual'),
-                'geocode_not_possible': property_geocode_results.get('missing_address_components'),
+                'initial_incoming': results.get('property_initial_incoming', None),
+                'duplicates_against_existing': results.get('property_duplicates_against_existing', None),
+                'duplicates_within_file': results.get('property_duplicates_within_file', None),
+                'merges_against_existing': results.get('property_merges_against_existing', None),
+                'merges_between_existing': results.get('property_merges_between_existing', None),
+                'merges_within_file': results.get('property_merges_within_file', None),
+                'new': results.get('property_new', None),
+                'geocoded_high_confidence': results.get('property_geocoded_high_confidence'),
+                'geocoded_low_confidence': results.get('property_geocoded_low_confidence'),
+                'geocoded_manually': results.get('property_geocoded_manually'),
+                'geocode_not_possible': results.get('property_geocode_not_possible'),
             },
             'tax_lots': {
-                'initial_incoming': import_file.matching_results_data.get('tax_lot_initial_incoming', None),
-                'duplicates_against_existing': import_file.matching_results_data.get('tax_lot_duplicates_against_existing', None),
-                'duplicates_within_file': import_file.matching_results_data.get('tax_lot_duplicates_within_file', None),
-                'merges_against_existing': import_file.matching_results_data.get('tax_lot_merges_against_existing', None),
-                'merges_between_existing': import_file.matching_results_data.get('tax_lot_merges_between_existing', None),
-                'merges_within_file': import_file.matching_results_data.get('tax_lot_merges_within_file', None),
-                'new': import_file.matching_results_data.get('tax_lot_new', None),
-                'geocoded_high_confidence': tax_lot_geocode_results.get('high_confidence'),
-                'geocoded_low_confidence': tax_lot_geocode_results.get('low_confidence'),
-                'geocoded_manually': tax_lot_geocode_results.get('manual'),
-                'geocode_not_possible': tax_lot_geocode_results.get('missing_address_components'),
+                'initial_incoming': results.get('tax_lot_initial_incoming', None),
+                'duplicates_against_existing': results.get('tax_lot_duplicates_against_existing', None),
+                'duplicates_within_file': results.get('tax_lot_duplicates_within_file', None),
+                'merges_against_existing': results.get('tax_lot_merges_against_existing', None),
+                'merges_between_existing': results.get('tax_lot_merges_between_existing', None),
+                'merges_within_file': results.get('tax_lot_merges_within_file', None),
+                'new': results.get('tax_lot_new', None),
+                'geocoded_high_confidence': results.get('tax_lot_geocoded_high_confidence'),
+                'geocoded_low_confidence': results.get('tax_lot_geocoded_low_confidence'),
+                'geocoded_manually': results.get('tax_lot_geocoded_manually'),
+                'geocode_not_possible': results.get('tax_lot_geocode_not_possible'),
             }
         }
 
@@ -785,53 +690,7 @@ class ImportFileViewSet(viewsets.ViewSet):
         property_columns = Column.retrieve_mapping_columns(organization.pk, 'property')
         taxlot_columns = Column.retrieve_mapping_columns(organization.pk, 'taxlot')
 
-        # If this is a portfolio manager file, then load in the PM mappings and if the column_mappings
-        # are not in the original mappings, default to PM
-        if import_file.from_portfolio_manager:
-            pm_mappings = simple_mapper.get_pm_mapping(import_file.first_row_columns,
-                                                       resolve_duplicates=True)
-            suggested_mappings = mapper.build_column_mapping(
-                import_file.first_row_columns,
-                Column.retrieve_all_by_tuple(organization_id),
-                previous_mapping=get_column_mapping,
-                map_args=[organization],
-                default_mappings=pm_mappings,
-                thresh=80
-            )
-        elif import_file.from_buildingsync:
-            bsync_mappings = xml_mapper.build_column_mapping()
-            suggested_mappings = mapper.build_column_mapping(
-                import_file.first_row_columns,
-                Column.retrieve_all_by_tuple(organization_id),
-                previous_mapping=get_column_mapping,
-                map_args=[organization],
-                default_mappings=bsync_mappings,
-                thresh=80
-            )
-        else:
-            # All other input types
-            suggested_mappings = mapper.build_column_mapping(
-                import_file.first_row_columns,
-                Column.retrieve_all_by_tuple(organization.pk),
-                previous_mapping=get_column_mapping,
-                map_args=[organization],
-                thresh=80  # percentage match that we require. 80% is random value for now.
-            )
-            # replace None with empty string for column names and PropertyState for tables
-            # TODO #239: Move this fix to build_column_mapping
-            for m in suggested_mappings:
-                table, destination_field, _confidence = suggested_mappings[m]
-                if destination_field is None:
-                    suggested_mappings[m][1] = ''
-
-        # Fix the table name, eventually move this to the build_column_mapping
-        for m in suggested_mappings:
-            table, _destination_field, _confidence = suggested_mappings[m]
-            # Do not return the campus, created, updated fields... that is force them to be in the property state
-            if not table or table == 'Property':
-                suggested_mappings[m][0] = 'PropertyState'
-            elif table == 'TaxLot':
-                suggested_mappings[m][0] = 'TaxLotState'
+        suggested_mappings = get_mapping_suggestions(import_file, organization)
 
         result['suggested_column_mappings'] = suggested_mappings
         result['property_columns'] = property_columns
@@ -10,7 +10,7 @@ from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from seed.decorators import ajax_request_class
 from seed.landing.models import SEEDUser as User
-from seed.lib.superperms.orgs.decorators import has_perm_class
+from seed.lib.superperms.orgs.decorators import get_request_org, has_perm_class
 from seed.lib.superperms.orgs.models import (ROLE_OWNER,
                                              Organization,
                                              OrganizationUser)
@@ -29,7 +29,7 @@ class OrganizationUserViewSet(viewsets.ViewSet):
         Retrieve all users belonging to an org.
         """
         try:
-            org = Organization.objects.get(pk=organization_pk)
+            org = get_request_org(request, organization_pk)
         except ObjectDoesNotExist:
             return JsonResponse({'status': 'error',
                                  'message': 'Could not retrieve organization at organization_pk = ' + str(organization_pk)},
@@ -59,7 +59,7 @@ class OrganizationUserViewSet(viewsets.ViewSet):
         """
         Adds an existing user to an organization.
         """
-        org = Organization.objects.get(pk=organization_pk)
+        org = get_request_org(request, organization_pk)
         user = User.objects.get(pk=pk)
 
         _orguser, status = org.add_member(user)
@@ -85,7 +85,7 @@ class OrganizationUserViewSet(viewsets.ViewSet):
         Removes a user from an organization and deletes orphaned users.
         """
         try:
-            org = Organization.objects.get(pk=organization_pk)
+            org = get_request_org(request, organization_pk)
         except Organization.DoesNotExist:
             return JsonResponse({
                 'status': 'error',
@@ -6,7 +6,6 @@
 
 import json
 import logging
-from collections import defaultdict
 from io import BytesIO
 from random import randint
 
@@ -28,7 +27,7 @@ from seed import tasks
 from seed.decorators import ajax_request_class
 from seed.landing.models import SEEDUser as User
 from seed.lib.progress_data.progress_data import ProgressData
-from seed.lib.superperms.orgs.decorators import has_perm_class
+from seed.lib.superperms.orgs.decorators import get_request_org, has_perm_class
 from seed.lib.superperms.orgs.models import (ROLE_MEMBER, ROLE_OWNER,
                                              ROLE_VIEWER, Organization,
                                              OrganizationUser)
@@ -37,15 +36,16 @@ from seed.serializers.column_mappings import \
     SaveColumnMappingsRequestPayloadSerializer
 from seed.serializers.organizations import (SaveSettingsSerializer,
                                             SharedFieldsReturnSerializer)
-from seed.serializers.pint import apply_display_unit_preferences
 from seed.utils.api import api_endpoint_class
 from seed.utils.api_schema import AutoSchemaHelper
 from seed.utils.cache import get_cache_raw, set_cache_raw
-from seed.utils.generic import median, round_down_hundred_thousand
 from seed.utils.match import (matching_criteria_column_names,
+                              start_whole_org_match_merge_link,
                               whole_org_match_merge_link)
 from seed.utils.organizations import (create_organization,
                                       create_suborganization)
+from seed.utils.reports import (AGGREGATED_Y_VARS, get_aggregated_report_data,
+                                get_report_data)
 from xlsxwriter import Workbook
 
 _log = logging.getLogger(__name__)
@@ -206,7 +206,7 @@ class OrganizationViewSet(viewsets.ViewSet):
                 required: true
         """
         try:
-            org = Organization.objects.get(pk=pk)
+            org = get_request_org(request, pk)
             c_count, cm_count = Column.delete_all(org)
             return JsonResponse(
                 {
@@ -253,7 +253,7 @@ class OrganizationViewSet(viewsets.ViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
         try:
             _ = ImportFile.objects.get(pk=import_file_id)
-            organization = Organization.objects.get(pk=pk)
+            organization = get_request_org(request, pk)
         except ImportFile.DoesNotExist:
             return JsonResponse({
                 'status': 'error',
@@ -285,10 +285,19 @@ class OrganizationViewSet(viewsets.ViewSet):
         progress_data = ProgressData(func_name='org_match_merge_link', unique_id=identifier)
         progress_data.delete()
 
-        whole_org_match_merge_link.apply_async(
-            args=(org_id, state_class_name, proposed_columns),
-            link=cache_match_merge_link_result.s(identifier, progress_data.key)
-        )
+        if proposed_columns:
+            # a preview is rolled back, so it runs as a whole in one transaction
+            whole_org_match_merge_link.apply_async(
+                args=(org_id, state_class_name, proposed_columns),
+                link=cache_match_merge_link_result.s(identifier, progress_data.key)
+            )
+        else:
+            start_whole_org_match_merge_link(
+                org_id,
+                state_class_name,
+                progress_data.key,
+                cache_match_merge_link_result.s(identifier, progress_data.key)
+            )
 
         return progress_data.key
 
@@ -366,7 +375,7 @@ class OrganizationViewSet(viewsets.ViewSet):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            org = Organization.objects.get(pk=org_id)
+            org = get_request_org(request, org_id)
         except Organization.DoesNotExist:
             return JsonResponse({
                 'status': 'error',
@@ -452,7 +461,7 @@ class OrganizationViewSet(viewsets.ViewSet):
         Saves an organization's settings: name, query threshold, shared fields, etc
         """
         body = request.data
-        org = Organization.objects.get(pk=pk)
+        org = get_request_org(request, pk)
         posted_org = body.get('organization', None)
         if posted_org is None:
             return JsonResponse({'status': 'error', 'message': 'malformed request'},
@@ -553,7 +562,7 @@ class OrganizationViewSet(viewsets.ViewSet):
         from orgs they do not belong to, or else buildings from orgs they
         don't belong to will be removed from the results.
         """
-        org = Organization.objects.get(pk=pk)
+        org = get_request_org(request, pk)
         return JsonResponse({
             'status': 'success',
             'query_threshold': org.query_threshold
@@ -612,7 +621,7 @@ class OrganizationViewSet(viewsets.ViewSet):
         Creates a child org of a parent org.
         """
         body = request.data
-        org = Organization.objects.get(pk=pk)
+        org = get_request_org(request, pk)
         email = body['sub_org_owner_email'].lower()
         try:
             user = User.objects.get(username=email)
@@ -644,7 +653,7 @@ class OrganizationViewSet(viewsets.ViewSet):
         Retrieve all matching criteria columns for an org.
         """
         try:
-            org = Organization.objects.get(pk=pk)
+            org = get_request_org(request, pk)
         except ObjectDoesNotExist:
             return JsonResponse({'status': 'error',
                                  'message': 'Could not retrieve organization at pk = ' + str(pk)},
@@ -685,7 +694,7 @@ class OrganizationViewSet(viewsets.ViewSet):
                                 status=status.HTTP_404_NOT_FOUND)
 
         try:
-            org = Organization.objects.get(pk=pk)
+            org = get_request_org(request, pk)
         except ObjectDoesNotExist:
             return JsonResponse({'status': 'error',
                                  'message': 'Could not retrieve organization at pk = ' + str(pk)},
@@ -726,7 +735,7 @@ class OrganizationViewSet(viewsets.ViewSet):
                                 status=status.HTTP_404_NOT_FOUND)
 
         try:
-            org = Organization.objects.get(pk=pk)
+            org = get_request_org(request, pk)
         except ObjectDoesNotExist:
             return JsonResponse({'status': 'error',
                                  'message': 'Could not retrieve organization at pk = ' + str(pk)},
@@ -768,7 +777,7 @@ class OrganizationViewSet(viewsets.ViewSet):
     @action(detail=True, methods=['GET'])
     def match_merge_link_result(self, request, pk=None):
         try:
-            Organization.objects.get(pk=pk)
+            get_request_org(request, pk)
         except ObjectDoesNotExist:
             return JsonResponse({'status': 'error',
                                  'message': 'Could not retrieve organization at pk = ' + str(pk)},
@@ -789,7 +798,7 @@ class OrganizationViewSet(viewsets.ViewSet):
         Retrieve all geocoding columns for an org.
         """
         try:
-            org = Organization.objects.get(pk=pk)
+            org = get_request_org(request, pk)
         except ObjectDoesNotExist:
             return JsonResponse({'status': 'error',
                                  'message': 'Could not retrieve organization at pk = ' + str(pk)},
@@ -839,61 +848,6 @@ class OrganizationViewSet(viewsets.ViewSet):
             organization_id=organization_id
         ).order_by('start')
 
-    def get_data(self, property_view, x_var, y_var):
-        result = None
-        state = property_view.state
-        if getattr(state, x_var, None) and getattr(state, y_var, None):
-            result = {
-                "id": property_view.property_id,
-                "x": getattr(state, x_var),
-                "y": getattr(state, y_var),
-            }
-        return result
-
-    def get_raw_report_data(self, organization_id, cycles, x_var, y_var,
-                            campus_only):
-        all_property_views = PropertyView.objects.select_related(
-            'property', 'state'
-        ).filter(
-            property__organization_id=organization_id,
-            cycle_id__in=cycles
-        ).order_by('id')
-        organization = Organization.objects.get(pk=organization_id)
-        results = []
-        for cycle in cycles:
-            property_views = all_property_views.filter(cycle_id=cycle)
-            count_total = []
-            count_with_data = []
-            data = []
-            for property_view in property_views:
-                property_pk = property_view.property_id
-                if property_view.property.campus and campus_only:
-                    count_total.append(property_pk)
-                    result = self.get_data(property_view, x_var, y_var)
-                    if result:
-                        result['yr_e'] = cycle.end.strftime('%Y')
-                        data.append(result)
-                        count_with_data.append(property_pk)
-                elif not property_view.property.campus:
-                    count_total.append(property_pk)
-                    result = self.get_data(property_view, x_var, y_var)
-                    if result:
-                        result['yr_e'] = cycle.end.strftime('%Y')
-                        de_unitted_result = apply_display_unit_preferences(organization, result)
-                        data.append(de_unitted_result)
-                        count_with_data.append(property_pk)
-            result = {
-                "cycle_id": cycle.pk,
-                "chart_data": data,
-                "property_counts": {
-                    "yr_e": cycle.end.strftime('%Y'),
-                    "num_properties": len(count_total),
-                    "num_properties_w-data": len(count_with_data),
-                },
-            }
-            results.append(result)
-        return results
-
     @swagger_auto_schema(
         manual_parameters=[
             AutoSchemaHelper.query_string_field(
@@ -950,13 +904,10 @@ class OrganizationViewSet(viewsets.ViewSet):
             result = {'status': 'error', 'message': error}
         else:
             cycles = self.get_cycles(params['start'], params['end'], pk)
-            data = self.get_raw_report_data(
-                pk, cycles,
+            data = get_report_data(
+                get_request_org(request, pk), cycles,
                 params['x_var'], params['y_var'], campus_only
             )
-            for datum in data:
-                if datum['property_counts']['num_properties_w-data'] != 0:
-                    break
             property_counts = []
             chart_data = []
             for datum in data:
@@ -1008,7 +959,7 @@ class OrganizationViewSet(viewsets.ViewSet):
         Retrieve a summary report for charting x vs y aggregated by y_var
         """
         campus_only = json.loads(request.query_params.get('campus_only', 'false'))
-        valid_y_values = ['gross_floor_area', 'use_description', 'year_built']
+        valid_y_values = AGGREGATED_Y_VARS
         params = {}
         missing_params = []
         empty = True
@@ -1034,8 +985,8 @@ class OrganizationViewSet(viewsets.ViewSet):
             cycles = self.get_cycles(params['start'], params['end'], pk)
             x_var = params['x_var']
             y_var = params['y_var']
-            data = self.get_raw_report_data(
-                pk, cycles, x_var, y_var,
+            data = get_aggregated_report_data(
+                get_request_org(request, pk), cycles, x_var, y_var,
                 campus_only
             )
             for datum in data:
@@ -1049,9 +1000,7 @@ class OrganizationViewSet(viewsets.ViewSet):
             chart_data = []
             property_counts = []
             for datum in data:
-                buildings = datum['chart_data']
-                yr_e = datum['property_counts']['yr_e']
-                chart_data.extend(self.aggregate_data(yr_e, y_var, buildings)),
+                chart_data.extend(datum['chart_data'])
                 property_counts.append(datum['property_counts'])
             # Send back to client
             aggregated_data = {
@@ -1065,87 +1014,6 @@ class OrganizationViewSet(viewsets.ViewSet):
             status_code = status.HTTP_200_OK
         return Response(result, status=status_code)
 
-    def aggregate_data(self, yr_e, y_var, buildings):
-        aggregation_method = {
-            'use_description': self.aggregate_use_description,
-            'year_built': self.aggregate_year_built,
-            'gross_floor_area': self.aggregate_gross_floor_area,
-
-
-        }
-        return aggregation_method[y_var](yr_e, buildings)
-
-    def aggregate_use_description(self, yr_e, buildings):
-        # Group buildings in this year_ending group into uses
-        chart_data = []
-        grouped_uses = defaultdict(list)
-        for b in buildings:
-            grouped_uses[str(b['y']).lower()].append(b)
-
-        # Now iterate over use groups to make each chart item
-        for use, buildings_in_uses in grouped_uses.items():
-            chart_data.append({
-                'x': median([b['x'] for b in buildings_in_uses]),
-                'y': use.capitalize(),
-                'yr_e': yr_e
-            })
-        return chart_data
-
-    def aggregate_year_built(self, yr_e, buildings):
-        # Group buildings in this year_ending group into decades
-        chart_data = []
-        grouped_decades = defaultdict(list)
-        for b in buildings:
-            grouped_decades['%s0' % str(b['y'])[:-1]].append(b)
-
-        # Now iterate over decade groups to make each chart item
-        for decade, buildings_in_decade in grouped_decades.items():
-            chart_data.append({
-                'x': median(
-                    [b['x'] for b in buildings_in_decade]
-                ),
-                'y': '%s-%s' % (decade, '%s9' % str(decade)[:-1]),  # 1990-1999
-                'yr_e': yr_e
-            })
-        return chart_data
-
-    def aggregate_gross_floor_area(self, yr_e, buildings):
-        chart_data = []
-        y_display_map = {
-            0: '0-99k',
-            100000: '100-199k',
-            200000: '200k-299k',
-            300000: '300k-399k',
-            400000: '400-499k',
-            500000: '500-599k',
-            600000: '600-699k',
-            700000: '700-799k',
-            800000: '800-899k',
-            900000: '900-999k',
-            1000000: 'over 1,000k',
-        }
-        max_bin = max(y_display_map)
-
-        # Group buildings in this year_ending group into ranges
-        grouped_ranges = defaultdict(list)
-        for b in buildings:
-            area = b['y']
-            # make sure anything greater than the biggest bin gets put in
-            # the biggest bin
-            range_bin = min(max_bin, round_down_hundred_thousand(area))
-            grouped_ranges[range_bin].append(b)
-
-        # Now iterate over range groups to make each chart item
-        for range_floor, buildings_in_range in grouped_ranges.items():
-            chart_data.append({
-                'x': median(
-                    [b['x'] for b in buildings_in_range]
-                ),
-                'y': y_display_map[range_floor],
-                'yr_e': yr_e
-            })
-        return chart_data
-
     @swagger_auto_schema(
         manual_parameters=[
             AutoSchemaHelper.query_string_field(
@@ -1239,16 +1107,24 @@ class OrganizationViewSet(viewsets.ViewSet):
 
         # Gather base data
         cycles = self.get_cycles(params['start'], params['end'], pk)
-        data = self.get_raw_report_data(
-            pk, cycles,
+        organization = get_request_org(request, pk)
+        data = get_report_data(
+            organization, cycles,
             params['x_var'], params['y_var'], False
         )
+        if params['y_var'] in AGGREGATED_Y_VARS:
+            aggregated_data = get_aggregated_report_data(
+                organization, cycles,
+                params['x_var'], params['y_var'], False
+            )
+        else:
+            aggregated_data = [{'chart_data': []} for _ in data]
 
         base_row = data_row_start + 1
         agg_row = data_row_start + 1
         count_row = data_row_start + 1
 
-        for cycle_results in data:
+        for cycle_results, aggregated_cycle_results in zip(data, aggregated_data):
             total_count = cycle_results['property_counts']['num_properties']
             with_data_count = cycle_results['property_counts']['num_properties_w-data']
             yr_e = cycle_results['property_counts']['yr_e']
@@ -1271,7 +1147,7 @@ class OrganizationViewSet(viewsets.ViewSet):
                 base_row += 1
 
             # Gather and write Agg data
-            for agg_datum in self.aggregate_data(yr_e, params['y_var'], data_rows):
+            for agg_datum in aggregated_cycle_results['chart_data']:
                 agg_sheet.write(agg_row, data_col_start, agg_datum.get('x'))
                 agg_sheet.write(agg_row, data_col_start + 1, agg_datum.get('y'))
                 agg_sheet.write(agg_row, data_col_start + 2, agg_datum.get('yr_e'))
@@ -1293,7 +1169,7 @@ class OrganizationViewSet(viewsets.ViewSet):
         """
         Returns true if the organization has a mapquest api key
         """
-        org = Organization.objects.get(id=pk)
+        org = get_request_org(request, pk)
 
         if org.mapquest_api_key:
             return True
@@ -1307,6 +1183,6 @@ class OrganizationViewSet(viewsets.ViewSet):
         """
         Returns the organization's geocoding_enabled setting
         """
-        org = Organization.objects.get(id=pk)
+        org = get_request_org(request, pk)
 
         return org.geocoding_enabled
@@ -19,8 +19,7 @@ from seed.building_sync.building_sync import BuildingSync
 from seed.data_importer.utils import usage_point_id
 from seed.decorators import ajax_request_class
 from seed.hpxml.hpxml import HPXML
-from seed.lib.superperms.orgs.decorators import has_perm_class
-from seed.lib.superperms.orgs.models import Organization
+from seed.lib.superperms.orgs.decorators import get_request_org, has_perm_class
 from seed.models import (AUDIT_USER_EDIT, DATA_STATE_MATCHING,
                          MERGE_STATE_DELETE, MERGE_STATE_MERGED,
                          MERGE_STATE_NEW, VIEW_LIST, VIEW_LIST_PROPERTY,
@@ -50,6 +49,7 @@ from seed.utils.properties import (get_changed_fields,
                                    pair_unpair_property_taxlot,
                                    properties_across_cycles,
                                    update_result_with_master)
+from seed.utils.search import filter_and_sort_inventory
 
 # Global toggle that controls whether or not to display the raw extra
 # data fields in the columns returned for the view.
@@ -190,6 +190,12 @@ class PropertyViewSet(generics.GenericAPIView, viewsets.ViewSet, OrgMixin, Profi
                 .filter(property__organization_id=org_id, cycle=cycle) \
                 .order_by('id')  # TODO: test adding .only(*fields['PropertyState'])
 
+        # Retrieve all the columns that are in the db for this organization
+        columns_from_database = Column.retrieve_all(org_id, 'property', False)
+
+        # Filter and sort on the columns given in the query parameters
+        property_views_list = filter_and_sort_inventory(property_views_list, request.query_params, columns_from_database)
+
         paginator = Paginator(property_views_list, per_page)
 
         try:
@@ -202,10 +208,7 @@ class PropertyViewSet(generics.GenericAPIView, viewsets.ViewSet, OrgMixin, Profi
             property_views = paginator.page(paginator.num_pages)
             page = paginator.num_pages
 
-        org = Organization.objects.get(pk=org_id)
-
-        # Retrieve all the columns that are in the db for this organization
-        columns_from_database = Column.retrieve_all(org_id, 'property', False)
+        org = get_request_org(request, org_id)
 
         # This uses an old method of returning the show_columns. There is a new method that
         # is prefered in v2.1 API with the ProfileIdMixin.
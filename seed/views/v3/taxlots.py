@@ -13,8 +13,7 @@ from rest_framework.decorators import action
 from rest_framework.parsers import JSONParser
 from rest_framework.renderers import JSONRenderer
 from seed.decorators import ajax_request_class
-from seed.lib.superperms.orgs.decorators import has_perm_class
-from seed.lib.superperms.orgs.models import Organization
+from seed.lib.superperms.orgs.decorators import get_request_org, has_perm_class
 from seed.models import (AUDIT_USER_EDIT, DATA_STATE_MATCHING,
                          MERGE_STATE_DELETE, MERGE_STATE_MERGED,
                          MERGE_STATE_NEW, VIEW_LIST, VIEW_LIST_TAXLOT, Column,
@@ -35,6 +34,7 @@ from seed.utils.merge import merge_taxlots
 from seed.utils.properties import (get_changed_fields,
                                    pair_unpair_property_taxlot,
                                    update_result_with_master)
+from seed.utils.search import filter_and_sort_inventory
 from seed.utils.taxlots import taxlots_across_cycles
 
 ErrorState = namedtuple('ErrorState', ['status_code', 'message'])
@@ -108,6 +108,12 @@ class TaxlotViewSet(viewsets.ViewSet, OrgMixin, ProfileIdMixin):
                 .filter(taxlot__organization_id=org_id, cycle=cycle) \
                 .order_by('id')
 
+        # Retrieve all the columns that are in the db for this organization
+        columns_from_database = Column.retrieve_all(org_id, 'taxlot', False)
+
+        # Filter and sort on the columns given in the query parameters
+        taxlot_views_list = filter_and_sort_inventory(taxlot_views_list, request.query_params, columns_from_database)
+
         paginator = Paginator(taxlot_views_list, per_page)
 
         try:
@@ -120,10 +126,7 @@ class TaxlotViewSet(viewsets.ViewSet, OrgMixin, ProfileIdMixin):
             taxlot_views = paginator.page(paginator.num_pages)
             page = paginator.num_pages
 
-        org = Organization.objects.get(pk=org_id)
-
-        # Retrieve all the columns that are in the db for this organization
-        columns_from_database = Column.retrieve_all(org_id, 'taxlot', False)
+        org = get_request_org(request, org_id)
 
         # This uses an old method of returning the show_columns. There is a new method that
         # is preferred in v2.1 API with the ProfileIdMixin.
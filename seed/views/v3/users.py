@@ -18,13 +18,14 @@ from rest_framework.decorators import action
 from seed.decorators import ajax_request_class
 from seed.landing.models import SEEDUser as User, SEEDUser
 from seed.lib.superperms.orgs.decorators import PERMS
-from seed.lib.superperms.orgs.decorators import has_perm_class
+from seed.lib.superperms.orgs.decorators import get_request_org, has_perm_class
 from seed.lib.superperms.orgs.models import (
     ROLE_OWNER,
     ROLE_MEMBER,
     ROLE_VIEWER,
     Organization,
     OrganizationUser,
+    invalidate_org_context,
 )
 from seed.models.data_quality import Rule
 from seed.tasks import (
@@ -197,7 +198,7 @@ class UserViewSet(viewsets.ViewSet):
         user, created = User.objects.get_or_create(username=username.lower())
 
         if org_id:
-            org = Organization.objects.get(pk=org_id)
+            org = get_request_org(request, org_id)
             org_created = False
         else:
             org, _, _ = create_organization(user, org_name)
@@ -223,6 +224,8 @@ class UserViewSet(viewsets.ViewSet):
                 organization_id=org.pk,
                 user_id=user.pk
             ).update(role_level=_get_role_from_js(role))
+            # the update does not send the signals that invalidate the cached permissions
+            invalidate_org_context(org.pk)
 
         if created:
             user.set_unusable_password()
@@ -329,6 +332,8 @@ class UserViewSet(viewsets.ViewSet):
             user_id=user_id,
             organization_id=organization_id
         ).update(role_level=role)
+        # the update does not send the signals that invalidate the cached permissions
+        invalidate_org_context(organization_id)
 
         return JsonResponse({'status': 'success'})
 
@@ -553,7 +558,7 @@ class UserViewSet(viewsets.ViewSet):
             org = None
         else:
             try:
-                org = Organization.objects.get(pk=org_id)
+                org = get_request_org(request, org_id)
             except Organization.DoesNotExist:
                 message = 'organization does not exist'
                 error = True